@@ -1,6 +1,9 @@
 """
 EternalVista Application Entry Point.
 This script initializes and runs the Flask application.
+
+`python app.py` starts the development server. In production run it with
+gunicorn instead, which imports `app` from here: gunicorn -c gunicorn.conf.py
 """
 import os
 from eternaal import create_app
@@ -11,4 +14,6 @@ if __name__ == '__main__':
     # Run the application
     # host='0.0.0.0' allows access from other machines/containers
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=True)
+    # The debugger allows running code from the browser, so it is opt-in
+    debug = os.environ.get('FLASK_DEBUG', '0') == '1'
+    app.run(host='0.0.0.0', port=port, debug=debug)
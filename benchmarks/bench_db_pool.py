@@ -0,0 +1,70 @@
+"""
+Microbenchmark: requests/sec on GET /api/destinations with and without the
+SQLite connection pool.
+
+Runs the app in-process through the Flask test client so only the app and
+database cost is measured (no network). DB_POOL_SIZE=0 reproduces the old
+connect-per-request behaviour.
+
+Usage:
+    python benchmarks/bench_db_pool.py [--requests 2000] [--destinations 50]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from eternaal import create_app
+from eternaal.db import get_db, init_db
+
+
+def seed(app, destinations):
+    with app.app_context():
+        init_db()
+        db = get_db()
+        db.executemany(
+            'INSERT INTO destination (name, description, image_url, availability) VALUES (?, ?, ?, ?)',
+            [(f'Destination {i}', 'Benchmark destination ' * 5, None, 1) for i in range(destinations)]
+        )
+        db.commit()
+
+
+def run(db_path, pool_size, requests):
+    app = create_app({'DATABASE': db_path, 'DB_POOL_SIZE': pool_size})
+    client = app.test_client()
+    client.get('/api/destinations')  # warm up imports/templates
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get('/api/destinations')
+        assert response.status_code == 200
+    elapsed = time.perf_counter() - start
+    return requests / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--destinations', type=int, default=50)
+    args = parser.parse_args()
+
+    db_fd, db_path = tempfile.mkstemp(suffix='.sqlite')
+    try:
+        seed(create_app({'DATABASE': db_path}), args.destinations)
+        before = run(db_path, 0, args.requests)
+        after = run(db_path, 8, args.requests)
+    finally:
+        os.close(db_fd)
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+
+    print(f'GET /api/destinations x {args.requests} ({args.destinations} destinations)')
+    print(f'  connect per request: {before:8.0f} req/s')
+    print(f'  pooled connections:  {after:8.0f} req/s  ({after / before:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
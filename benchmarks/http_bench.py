@@ -0,0 +1,414 @@
+"""
+HTTP benchmark: throughput and latency of each API endpoint under
+concurrent load, against gunicorn started locally with gunicorn.conf.py.
+
+Seeds a throwaway database (destinations, venues, users, bookings), starts
+gunicorn on a free port, then runs each scenario for --duration seconds with
+--clients concurrent keep-alive clients (separate processes, so the load
+generator is not limited by one GIL). Reports requests/sec and
+p50/p95/p99/max latency per scenario, and saves everything as JSON.
+
+Usage:
+    python benchmarks/http_bench.py run [--clients 16] [--duration 5] [--workers 4]
+                                        [--scenarios catalog,login] [--out results.json]
+                                        [--app-config DB_WRITE_QUEUE=true ...]
+    python benchmarks/http_bench.py compare BASELINE.json CANDIDATE.json [--threshold 0.10]
+
+compare exits with status 1 if any scenario's throughput dropped, or its p95
+latency rose, by more than the threshold.
+"""
+import argparse
+import datetime
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from eternaal import create_app
+from eternaal.db import get_db, init_db
+
+PASSWORD = 'benchmark'
+MONTHS = ['2026-%02d' % m for m in range(1, 13)]
+WORDS = ['Castle', 'Manor', 'Abbey', 'Lodge', 'House', 'Hall', 'Gardens', 'Estate']
+
+
+# --- Seeding ---
+
+def seed(db_path, destinations, venues_per_destination, users, bookings):
+    from werkzeug.security import generate_password_hash
+
+    app = create_app({'DATABASE': db_path})
+    with app.app_context():
+        init_db()
+        db = get_db()
+        rng = random.Random(42)
+        db.executemany(
+            'INSERT INTO destination (id, name, description, availability) VALUES (?, ?, ?, 1)',
+            [(d, f'Destination {d}', f'Weddings in {rng.choice(WORDS)} country, region {d}')
+             for d in range(1, destinations + 1)]
+        )
+        venue_count = destinations * venues_per_destination
+        db.executemany(
+            'INSERT INTO venue (id, destination_id, name, capacity, price, availability) VALUES (?, ?, ?, ?, ?, 1)',
+            [(v, (v - 1) // venues_per_destination + 1, f'{rng.choice(WORDS)} {v}',
+              rng.randint(20, 400), rng.randint(500, 10000)) for v in range(1, venue_count + 1)]
+        )
+        # One hash for everyone: hashing thousands of passwords would dominate seeding
+        password = generate_password_hash(PASSWORD)
+        db.executemany(
+            'INSERT INTO user (username, password, role) VALUES (?, ?, ?)',
+            [(f'user{u}', password, 'customer') for u in range(users)]
+        )
+        seen = set()
+        rows = []
+        while len(rows) < bookings:
+            venue = rng.randint(1, venue_count)
+            day = f'{rng.choice(MONTHS)}-{rng.randint(1, 28):02d}'
+            if (venue, day) in seen:
+                continue
+            seen.add((venue, day))
+            rows.append((f'user{rng.randrange(users)}', (venue - 1) // venues_per_destination + 1, venue, day, 'pending'))
+        db.executemany(
+            'INSERT INTO booking (customer_name, destination_id, venue_id, booking_date, status) VALUES (?, ?, ?, ?, ?)',
+            rows
+        )
+        db.commit()
+        db.execute('ANALYZE')
+    return {'destinations': destinations, 'venues': venue_count, 'venues_per_destination': venues_per_destination,
+            'users': users, 'bookings': bookings}
+
+
+# --- Scenarios ---
+# Each returns (method, path, json body or None); `who` is the user to log in
+# as first ('admin', 'customer' or None) and `ok` the statuses that count as
+# success. Reads come first and writes after them; delete_booking is last so
+# the rows it removes do not change what the other scenarios measure.
+
+def _venue(size, rng):
+    return rng.randint(1, size['venues'])
+
+
+def _dest_of(size, venue):
+    return (venue - 1) // size['venues_per_destination'] + 1
+
+
+def _new_booking(size, rng):
+    venue = _venue(size, rng)
+    return {'customer_name': 'bench', 'destination_id': _dest_of(size, venue),
+            'venue_id': venue, 'booking_date': f'2027-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'}
+
+
+def _update_venue(size, rng):
+    venue = _venue(size, rng)
+    return ('PUT', f'/api/venues/{venue}', {
+        'destination_id': _dest_of(size, venue), 'name': f'{rng.choice(WORDS)} {venue}',
+        'capacity': rng.randint(20, 400), 'price': rng.randint(500, 10000)})
+
+
+def _import(size, rng):
+    name = f'Imported {rng.randrange(10 ** 9)}'
+    return [{'name': name, 'description': 'bench',
+             'venues': [{'name': f'{name} {WORDS[i]}', 'capacity': 100, 'price': 1000} for i in range(5)]}]
+
+
+def _batch(size, rng):
+    venue = _venue(size, rng)
+    return {'requests': [
+        {'method': 'GET', 'path': f"/api/venues?limit=20&destination_id={_dest_of(size, venue)}"},
+        {'method': 'GET', 'path': f'/api/venues/{venue}/availability?month={rng.choice(MONTHS)}'},
+        {'method': 'POST', 'path': '/api/bookings', 'body': _new_booking(size, rng)},
+    ]}
+
+
+SCENARIOS = {
+    'index': dict(who=None, ok={200}, request=lambda size, rng: ('GET', '/', None)),
+    'catalog': dict(who=None, ok={200}, request=lambda size, rng: ('GET', '/api/catalog', None)),
+    'destinations': dict(who=None, ok={200}, request=lambda size, rng: ('GET', '/api/destinations', None)),
+    'venues_page': dict(who=None, ok={200}, request=lambda size, rng: (
+        'GET', f"/api/venues?limit=50&destination_id={rng.randint(1, size['destinations'])}", None)),
+    'venue_search': dict(who=None, ok={200}, request=lambda size, rng: (
+        'GET', f"/api/venues/search?destination_id={rng.randint(1, size['destinations'])}"
+               f"&date={rng.choice(MONTHS)}-{rng.randint(1, 28):02d}&guests=100", None)),
+    'search': dict(who=None, ok={200}, request=lambda size, rng: (
+        'GET', f"/api/search?q={rng.choice(WORDS)[:rng.randint(2, 5)]}", None)),
+    'availability': dict(who=None, ok={200}, request=lambda size, rng: (
+        'GET', f'/api/venues/{_venue(size, rng)}/availability?month={rng.choice(MONTHS)}', None)),
+    'bookings_admin': dict(who='admin', ok={200}, request=lambda size, rng: ('GET', '/api/bookings?limit=50', None)),
+    'bookings_customer': dict(who='customer', ok={200}, request=lambda size, rng: ('GET', '/api/bookings', None)),
+    'admin_bootstrap': dict(who='admin', ok={200}, request=lambda size, rng: (
+        'GET', '/api/admin/bootstrap?limit=50&bookings_order=desc', None)),
+    'export_bookings': dict(who='admin', ok={200}, request=lambda size, rng: (
+        'GET', f"/api/bookings/export?format={rng.choice(['csv', 'ndjson'])}", None)),
+    'login': dict(who=None, ok={200}, request=lambda size, rng: (
+        'POST', '/login', {'username': f"user{rng.randrange(size['users'])}", 'password': PASSWORD})),
+    'create_booking': dict(who='customer', ok={201, 409}, request=lambda size, rng: (
+        'POST', '/api/bookings', _new_booking(size, rng))),
+    'update_booking': dict(who='admin', ok={200}, request=lambda size, rng: (
+        # Setting a pending booking to pending is always allowed, and still a write
+        'PATCH', f"/api/bookings/{rng.randint(1, size['bookings'])}", {'status': 'pending'})),
+    'bulk_update_bookings': dict(who='admin', ok={200}, request=lambda size, rng: (
+        'PATCH', '/api/bookings',
+        {'updates': [{'id': i, 'status': 'pending'} for i in rng.sample(range(1, size['bookings'] + 1), 20)]})),
+    'create_destination': dict(who='admin', ok={201}, request=lambda size, rng: (
+        'POST', '/api/destinations', {'name': f'New {rng.randrange(10 ** 9)}', 'description': 'bench'})),
+    'update_venue': dict(who='admin', ok={200}, request=_update_venue),
+    'import_catalog': dict(who='admin', ok={201}, request=lambda size, rng: ('POST', '/api/import', _import(size, rng))),
+    # Two reads and a booking in one request, each answered separately
+    'batch': dict(who='customer', ok={200}, request=lambda size, rng: ('POST', '/api/batch', _batch(size, rng))),
+    'delete_booking': dict(who='admin', ok={200}, request=lambda size, rng: (
+        'DELETE', f"/api/bookings/{rng.randint(1, size['bookings'])}", None)),
+}
+
+
+# --- Load generation ---
+
+class Client:
+    """One keep-alive HTTP connection with a session cookie."""
+
+    def __init__(self, port):
+        self.port = port
+        self.cookie = None
+        self.conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+
+    def request(self, method, path, body=None):
+        headers = {}
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            # Reconnect once; the server may have closed an idle keep-alive connection
+            self.conn.close()
+            self.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            response.read()
+        cookie = response.getheader('Set-Cookie')
+        if cookie:
+            self.cookie = cookie.split(';', 1)[0]
+        return response.status
+
+
+def client_loop(args):
+    port, name, size, seed_value, duration = args
+    scenario = SCENARIOS[name]
+    rng = random.Random(seed_value)
+    client = Client(port)
+    if scenario['who'] == 'admin':
+        client.request('POST', '/login', {'username': 'admin', 'password': 'admin'})
+    elif scenario['who'] == 'customer':
+        client.request('POST', '/login', {'username': f"user{rng.randrange(size['users'])}", 'password': PASSWORD})
+
+    latencies = []
+    statuses = {}
+    errors = 0
+    # Timed from here, so process start-up and logging in are not counted
+    started = time.perf_counter()
+    until = started + duration
+    while time.perf_counter() < until:
+        method, path, body = scenario['request'](size, rng)
+        start = time.perf_counter()
+        try:
+            status = client.request(method, path, body)
+        except (http.client.HTTPException, OSError):
+            status = 'error'
+        latencies.append(time.perf_counter() - start)
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+        if status not in scenario['ok']:
+            errors += 1
+    return latencies, statuses, errors, time.perf_counter() - started
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(pool, port, name, size, clients, duration):
+    results = pool.map(client_loop, [(port, name, size, i, duration) for i in range(clients)])
+
+    latencies = sorted(l for r in results for l in r[0])
+    statuses = {}
+    for _, counts, _, _ in results:
+        for status, count in counts.items():
+            statuses[status] = statuses.get(status, 0) + count
+    ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        'requests': len(latencies),
+        'errors': sum(r[2] for r in results),
+        'rps': round(sum(len(r[0]) / r[3] for r in results), 1),
+        'p50_ms': ms(percentile(latencies, 50)),
+        'p95_ms': ms(percentile(latencies, 95)),
+        'p99_ms': ms(percentile(latencies, 99)),
+        'max_ms': ms(latencies[-1] if latencies else None),
+        'statuses': statuses,
+    }
+
+
+# --- Server ---
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(db_path, port, args):
+    env = dict(os.environ,
+               PORT=str(port),
+               WEB_CONCURRENCY=str(args.workers),
+               GUNICORN_WORKER_CLASS=args.worker_class,
+               GUNICORN_THREADS=str(args.threads),
+               ETERNAAL_DATABASE=db_path,
+               ETERNAAL_SECRET_KEY='benchmark')
+    for setting in args.app_config:
+        key, _, value = setting.partition('=')
+        env[f'ETERNAAL_{key}'] = value
+    log = open(os.path.join(os.path.dirname(db_path), 'gunicorn.log'), 'w')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--access-logfile', '/dev/null'],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f'gunicorn exited, see {log.name}')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/destinations')
+            if conn.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit(f'gunicorn did not start, see {log.name}')
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    names = args.scenarios.split(',') if args.scenarios else list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenario(s): {', '.join(unknown)}. Choose from: {', '.join(SCENARIOS)}")
+
+    folder = tempfile.mkdtemp(prefix='eternaal-bench-')
+    db_path = os.path.join(folder, 'bench.sqlite')
+    print(f'Seeding {db_path} ...')
+    size = seed(db_path, args.destinations, args.venues_per_destination, args.users, args.bookings)
+
+    port = free_port()
+    server = start_gunicorn(db_path, port, args)
+    report = {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'settings': {'clients': args.clients, 'duration': args.duration, 'workers': args.workers,
+                     'worker_class': args.worker_class, 'threads': args.threads,
+                     'app_config': args.app_config},
+        'dataset': size,
+        'scenarios': {},
+    }
+    try:
+        with multiprocessing.get_context('spawn').Pool(args.clients) as pool:
+            for name in names:
+                result = run_scenario(pool, port, name, size, args.clients, args.duration)
+                report['scenarios'][name] = result
+                print(f"{name:20} {result['rps']:9.1f} req/s  p50 {result['p50_ms']:8.2f} ms  "
+                      f"p95 {result['p95_ms']:8.2f} ms  p99 {result['p99_ms']:8.2f} ms  errors {result['errors']}")
+    finally:
+        server.terminate()
+        server.wait()
+    shutil.rmtree(folder, ignore_errors=True)
+
+    out = args.out or os.path.join(ROOT, 'benchmarks', 'results',
+                                   f"http-{time.strftime('%Y%m%d-%H%M%S')}-{report['commit'] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Saved {out}')
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    regressions = []
+    print(f"{'scenario':20} {'req/s':>21} {'p95 ms':>23}")
+    for name, new in candidate['scenarios'].items():
+        old = baseline['scenarios'].get(name)
+        if old is None:
+            print(f'{name:20} (not in baseline)')
+            continue
+        rps_change = (new['rps'] - old['rps']) / old['rps'] if old['rps'] else 0.0
+        p95_change = (new['p95_ms'] - old['p95_ms']) / old['p95_ms'] if old['p95_ms'] else 0.0
+        flag = ''
+        if rps_change < -args.threshold or p95_change > args.threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:20} {old['rps']:8.1f} -> {new['rps']:8.1f} ({rps_change:+6.1%})"
+              f" {old['p95_ms']:7.2f} -> {new['p95_ms']:7.2f} ({p95_change:+6.1%}){flag}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Seed a database, start gunicorn and benchmark it.')
+    run_parser.add_argument('--scenarios', help=f"Comma-separated, default all: {', '.join(SCENARIOS)}")
+    run_parser.add_argument('--clients', type=int, default=16, help='Concurrent clients (default 16).')
+    run_parser.add_argument('--duration', type=float, default=5.0, help='Seconds per scenario (default 5).')
+    run_parser.add_argument('--workers', type=int, default=4, help='Gunicorn workers (default 4).')
+    run_parser.add_argument('--worker-class', default='sync', choices=['sync', 'gthread'])
+    run_parser.add_argument('--threads', type=int, default=4, help='Threads per gthread worker.')
+    run_parser.add_argument('--app-config', action='append', default=[], metavar='KEY=VALUE',
+                            help='App setting passed to gunicorn as ETERNAAL_KEY, e.g. DB_WRITE_QUEUE=true.')
+    run_parser.add_argument('--destinations', type=int, default=200)
+    run_parser.add_argument('--venues-per-destination', type=int, default=20)
+    run_parser.add_argument('--users', type=int, default=2000)
+    run_parser.add_argument('--bookings', type=int, default=50000)
+    run_parser.add_argument('--out', help='Result file (default benchmarks/results/http-<time>-<commit>.json).')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser('compare', help='Diff two result files and flag regressions.')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help='Allowed relative change before flagging (default 0.10).')
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -10,12 +10,64 @@ def create_app(test_config=None):
     app.config.from_mapping(
         SECRET_KEY='dev_secret_key_change_in_prod',
         DATABASE=os.path.join(app.instance_path, 'eternaal.sqlite'),
-        UPLOAD_FOLDER=os.path.join(app.root_path, 'static/uploads')
+        UPLOAD_FOLDER=os.path.join(app.root_path, 'static/uploads'),
+        MAX_UPLOAD_BYTES=10 * 1024 * 1024,  # image uploads (see uploads.py)
+        # SQLite connection pools / tuning (see db.py). DB_POOL_SIZE is for
+        # writer connections, DB_READ_POOL_SIZE for the read-only ones that
+        # GET/HEAD requests use when DB_ROUTE_READS is on. 0 disables pooling.
+        DB_POOL_SIZE=8,
+        DB_READ_POOL_SIZE=8,
+        DB_ROUTE_READS=True,
+        # Send writes through one writer thread per worker with group commit
+        # and a cross-process lock (see writer.py)
+        DB_WRITE_QUEUE=False,
+        DB_WRITE_BATCH_SIZE=32,
+        SQLITE_JOURNAL_MODE='WAL',
+        SQLITE_SYNCHRONOUS='NORMAL',
+        SQLITE_CACHE_SIZE=-16000,  # negative = KiB, so ~16 MB per connection
+        SQLITE_MMAP_SIZE=64 * 1024 * 1024,
+        SQLITE_BUSY_TIMEOUT=5000,  # milliseconds
+        # Catalog ETags (see catalog.py): how often each worker re-checks the
+        # data version, and the Cache-Control sent with catalog responses.
+        CATALOG_VERSION_TTL=1.0,  # seconds
+        CATALOG_CACHE_CONTROL='public, no-cache',
+        # Per-worker cache of logged-in user rows (see auth.py)
+        USER_CACHE_SIZE=1024,
+        USER_CACHE_TTL=10,  # seconds
+        # Resized image copies (see images.py)
+        IMAGE_DERIVATIVE_FOLDER=os.path.join(app.root_path, 'static/derived'),
+        IMAGE_WIDTHS=(320, 640, 1024, 1600),
+        IMAGE_QUALITY=80,
+        # Output of `flask build-assets` (see assets.py)
+        ASSETS_FOLDER=os.path.join(app.root_path, 'static/dist'),
+        # Request/SQL metrics at /metrics (see metrics.py). METRICS_DIR is
+        # where gunicorn workers share their numbers; None = this process only.
+        METRICS_ENABLED=True,
+        METRICS_DIR=None,
+        METRICS_FLUSH_INTERVAL=5.0,  # seconds
+        # Besides admins, /metrics is served to `Authorization: Bearer <token>`
+        # and, if allowed, to localhost (not behind a same-host proxy!)
+        METRICS_TOKEN=None,
+        METRICS_ALLOW_LOCALHOST=False,
+        # Slow-query and N+1 logging (see sqltrace.py), off by default
+        SQL_TRACE=False,
+        SQL_SLOW_THRESHOLD=0.1,  # seconds
+        SQL_REPEAT_THRESHOLD=10,  # same statement more often than this in one request
+        # Live booking events for the admin page (see events.py)
+        EVENTS_POLL_INTERVAL=0.5,  # seconds
+        EVENTS_BUFFER_SIZE=1000,  # events kept per worker for reconnecting clients
+        EVENTS_HEARTBEAT=15,  # seconds
+        EVENTS_MAX_STREAM=300,  # seconds before a stream ends and the browser reconnects
+        # Most sub-requests one /api/batch call may carry (see routes.batch)
+        BATCH_MAX_REQUESTS=50,
     )
 
     if test_config is None:
         # load the instance config, if it exists, when not testing
         app.config.from_pyfile('config.py', silent=True)
+        # then ETERNAAL_* environment variables, e.g. ETERNAAL_SECRET_KEY or
+        # ETERNAAL_DATABASE (values are parsed as JSON where possible)
+        app.config.from_prefixed_env('ETERNAAL')
     else:
         # load the test config if passed in
         app.config.from_mapping(test_config)
@@ -32,8 +84,33 @@ def create_app(test_config=None):
     from . import db
     db.init_app(app)
 
+    # Registered early so its timing covers the other before_request hooks
+    from . import metrics
+    metrics.init_app(app)
+
+    from . import sqltrace
+    sqltrace.init_app(app)
+
+    from . import writer
+    writer.init_app(app)
+
+    from . import catalog
+    catalog.init_app(app)
+
+    from . import importer
+    importer.init_app(app)
+
+    from . import images
+    images.init_app(app)
+
+    from . import assets
+    assets.init_app(app)
+
     from . import auth
-    app.register_blueprint(auth.bp)
+    auth.init_app(app)
+
+    from . import events
+    events.init_app(app)
 
     from . import routes
     app.register_blueprint(routes.bp)
@@ -42,3 +119,19 @@ def create_app(test_config=None):
     app.add_url_rule('/', endpoint='index')
 
     return app
+
+
+def warm_up(app, connections=1):
+    """
+    Open pooled database connections and build the catalog snapshot, so a
+    new worker's first requests do not pay for them. Called by gunicorn in
+    each worker before it starts accepting requests (see gunicorn.conf.py).
+    """
+    from . import catalog
+    from .db import get_read_db, get_pool, get_read_pool
+
+    with app.app_context():
+        # Most requests are reads; one writer connection is enough to start
+        get_read_pool().fill(connections)
+        get_pool().fill(1)
+        catalog.get_snapshot(get_read_db())
@@ -0,0 +1,159 @@
+"""
+Fingerprinted, precompressed CSS and JavaScript.
+
+`flask build-assets` copies every .css/.js file under static/ to
+ASSETS_FOLDER (static/dist/) with a hash of its content in the name
+(style.css -> style.3f9a1c2b.css), writes gzip and, if the `brotli` package
+is installed, brotli versions next to each, and records the names in
+manifest.json.
+
+Templates link assets with asset_url('style.css'). When the manifest lists
+the file, that is /assets/style.3f9a1c2b.css, served with the best
+precompressed variant the browser accepts and a year-long `immutable`
+Cache-Control: a changed file gets a new name, so it is never stale. Without
+a build, asset_url() falls back to the plain /static/ URL.
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import threading
+import click
+from flask import Blueprint, current_app, request, url_for, send_from_directory, abort
+from flask.cli import with_appcontext
+
+bp = Blueprint('assets', __name__, url_prefix='/assets')
+
+ASSET_EXTENSIONS = ('.css', '.js')
+# Build output and user content are not assets
+SKIP_FOLDERS = ('dist', 'derived', 'uploads')
+MANIFEST = 'manifest.json'
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# Content-Encoding -> file suffix, best first
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+class AssetManifest:
+    """The parsed manifest.json, re-read when the file changes."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.files = {}
+
+    def get(self, filename):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        with self.lock:
+            if mtime != self.mtime:
+                self.files = {}
+                if mtime is not None:
+                    with open(self.path, encoding='utf-8') as f:
+                        self.files = json.load(f)
+                self.mtime = mtime
+            return self.files.get(filename)
+
+
+def find_assets():
+    """Every .css/.js file under static/, as paths relative to it."""
+    root = current_app.static_folder
+    assets = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        if dirpath == root:
+            dirnames[:] = [d for d in dirnames if d not in SKIP_FOLDERS]
+        for filename in sorted(filenames):
+            if filename.endswith(ASSET_EXTENSIONS):
+                assets.append(os.path.relpath(os.path.join(dirpath, filename), root).replace(os.sep, '/'))
+    return sorted(assets)
+
+
+def _compress(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    # mtime=0 so the same input always gives the same .gz bytes
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    try:
+        import brotli
+    except ImportError:
+        return
+    with open(path + '.br', 'wb') as f:
+        f.write(brotli.compress(data, quality=11))
+
+
+def build_assets():
+    """Fingerprint and compress every asset, replacing ASSETS_FOLDER. Returns the manifest."""
+    root = current_app.static_folder
+    out = current_app.config['ASSETS_FOLDER']
+    if os.path.isdir(out):
+        shutil.rmtree(out)
+
+    manifest = {}
+    for asset in find_assets():
+        src = os.path.join(root, asset)
+        with open(src, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:8]
+        stem, ext = os.path.splitext(asset)
+        hashed = f'{stem}.{digest}{ext}'
+        dest = os.path.join(out, hashed)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.copyfile(src, dest)
+        _compress(dest)
+        manifest[asset] = hashed
+
+    with open(os.path.join(out, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def asset_url(filename):
+    """URL for a static CSS/JS file: fingerprinted if built, plain /static/ otherwise."""
+    hashed = current_app.extensions['eternaal_assets'].get(filename)
+    if hashed is None:
+        return url_for('static', filename=filename)
+    return url_for('assets.asset', filename=hashed)
+
+
+@bp.route('/<path:filename>')
+def asset(filename):
+    if filename == MANIFEST:
+        abort(404)
+    folder = current_app.config['ASSETS_FOLDER']
+    mimetype = 'text/css' if filename.endswith('.css') else 'text/javascript'
+
+    served, encoding = filename, None
+    for name, suffix in ENCODINGS:
+        if request.accept_encodings[name] and os.path.isfile(os.path.join(folder, filename + suffix)):
+            served, encoding = filename + suffix, name
+            break
+
+    response = send_from_directory(folder, served, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@click.command('build-assets')
+@with_appcontext
+def build_assets_command():
+    """Fingerprint and precompress CSS/JS into static/dist."""
+    manifest = build_assets()
+    for asset, hashed in sorted(manifest.items()):
+        click.echo(f'{asset} -> {hashed}')
+    click.echo(f'Built {len(manifest)} asset(s).')
+
+
+def init_app(app):
+    app.extensions['eternaal_assets'] = AssetManifest(
+        os.path.join(app.config['ASSETS_FOLDER'], MANIFEST)
+    )
+    app.add_template_global(asset_url)
+    app.register_blueprint(bp)
+    app.cli.add_command(build_assets_command)
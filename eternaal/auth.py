@@ -1,6 +1,9 @@
 import functools
+import threading
+import time
+from collections import OrderedDict
 from flask import (
-    Blueprint, flash, g, redirect, render_template, request, session, url_for, jsonify
+    Blueprint, flash, g, redirect, render_template, request, session, url_for, jsonify, current_app
 )
 from werkzeug.security import check_password_hash, generate_password_hash
 from eternaal.db import get_db
@@ -19,19 +22,111 @@ def login_required(view):
         return view(**kwargs)
     return wrapped_view
 
+def skip_user_load(view):
+    # A 'decorator' for public views that never look at g.user.
+    # load_logged_in_user skips the user lookup for them and sets g.user = None.
+    view.skip_user_load = True
+    return view
+
+# --- Helper: User Cache ---
+class UserCache:
+    """
+    Small per-worker LRU cache of user rows (as dicts), each kept for at most
+    USER_CACHE_TTL seconds.
+
+    Routes that change a user call invalidate_user(). Changes made by other
+    workers or scripts bump the 'users' row of the data_version table; every
+    request compares it with the version the cached rows were loaded under
+    (see sync) and the whole cache is dropped when it moved.
+    """
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.version = None
+
+    def sync(self, version):
+        # Forget every entry if some user row changed since they were loaded
+        with self.lock:
+            if version != self.version:
+                self.entries.clear()
+                self.version = version
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires = entry
+            if time.monotonic() >= expires:
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+            return user
+
+    def put(self, user_id, user):
+        if self.size <= 0:
+            return
+        with self.lock:
+            self.entries[user_id] = (user, time.monotonic() + self.ttl)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+def get_user_cache():
+    return current_app.extensions['eternaal_user_cache']
+
+def invalidate_user(user_id):
+    # Call after changing or deleting a user row.
+    get_user_cache().invalidate(user_id)
+
 # --- Helper: Load User ---
 @bp.before_app_request
 def load_logged_in_user():
     # Before every request, check if a 'user_id' is stored in the session.
-    # If yes, load the user from the database into 'g.user' so we can use it.
+    # If yes, load the user (from the cache if possible) into 'g.user'.
     user_id = session.get('user_id')
 
-    if user_id is None:
+    view = current_app.view_functions.get(request.endpoint)
+    if user_id is None or request.endpoint == 'static' or getattr(view, 'skip_user_load', False):
         g.user = None
-    else:
-        g.user = get_db().execute(
+        return
+
+    db = get_db()
+    cache = get_user_cache()
+    cache.sync(db.execute(
+        "SELECT version FROM data_version WHERE name = 'users'"
+    ).fetchone()['version'])
+    user = cache.get(user_id)
+    stamp = session.get('user_version')
+
+    # A different version in the session means another worker saw a newer
+    # (or this cache holds an older) copy of the user - reload it.
+    if user is None or (stamp is not None and user['session_version'] != stamp):
+        row = db.execute(
             'SELECT * FROM user WHERE id = ?', (user_id,)
         ).fetchone()
+        user = dict(row) if row is not None else None
+        if user is not None:
+            cache.put(user_id, user)
+        else:
+            cache.invalidate(user_id)
+
+    if user is not None and stamp != user['session_version']:
+        session['user_version'] = user['session_version']
+    g.user = user
+
+def init_app(app):
+    app.extensions['eternaal_user_cache'] = UserCache(
+        app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL']
+    )
+    app.register_blueprint(bp)
 
 # --- Register Route ---
 @bp.route('/register', methods=('GET', 'POST'))
@@ -117,6 +212,7 @@ def login():
         if error is None:
             session.clear() # Clear any old session data
             session['user_id'] = user['id'] # Store user ID in session cookie
+            session['user_version'] = user['session_version']
             
             # Redirect based on role
             if user['role'] == 'admin':
@@ -0,0 +1,69 @@
+"""
+Venue availability calendars, read from the venue_occupancy day bitmaps
+(see migrations/0007_venue_occupancy.sql).
+"""
+from datetime import date, timedelta
+from eternaal.pagination import PaginationError, date_arg
+
+MAX_RANGE_DAYS = 366
+
+
+def month_end(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+
+def parse_range(args):
+    """
+    Read the from/to (YYYY-MM-DD) or month (YYYY-MM) query parameters.
+    Defaults to the current calendar month.
+    """
+    month = args.get('month')
+    if month:
+        try:
+            start = date.fromisoformat(month + '-01')
+        except ValueError:
+            raise PaginationError('Invalid month, expected YYYY-MM')
+        return start, month_end(start)
+
+    today = date.today()
+    start = date_arg(args, 'from')
+    start = date.fromisoformat(start) if start else today.replace(day=1)
+    end = date_arg(args, 'to')
+    if end:
+        end = date.fromisoformat(end)
+    else:
+        end = month_end(start)
+
+    if end < start:
+        raise PaginationError("'to' must not be before 'from'")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise PaginationError(f'Date range is limited to {MAX_RANGE_DAYS} days')
+    return start, end
+
+
+def load_bitmaps(db, venue_ids, start, end):
+    """Return {venue_id: {'YYYY-MM': days_bitmap}} for the months touching the range."""
+    bitmaps = {venue_id: {} for venue_id in venue_ids}
+    if not venue_ids:
+        return bitmaps
+    rows = db.execute(
+        f"SELECT venue_id, month, days FROM venue_occupancy "
+        f"WHERE venue_id IN ({', '.join('?' * len(venue_ids))}) AND month BETWEEN ? AND ?",
+        list(venue_ids) + [start.strftime('%Y-%m'), end.strftime('%Y-%m')]
+    )
+    for row in rows:
+        bitmaps[row['venue_id']][row['month']] = row['days']
+    return bitmaps
+
+
+def calendar(months, start, end, available=True):
+    """Split the range into booked and free ISO dates using one venue's bitmaps."""
+    booked, free = [], []
+    day = start
+    while day <= end:
+        if months.get(day.strftime('%Y-%m'), 0) >> (day.day - 1) & 1:
+            booked.append(day.isoformat())
+        elif available:
+            free.append(day.isoformat())
+        day += timedelta(days=1)
+    return {'booked': booked, 'free': free}
@@ -0,0 +1,177 @@
+"""
+Catalog snapshot and conditional GET support for the public catalog data.
+
+The catalog (every destination with its venues) is built from a single
+joined query and kept in memory as ready-to-send JSON bytes.
+
+Every destination/venue write bumps the 'catalog' row of the data_version
+table (via triggers, see migrations/0005). Each worker re-reads that counter
+at most once per CATALOG_VERSION_TTL seconds, so /api/destinations,
+/api/venues and /api/catalog can answer If-None-Match with a 304 without
+touching the database. Routes that commit a destination/venue change also
+call invalidate() so the writing worker sees its own change immediately.
+
+Inside an open writer.transaction() (an atomic /api/batch) reads see
+changes that may still be rolled back, so nothing is cached or tagged there.
+"""
+import functools
+import hashlib
+import threading
+import time
+from flask import current_app, g, request, make_response, Response
+from eternaal.db import get_db, WRITE_TRANSACTION
+
+CATALOG_QUERY = '''
+    SELECT d.id AS dest_id, d.name AS dest_name, d.description AS dest_description,
+           d.image_url AS dest_image_url,
+           v.id AS venue_id, v.name AS venue_name, v.capacity, v.price,
+           v.image_url AS venue_image_url, v.availability AS venue_availability
+    FROM destination d
+    LEFT JOIN venue v ON v.destination_id = d.id
+    ORDER BY d.id, v.id
+'''
+
+
+class CatalogCache:
+    """Holds the catalog version and serialized catalog for one app (one per worker process)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.version = None
+        self.checked_at = 0.0
+        self.snapshot = None
+        self.snapshot_version = None
+
+
+def _cache():
+    return current_app.extensions['eternaal_catalog']
+
+
+def _uncommitted():
+    """True while reading through an open writer.transaction()."""
+    return WRITE_TRANSACTION in g
+
+
+def _read_version():
+    return get_db().execute(
+        "SELECT version FROM data_version WHERE name = 'catalog'"
+    ).fetchone()['version']
+
+
+def current_version():
+    """The catalog data version, re-read from the database at most once per TTL."""
+    if _uncommitted():
+        return _read_version()
+
+    cache = _cache()
+    ttl = current_app.config['CATALOG_VERSION_TTL']
+    with cache.lock:
+        if cache.version is not None and time.monotonic() - cache.checked_at < ttl:
+            return cache.version
+        generation = cache.generation
+
+    version = _read_version()
+
+    with cache.lock:
+        if cache.generation == generation:
+            cache.version = version
+            cache.checked_at = time.monotonic()
+    return version
+
+
+def build_catalog(db):
+    """Group the joined rows into the nested catalog structure."""
+    catalog = []
+    current = None
+    for row in db.execute(CATALOG_QUERY):
+        if current is None or current['id'] != row['dest_id']:
+            current = {
+                'id': row['dest_id'],
+                'name': row['dest_name'],
+                'description': row['dest_description'],
+                'image': row['dest_image_url'],
+                'price': None,  # Lowest venue price ("from" price), None if no venues
+                'items': []
+            }
+            catalog.append(current)
+
+        # LEFT JOIN gives one row with NULL venue columns for empty destinations
+        if row['venue_id'] is None:
+            continue
+
+        if current['price'] is None or row['price'] < current['price']:
+            current['price'] = row['price']
+        current['items'].append({
+            'id': row['venue_id'],
+            'name': row['venue_name'],
+            'description': f"Capacity: {row['capacity']} guests",
+            'capacity': row['capacity'],
+            'price': row['price'],
+            'image': row['venue_image_url'],
+            'status': 'Available' if row['venue_availability'] else 'Unavailable'
+        })
+    return catalog
+
+
+def get_snapshot(db):
+    """Return the catalog as JSON bytes, building it if the cached copy is stale."""
+    if _uncommitted():
+        return current_app.json.dumps(build_catalog(db)).encode('utf-8')
+
+    cache = _cache()
+    version = current_version()
+    with cache.lock:
+        if cache.snapshot is not None and cache.snapshot_version == version:
+            return cache.snapshot
+        generation = cache.generation
+
+    snapshot = current_app.json.dumps(build_catalog(db)).encode('utf-8')
+    with cache.lock:
+        # Only keep the result if nothing was written while we were building it
+        if cache.generation == generation:
+            cache.snapshot = snapshot
+            cache.snapshot_version = version
+    return snapshot
+
+
+def invalidate():
+    """Forget the cached version and catalog. Call after committing a destination/venue change."""
+    cache = _cache()
+    with cache.lock:
+        cache.generation += 1
+        cache.version = None
+        cache.snapshot = None
+
+
+def conditional(view):
+    """
+    Decorator for GET views whose output depends only on catalog data and the
+    query string. Adds a strong ETag and Cache-Control, and answers a
+    matching If-None-Match with 304 before the view runs.
+    """
+    @functools.wraps(view)
+    def wrapped_view(**kwargs):
+        if _uncommitted():
+            # The version may belong to changes that are rolled back later
+            return view(**kwargs)
+
+        digest = hashlib.blake2b(request.full_path.encode('utf-8'), digest_size=8).hexdigest()
+        etag = f'{current_version()}-{digest}'
+        cache_control = current_app.config['CATALOG_CACHE_CONTROL']
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = make_response(view(**kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        return response
+    return wrapped_view
+
+
+def init_app(app):
+    app.extensions['eternaal_catalog'] = CatalogCache()
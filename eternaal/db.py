@@ -1,30 +1,287 @@
+import os
+import pathlib
 import sqlite3
+import threading
+import time
 import click
-from flask import current_app, g
+from flask import current_app, g, request, has_request_context
 from flask.cli import with_appcontext
 
+class Cursor(sqlite3.Cursor):
+    """Reports how long each statement takes, including fetch*() calls."""
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.connection.notify(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.connection.notify(sql, time.perf_counter() - start)
+
+    # Rows are produced while fetching, so that time counts too. It is
+    # reported with sql=None so listeners do not count another statement.
+    def fetchone(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self.connection.notify(None, time.perf_counter() - start)
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        try:
+            return super().fetchmany(size if size is not None else self.arraysize)
+        finally:
+            self.connection.notify(None, time.perf_counter() - start)
+
+    def fetchall(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self.connection.notify(None, time.perf_counter() - start)
+
+    # Iterating (`for row in cursor`) is deliberately not timed: a Python
+    # __next__ costs more per row than the rest of this class per statement.
+    # Sorting/grouping queries do their work in execute() anyway.
+
+class Connection(sqlite3.Connection):
+    """
+    sqlite3 connection that passes (sql, seconds) for every statement to the
+    app's statement listeners (see add_statement_listener()).
+    """
+    listeners = ()
+
+    def cursor(self, factory=Cursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self.notify(sql_script, time.perf_counter() - start)
+
+    def notify(self, sql, seconds):
+        for listener in self.listeners:
+            listener(sql, seconds)
+
+class ConnectionPool:
+    """
+    Keeps long-lived SQLite connections for one worker process.
+
+    Connections are handed out by get_db() and returned at appcontext teardown
+    instead of being closed, so requests skip connect/PRAGMA setup and keep a
+    warm page cache. The pool remembers the pid it was created in and starts
+    empty again after a fork (e.g. gunicorn preload_app).
+    """
+
+    def __init__(self, connect, size):
+        self.connect = connect
+        self.size = size
+        self.lock = threading.Lock()
+        self.idle = []
+        self.pid = os.getpid()
+
+    def _check_fork(self):
+        if self.pid != os.getpid():
+            # Never reuse a connection inherited from the parent process
+            self.idle = []
+            self.pid = os.getpid()
+
+    def acquire(self):
+        with self.lock:
+            self._check_fork()
+            if self.idle:
+                return self.idle.pop()
+        return self.connect()
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                # A request left work uncommitted (e.g. it raised) - discard it
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            return
+
+        with self.lock:
+            self._check_fork()
+            if len(self.idle) < self.size:
+                self.idle.append(conn)
+                return
+        conn.close()
+
+    def fill(self, count):
+        """Open connections until `count` (at most the pool size) are idle."""
+        count = min(count, self.size)
+        with self.lock:
+            self._check_fork()
+            missing = count - len(self.idle)
+        for _ in range(missing):
+            conn = self.connect()
+            # Reads the schema so the first request does not have to
+            conn.execute('SELECT name FROM sqlite_master LIMIT 1').fetchall()
+            self.release(conn)
+
+    def close_all(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for conn in idle:
+            conn.close()
+
+def connect(config, listeners=(), readonly=False):
+    """
+    Open a new connection tuned from the app config.
+
+    readonly=True opens the file with mode=ro and PRAGMA query_only, so the
+    connection can never take the write lock; under WAL any number of them
+    read alongside the writer.
+    """
+    if readonly:
+        database = pathlib.Path(config['DATABASE']).resolve().as_uri() + '?mode=ro'
+    else:
+        database = config['DATABASE']
+    conn = sqlite3.connect(
+        database,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        # Pooled connections may be reused by a different thread (gthread workers)
+        check_same_thread=False,
+        factory=Connection,
+        uri=readonly
+    )
+    conn.listeners = listeners
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT'])}")
+    if readonly:
+        conn.execute('PRAGMA query_only = ON')
+    else:
+        # Only matter to connections that write
+        conn.execute(f"PRAGMA journal_mode = {config['SQLITE_JOURNAL_MODE']}")
+        conn.execute(f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}")
+    conn.execute(f"PRAGMA cache_size = {int(config['SQLITE_CACHE_SIZE'])}")
+    conn.execute(f"PRAGMA mmap_size = {int(config['SQLITE_MMAP_SIZE'])}")
+    conn.execute('PRAGMA foreign_keys = ON')
+    return conn
+
+def get_pool():
+    return current_app.extensions['eternaal_db_pool']
+
+def get_read_pool():
+    return current_app.extensions['eternaal_db_read_pool']
+
+def add_statement_listener(app, listener):
+    """
+    Call listener(sql, seconds) after every statement on the app's
+    connections; sql is None for time spent fetching rows. Listeners run on
+    every query, so they must be cheap.
+    """
+    app.extensions['eternaal_db_listeners'].append(listener)
+
+# Requests with these methods get a read-only connection from get_db()
+READ_METHODS = ('GET', 'HEAD')
+# g attribute holding the writer connection while writer.transaction() is open
+WRITE_TRANSACTION = '_write_transaction'
+
 def get_db():
+    """
+    The connection for this request: read-only for GET/HEAD requests (see
+    DB_ROUTE_READS), the writer otherwise, including outside requests (CLI,
+    tests). A GET view that writes must use get_write_db(). Inside an open
+    writer.transaction() reads also use the writer, so they see its changes.
+    """
+    if (has_request_context() and request.method in READ_METHODS
+            and current_app.config['DB_ROUTE_READS'] and WRITE_TRANSACTION not in g):
+        return get_read_db()
+    return get_write_db()
+
+def get_write_db():
     if 'db' not in g:
-        g.db = sqlite3.connect(
-            current_app.config['DATABASE'],
-            detect_types=sqlite3.PARSE_DECLTYPES
-        )
-        g.db.row_factory = sqlite3.Row
+        g.db = get_pool().acquire()
 
     return g.db
 
+def get_read_db():
+    if 'read_db' not in g:
+        g.read_db = get_read_pool().acquire()
+
+    return g.read_db
+
 def close_db(e=None):
     db = g.pop('db', None)
-
     if db is not None:
-        db.close()
+        get_pool().release(db)
+
+    read_db = g.pop('read_db', None)
+    if read_db is not None:
+        get_read_pool().release(read_db)
+
+def get_migrations():
+    """Return (version, name, path) for every migrations/NNNN_name.sql file, in order."""
+    folder = os.path.join(current_app.root_path, 'migrations')
+    migrations = []
+    for filename in sorted(os.listdir(folder)):
+        if not filename.endswith('.sql'):
+            continue
+        version, _, name = filename[:-len('.sql')].partition('_')
+        migrations.append((int(version), name, os.path.join(folder, filename)))
+    return migrations
+
+def upgrade_db():
+    """
+    Apply every migration newer than the database's schema_version.
+
+    Each migration runs in its own transaction together with its
+    schema_version row, so a failure leaves the database at the previous
+    version with no data lost. Returns the list of applied (version, name).
+    """
+    db = get_db()
+    db.execute(
+        'CREATE TABLE IF NOT EXISTS schema_version ('
+        ' version INTEGER PRIMARY KEY,'
+        ' name TEXT NOT NULL,'
+        ' applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)'
+    )
+    db.commit()
+    current = db.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+    applied = []
+    for version, name, path in get_migrations():
+        if version <= current:
+            continue
+        with open(path, encoding='utf8') as f:
+            sql = f.read()
+        try:
+            db.executescript(
+                'BEGIN IMMEDIATE;\n' + sql +
+                f"\nINSERT INTO schema_version (version, name) VALUES ({version}, '{name}');\nCOMMIT;"
+            )
+        except sqlite3.Error:
+            if db.in_transaction:
+                db.rollback()
+            raise
+        applied.append((version, name))
+    return applied
 
 def init_db():
     db = get_db()
 
     with current_app.open_resource('schema.sql') as f:
         db.executescript(f.read().decode('utf8'))
-    
+    upgrade_db()
+
     # Create default admin user
     from werkzeug.security import generate_password_hash
     try:
@@ -41,6 +298,29 @@ def init_db_command():
     init_db()
     click.echo('Initialized the database.')
 
+@click.command('db-upgrade')
+@with_appcontext
+def upgrade_db_command():
+    """Apply pending schema migrations without touching existing data."""
+    try:
+        applied = upgrade_db()
+    except sqlite3.Error as e:
+        raise click.ClickException(f'Migration failed, database left unchanged: {e}')
+    for version, name in applied:
+        click.echo(f'Applied migration {version:04d} {name}')
+    if not applied:
+        click.echo('Database is up to date.')
+
 def init_app(app):
+    config = app.config
+    # Shared by every connection, so listeners added later apply to pooled ones too
+    listeners = app.extensions['eternaal_db_listeners'] = []
+    app.extensions['eternaal_db_pool'] = ConnectionPool(
+        lambda: connect(config, listeners), config['DB_POOL_SIZE']
+    )
+    app.extensions['eternaal_db_read_pool'] = ConnectionPool(
+        lambda: connect(config, listeners, readonly=True), config['DB_READ_POOL_SIZE']
+    )
     app.teardown_appcontext(close_db)
     app.cli.add_command(init_db_command)
+    app.cli.add_command(upgrade_db_command)
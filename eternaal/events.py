@@ -0,0 +1,221 @@
+"""
+Live booking changes for the admin page as Server-Sent Events at
+/api/bookings/events.
+
+Triggers add a booking_event row for every booking insert, update and
+delete (see migrations/0010). Each worker runs one broadcaster thread with
+its own read-only connection: every EVENTS_POLL_INTERVAL seconds it checks
+PRAGMA data_version and, only if something was committed, reads the new
+events with their bookings. Each event is formatted once and kept in a ring
+buffer of the last EVENTS_BUFFER_SIZE events. Open streams wait on a
+condition and copy new messages from that buffer, so a listener costs one
+thread or greenlet and no database connection. A write request on the same
+worker wakes the broadcaster at once instead of waiting for the next poll.
+
+A reconnecting EventSource sends the id of the last event it saw
+(Last-Event-ID) and gets everything after it. If that is older than the
+buffer, or newer than anything in the database, it gets a `reset` event and
+should reload the list. An id this worker has not polled yet (committed by
+another worker, or read by the admin bootstrap just now) is waited for. Streams end after
+EVENTS_MAX_STREAM seconds and the browser reconnects, so a gunicorn reload
+is not held up by open streams.
+
+Every open stream occupies a worker thread (gthread) or greenlet (gevent).
+With sync workers it would take up a whole worker, so run gunicorn with
+GUNICORN_WORKER_CLASS=gthread when admins use the live view.
+"""
+import collections
+import json
+import os
+import threading
+import time
+from flask import Blueprint, current_app, g, request, jsonify, Response
+from eternaal.auth import login_required
+from eternaal.db import connect, get_db, READ_METHODS
+
+bp = Blueprint('events', __name__)
+
+EVENTS_QUERY = '''
+    SELECT e.id AS event_id, e.kind, e.booking_id,
+           b.id, b.customer_name, b.customer_email, b.destination_id, b.venue_id,
+           b.booking_date, b.status, d.name AS dest_name, v.name AS venue_name
+    FROM booking_event e
+    LEFT JOIN booking b ON b.id = e.booking_id
+    LEFT JOIN destination d ON b.destination_id = d.id
+    LEFT JOIN venue v ON b.venue_id = v.id
+    WHERE e.id > ?
+    ORDER BY e.id
+    LIMIT ?
+'''
+BOOKING_COLUMNS = ('id', 'customer_name', 'customer_email', 'destination_id', 'venue_id',
+                   'booking_date', 'status', 'dest_name', 'venue_name')
+READ_CHUNK = 500
+
+
+def format_event(row):
+    """One SSE message for a booking_event row joined with its booking."""
+    booking = None
+    if row['kind'] != 'deleted' and row['id'] is not None:
+        booking = {column: row[column] for column in BOOKING_COLUMNS}
+    data = json.dumps({'type': row['kind'], 'id': row['booking_id'], 'booking': booking})
+    return f"id: {row['event_id']}\nevent: booking\ndata: {data}\n\n"
+
+
+class Broadcaster:
+    """Polls booking_event for one worker process and fans new events out to its streams."""
+
+    def __init__(self, connect, buffer_size, poll_interval, logger):
+        self.connect = connect
+        self.buffer_size = buffer_size
+        self.poll_interval = poll_interval
+        self.logger = logger
+        self.lock = threading.Lock()
+        self.changed = threading.Condition()
+        self.wake = threading.Event()
+        self.thread = None
+        self.pid = None
+
+    def start(self):
+        """Load the latest events and start polling, once per process."""
+        with self.lock:
+            # Threads do not survive a fork, so a new worker starts its own
+            if self.thread is not None and self.pid == os.getpid():
+                return
+            conn = self.connect()
+            newest = conn.execute('SELECT COALESCE(MAX(id), 0) FROM booking_event').fetchone()[0]
+            with self.changed:
+                self.buffer = collections.deque(maxlen=self.buffer_size)
+                # Events up to `floor` are not in the buffer
+                self.floor = self.last_id = max(0, newest - self.buffer_size)
+                self.data_version = None
+            self.poll(conn)
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self._run, args=(conn,), name='booking-events', daemon=True)
+            self.thread.start()
+
+    def _run(self, conn):
+        while True:
+            self.wake.wait(self.poll_interval)
+            self.wake.clear()
+            try:
+                self.poll(conn)
+            except Exception:
+                self.logger.exception('Reading booking events failed')
+
+    def poll(self, conn):
+        # data_version only changes when another connection commits, so an
+        # idle database costs one PRAGMA per interval
+        version = conn.execute('PRAGMA data_version').fetchone()[0]
+        if version == self.data_version:
+            return
+        self.data_version = version
+
+        while True:
+            rows = conn.execute(EVENTS_QUERY, (self.last_id, READ_CHUNK)).fetchall()
+            if not rows:
+                return
+            messages = [(row['event_id'], format_event(row)) for row in rows]
+            with self.changed:
+                for event_id, message in messages:
+                    if len(self.buffer) == self.buffer.maxlen:
+                        self.floor = self.buffer[0][0]
+                    self.buffer.append((event_id, message))
+                self.last_id = messages[-1][0]
+                self.changed.notify_all()
+            if len(rows) < READ_CHUNK:
+                return
+
+    def events_after(self, since):
+        """
+        Buffered (id, message) pairs newer than `since`, or None if some were
+        already dropped. Empty while `since` is ahead of the last poll.
+        """
+        with self.changed:
+            if since < self.floor:
+                return None
+            newer = []
+            for event in reversed(self.buffer):
+                if event[0] <= since:
+                    break
+                newer.append(event)
+            newer.reverse()
+            return newer
+
+    def wait(self, since, timeout):
+        """Block until there is an event newer than `since`; False on timeout."""
+        with self.changed:
+            return self.changed.wait_for(lambda: self.last_id > since, timeout)
+
+
+def get_broadcaster():
+    broadcaster = current_app.extensions['eternaal_events']
+    broadcaster.start()
+    return broadcaster
+
+
+def stream(broadcaster, since, heartbeat, max_duration):
+    """since=None starts with a reset."""
+    # Reconnect quickly after the stream ends or the connection drops
+    yield 'retry: 2000\n\n'
+    deadline = time.monotonic() + max_duration
+    while time.monotonic() < deadline:
+        events = None if since is None else broadcaster.events_after(since)
+        if events is None:
+            since = broadcaster.last_id
+            yield f'id: {since}\nevent: reset\ndata: {{}}\n\n'
+        elif events:
+            since = events[-1][0]
+            yield ''.join(message for _, message in events)
+        elif not broadcaster.wait(since, heartbeat):
+            # Comment line, keeps proxies from closing an idle connection
+            yield ': keep-alive\n\n'
+
+
+@bp.route('/api/bookings/events')
+@login_required
+def booking_events():
+    """SSE stream of booking changes (admin only); resumes after Last-Event-ID."""
+    if g.user['role'] != 'admin': return jsonify({'error': 'Unauthorized'}), 401
+
+    broadcaster = get_broadcaster()
+    last = request.headers.get('Last-Event-ID') or request.args.get('last_event_id', '')
+    since = int(last) if last.isdigit() else broadcaster.last_id
+    if since > broadcaster.last_id:
+        # Newer than this worker's last poll. Only an id the database never
+        # had (e.g. it was recreated) needs a reset; otherwise poll now
+        newest = get_db().execute('SELECT COALESCE(MAX(id), 0) FROM booking_event').fetchone()[0]
+        if since > newest:
+            since = None
+        else:
+            broadcaster.wake.set()
+
+    # Not wrapped in stream_with_context: the request's database connections
+    # go back to the pool before streaming starts
+    config = current_app.config
+    response = Response(
+        stream(broadcaster, since, config['EVENTS_HEARTBEAT'], config['EVENTS_MAX_STREAM']),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # nginx: send events as they come
+    return response
+
+
+@bp.after_app_request
+def wake_after_write(response):
+    broadcaster = current_app.extensions['eternaal_events']
+    if request.method not in READ_METHODS and broadcaster.pid == os.getpid():
+        broadcaster.wake.set()
+    return response
+
+
+def init_app(app):
+    config = app.config
+    listeners = app.extensions['eternaal_db_listeners']
+    app.extensions['eternaal_events'] = Broadcaster(
+        lambda: connect(config, listeners, readonly=True),
+        config['EVENTS_BUFFER_SIZE'],
+        config['EVENTS_POLL_INTERVAL'],
+        app.logger
+    )
+    app.register_blueprint(bp)
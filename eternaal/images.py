@@ -0,0 +1,273 @@
+"""
+Resized WebP/JPEG copies of the catalog images.
+
+Local images (anything under /static/, including uploads) get derivatives at
+each of IMAGE_WIDTHS in both formats, served at
+
+    /images/resize/<source>?w=640&fmt=webp&v=9b1e04c7a2f3
+
+The srcset strings are built here by image_srcset() and sent with the
+destinations and venues (as image_srcset), so app.js never needs to know the
+widths. v= is the start of the source's hash: while it matches, the response
+can never change and is cached for a year as immutable. Without it, or once
+the source was replaced, the current derivative is sent with SERVE_MAX_AGE
+and an ETag instead.
+
+Derivative file names contain a hash of the source bytes and the resize
+settings, e.g. dublin-640w-3f9c2a1b7d0e.webp, so a replaced source never
+serves an old copy. The hash and width of each source are kept per worker
+(keyed by mtime and size), so serving a derivative that already exists costs
+a stat() and no image decoding.
+
+Derivatives are made on first request, or all up front with
+`flask build-images`. Pillow is only imported when an image is actually
+resized. Without it the resize URL serves the original image.
+"""
+import hashlib
+import os
+import threading
+import click
+from flask import Blueprint, current_app, request, url_for, send_file, send_from_directory, abort
+from flask.cli import with_appcontext
+from werkzeug.security import safe_join
+from eternaal.assets import IMMUTABLE_MAX_AGE
+
+bp = Blueprint('images', __name__, url_prefix='/images')
+
+FORMATS = {'webp': 'webp', 'jpeg': 'jpg'}
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.gif')
+# For resize URLs without the current ?v=, which serve a new derivative
+# when the source is replaced
+SERVE_MAX_AGE = 3600
+# Characters of the source hash used as ?v=
+VERSION_LENGTH = 12
+
+
+class ImageError(Exception):
+    """The source image is missing or cannot be decoded."""
+
+
+class SourceInfo:
+    """(sha256, width) of each source file, keyed by (path, mtime, size) so edits are noticed."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.info = {}
+
+    def get(self, path):
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            info = self.info.get(key)
+        if info is None:
+            h = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(64 * 1024), b''):
+                    h.update(chunk)
+            info = (h.hexdigest(), source_width(path))
+            with self.lock:
+                self.info[key] = info
+        return info
+
+
+def static_source(url):
+    """'/static/img/dublin.png' -> 'img/dublin.png'; None for anything not served from /static/."""
+    prefix = current_app.static_url_path + '/'
+    if not url or not url.startswith(prefix) or not url.lower().endswith(SOURCE_EXTENSIONS):
+        return None
+    return url[len(prefix):]
+
+
+def source_path(source):
+    """
+    Map a path relative to /static/ to a file on disk. uploads/... lives in
+    UPLOAD_FOLDER, which can be configured outside the static folder.
+    """
+    if not source.lower().endswith(SOURCE_EXTENSIONS):
+        raise ImageError('Not an image')
+    if source.startswith('uploads/'):
+        path = safe_join(current_app.config['UPLOAD_FOLDER'], source[len('uploads/'):])
+    else:
+        path = safe_join(current_app.static_folder, source)
+    if path is None or not os.path.isfile(path) or os.path.getsize(path) == 0:
+        raise ImageError('Image not found')
+    return path
+
+
+def derivative_name(source, digest, width, fmt):
+    quality = current_app.config['IMAGE_QUALITY']
+    key = hashlib.sha256(f'{digest}:{width}:{fmt}:{quality}'.encode('utf-8')).hexdigest()[:12]
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return f'{stem}-{width}w-{key}.{FORMATS[fmt]}'
+
+
+def _resize(path, width, fmt, dest):
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as img:
+        img = ImageOps.exif_transpose(img)
+        width = min(width, img.width)
+        height = max(1, round(img.height * width / img.width))
+        img = img.resize((width, height), Image.LANCZOS)
+
+        if fmt == 'jpeg' and img.mode != 'RGB':
+            img = img.convert('RGBA')
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.getchannel('A'))
+            img = background
+        elif fmt == 'webp' and img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA')
+
+        # Write to a temporary name and rename, so another worker never
+        # serves a half-written file
+        tmp = f'{dest}.{os.getpid()}.{threading.get_ident()}.tmp'
+        options = {'quality': current_app.config['IMAGE_QUALITY']}
+        if fmt == 'jpeg':
+            options.update(optimize=True, progressive=True)
+        else:
+            options.update(method=4)
+        img.save(tmp, 'WEBP' if fmt == 'webp' else 'JPEG', **options)
+        os.replace(tmp, dest)
+
+
+def source_width(path):
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            return img.width
+    except (OSError, ValueError) as e:
+        raise ImageError(f'Cannot read image: {e}')
+
+
+def make_derivative(source, width, fmt):
+    """Create (if needed) one derivative and return its file name."""
+    path = source_path(source)
+    digest, full_width = current_app.extensions['eternaal_images'].get(path)
+    width = min(width, full_width)
+    name = derivative_name(source, digest, width, fmt)
+
+    folder = current_app.config['IMAGE_DERIVATIVE_FOLDER']
+    dest = os.path.join(folder, name)
+    if not os.path.exists(dest):
+        os.makedirs(folder, exist_ok=True)
+        try:
+            _resize(path, width, fmt, dest)
+        except (OSError, ValueError) as e:
+            raise ImageError(f'Cannot resize image: {e}')
+    return name
+
+
+def image_srcset(url):
+    """
+    {'webp': srcset, 'jpeg': srcset} for an image URL, or None for external
+    images, missing or unreadable files and when Pillow is not installed.
+    Widths past the original's collapse into one entry at its real width.
+    """
+    source = static_source(url)
+    if source is None:
+        return None
+    try:
+        digest, full_width = current_app.extensions['eternaal_images'].get(source_path(source))
+    except (ImageError, ImportError):
+        return None
+
+    widths = {}
+    for width in current_app.config['IMAGE_WIDTHS']:
+        widths.setdefault(min(width, full_width), width)
+    return {
+        fmt: ', '.join(
+            f"{url_for('images.resize', source=source, w=width, fmt=fmt, v=digest[:VERSION_LENGTH])} {actual}w"
+            for actual, width in sorted(widths.items())
+        )
+        for fmt in FORMATS
+    }
+
+
+def find_sources():
+    """Every raster image under static/img and UPLOAD_FOLDER, as paths relative to /static/."""
+    sources = []
+    roots = [(os.path.join(current_app.static_folder, 'img'), 'img/'),
+             (current_app.config['UPLOAD_FOLDER'], 'uploads/')]
+    for root, prefix in roots:
+        for dirpath, _, filenames in os.walk(root):
+            for filename in sorted(filenames):
+                if filename.lower().endswith(SOURCE_EXTENSIONS):
+                    rel = os.path.relpath(os.path.join(dirpath, filename), root).replace(os.sep, '/')
+                    sources.append(prefix + rel)
+    return sources
+
+
+def build_images(force=False):
+    """
+    Generate every derivative for every source image.
+    Returns (count, skipped) where skipped lists (source, reason).
+    """
+    folder = current_app.config['IMAGE_DERIVATIVE_FOLDER']
+    if force and os.path.isdir(folder):
+        for filename in os.listdir(folder):
+            os.remove(os.path.join(folder, filename))
+
+    count = 0
+    skipped = []
+    for source in find_sources():
+        try:
+            for fmt in FORMATS:
+                for width in current_app.config['IMAGE_WIDTHS']:
+                    make_derivative(source, width, fmt)
+                    count += 1
+        except ImageError as e:
+            skipped.append((source, str(e)))
+    return count, skipped
+
+
+@bp.route('/resize/<path:source>')
+def resize(source):
+    """Send the derivative of `source` for ?w= and ?fmt=, creating it if needed."""
+    try:
+        width = int(request.args.get('w', ''))
+    except ValueError:
+        abort(400)
+    fmt = request.args.get('fmt', 'webp')
+    # Only the configured sizes, so clients cannot make us store arbitrary ones
+    if width not in current_app.config['IMAGE_WIDTHS'] or fmt not in FORMATS:
+        abort(400)
+
+    try:
+        try:
+            name = make_derivative(source, width, fmt)
+        except ImportError:
+            # Pillow is not installed: fall back to the original
+            response = send_file(source_path(source), max_age=SERVE_MAX_AGE, conditional=True)
+        else:
+            digest, _ = current_app.extensions['eternaal_images'].get(source_path(source))
+            immutable = request.args.get('v') == digest[:VERSION_LENGTH]
+            response = send_from_directory(current_app.config['IMAGE_DERIVATIVE_FOLDER'], name,
+                                           max_age=IMMUTABLE_MAX_AGE if immutable else SERVE_MAX_AGE)
+            if immutable:
+                response.cache_control.immutable = True
+    except ImageError:
+        abort(404)
+
+    response.cache_control.public = True
+    return response
+
+
+@click.command('build-images')
+@click.option('--force', is_flag=True, help='Delete existing derivatives first.')
+@with_appcontext
+def build_images_command(force):
+    """Generate resized WebP/JPEG copies of static and uploaded images."""
+    try:
+        count, skipped = build_images(force=force)
+    except ImportError:
+        raise click.ClickException('Pillow is required: pip install Pillow')
+    for source, reason in skipped:
+        click.echo(f'Skipped {source}: {reason}', err=True)
+    click.echo(f'Built {count} derivative(s).')
+
+
+def init_app(app):
+    app.extensions['eternaal_images'] = SourceInfo()
+    app.register_blueprint(bp)
+    app.cli.add_command(build_images_command)
@@ -0,0 +1,285 @@
+"""
+Bulk import of destinations with their venues.
+
+Used by POST /api/import and `flask import-catalog`. Input can be:
+
+  json    a list of destinations (or {"destinations": [...]}), each with a
+          nested "venues" list
+  ndjson  one destination object per line, same shape as json
+  csv     one venue per row with the columns
+          destination, description, image_url, venue, capacity, price, venue_image_url
+          (rows for the same destination are grouped; a row with no venue
+          just creates the destination)
+
+Everything is validated before anything is written. If any row is invalid
+nothing is imported and every problem is reported. Otherwise all rows are
+inserted with executemany() in one write, through writer.run_write() like
+every other write (so it also takes the write queue and its lock when
+DB_WRITE_QUEUE is on). Destinations whose name already exists are reused, so
+venues can be added to an existing region.
+"""
+import csv
+import io
+import json
+import click
+from flask.cli import with_appcontext
+from eternaal.writer import run_write
+
+FORMATS = ('json', 'ndjson', 'csv')
+CSV_COLUMNS = ['destination', 'description', 'image_url', 'venue', 'capacity', 'price', 'venue_image_url']
+
+
+class CatalogImportError(Exception):
+    """Raised with the full list of per-row errors; nothing was written."""
+
+    def __init__(self, errors):
+        super().__init__(f'{len(errors)} invalid row(s)')
+        self.errors = errors
+
+
+def detect_format(content_type=None, filename=None):
+    """Guess the input format from a Content-Type header or file extension."""
+    if filename:
+        ext = filename.rsplit('.', 1)[-1].lower()
+        if ext in ('jsonl', 'ndjson'):
+            return 'ndjson'
+        if ext in FORMATS:
+            return ext
+    if content_type:
+        if 'ndjson' in content_type or 'jsonl' in content_type:
+            return 'ndjson'
+        if 'csv' in content_type:
+            return 'csv'
+        if 'json' in content_type:
+            return 'json'
+    return None
+
+
+def parse(text, fmt):
+    """
+    Turn the raw input into a list of (row, destination) pairs.
+
+    Each destination's 'venues' becomes a list of (row, label, venue) so that
+    errors can point at the line (CSV/NDJSON) or list index (JSON) involved.
+    """
+    errors = []
+    records = []
+
+    if fmt in ('json', 'ndjson'):
+        if fmt == 'json':
+            try:
+                data = json.loads(text)
+            except ValueError as e:
+                raise CatalogImportError([{'row': None, 'error': f'Invalid JSON: {e}'}])
+            if isinstance(data, dict):
+                data = data.get('destinations')
+            if not isinstance(data, list):
+                raise CatalogImportError([{'row': None, 'error': 'Expected a list of destinations'}])
+            items = list(enumerate(data, 1))
+        else:
+            items = []
+            for row, line in enumerate(text.splitlines(), 1):
+                if not line.strip():
+                    continue
+                try:
+                    items.append((row, json.loads(line)))
+                except ValueError as e:
+                    errors.append({'row': row, 'error': f'Invalid JSON: {e}'})
+
+        for row, item in items:
+            if not isinstance(item, dict):
+                errors.append({'row': row, 'error': 'Expected an object'})
+                continue
+            venues = item.get('venues') or []
+            if not isinstance(venues, list):
+                errors.append({'row': row, 'error': 'venues must be a list'})
+                venues = []
+            dest = dict(item)
+            dest['venues'] = [(row, f'venues[{i}]', v) for i, v in enumerate(venues)]
+            records.append((row, dest))
+
+    elif fmt == 'csv':
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames or 'destination' not in reader.fieldnames:
+            raise CatalogImportError([{'row': 1, 'error': f"CSV header must include: {', '.join(CSV_COLUMNS)}"}])
+        by_name = {}
+        # Line 1 is the header
+        for row, line in enumerate(reader, 2):
+            name = (line.get('destination') or '').strip()
+            dest = by_name.get(name)
+            if dest is None:
+                dest = {
+                    'name': name,
+                    'description': line.get('description'),
+                    'image_url': line.get('image_url') or None,
+                    'venues': []
+                }
+                by_name[name] = dest
+                records.append((row, dest))
+            if (line.get('venue') or '').strip():
+                dest['venues'].append((row, 'venue', {
+                    'name': line['venue'],
+                    'capacity': line.get('capacity'),
+                    'price': line.get('price'),
+                    'image_url': line.get('venue_image_url') or None
+                }))
+    else:
+        raise CatalogImportError([{'row': None, 'error': f"Unknown format, expected one of: {', '.join(FORMATS)}"}])
+
+    if errors:
+        raise CatalogImportError(errors)
+    return records
+
+
+def _text(value):
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError
+    return value.strip()
+
+
+def _positive_int(value):
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, str):
+        value = int(value.strip())
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if not isinstance(value, int) or value <= 0:
+        raise ValueError
+    return value
+
+
+def _price(value):
+    if isinstance(value, bool):
+        raise ValueError
+    value = float(value)
+    if value < 0 or value != value:  # negative or NaN
+        raise ValueError
+    return value
+
+
+def _availability(value):
+    if value is None or value == '':
+        return 1
+    if isinstance(value, str):
+        value = value.strip().lower()
+        if value in ('1', 'true', 'yes'):
+            return 1
+        if value in ('0', 'false', 'no'):
+            return 0
+        raise ValueError
+    if value in (0, 1):  # also True/False
+        return int(value)
+    raise ValueError
+
+
+def _check(errors, row, label, field, convert, value):
+    try:
+        return convert(value)
+    except (ValueError, TypeError):
+        prefix = f'{label}.' if label else ''
+        errors.append({'row': row, 'error': f'{prefix}{field} is missing or invalid'})
+        return None
+
+
+def import_catalog(records, dry_run=False):
+    """
+    Validate and insert parsed records in a single transaction.
+
+    Returns a summary dict; raises CatalogImportError (with nothing written)
+    if any row is invalid.
+    """
+    return run_write(lambda db: _insert_records(db, records, dry_run))
+
+
+def _insert_records(db, records, dry_run):
+    existing = {row['name']: row['id'] for row in db.execute('SELECT id, name FROM destination')}
+
+    # Ids are assigned here so venues can reference new destinations
+    # without a round-trip per insert. Start above both the current max
+    # id and the AUTOINCREMENT sequence so deleted ids are not reused.
+    next_id = db.execute('''
+        SELECT MAX(COALESCE((SELECT MAX(id) FROM destination), 0),
+                   COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'destination'), 0)) + 1
+    ''').fetchone()[0]
+
+    errors = []
+    new_destinations = []
+    venues = []
+    assigned = {}
+    for row, dest in records:
+        name = _check(errors, row, None, 'name', _text, dest.get('name'))
+        if name is None:
+            continue
+
+        dest_id = existing.get(name) or assigned.get(name)
+        if dest_id is None:
+            description = _check(errors, row, None, 'description', _text, dest.get('description'))
+            availability = _check(errors, row, None, 'availability', _availability, dest.get('availability'))
+            image_url = dest.get('image_url') or None
+            dest_id = next_id
+            next_id += 1
+            assigned[name] = dest_id
+            new_destinations.append((dest_id, name, description, image_url, availability))
+
+        for venue_row, label, venue in dest['venues']:
+            if not isinstance(venue, dict):
+                errors.append({'row': venue_row, 'error': f'{label} must be an object'})
+                continue
+            venues.append((
+                dest_id,
+                _check(errors, venue_row, label, 'name', _text, venue.get('name')),
+                _check(errors, venue_row, label, 'capacity', _positive_int, venue.get('capacity')),
+                _check(errors, venue_row, label, 'price', _price, venue.get('price')),
+                venue.get('image_url') or None,
+                _check(errors, venue_row, label, 'availability', _availability, venue.get('availability'))
+            ))
+
+    if errors:
+        raise CatalogImportError(errors)
+
+    if not dry_run:
+        db.executemany(
+            'INSERT INTO destination (id, name, description, image_url, availability) VALUES (?, ?, ?, ?, ?)',
+            new_destinations
+        )
+        db.executemany(
+            'INSERT INTO venue (destination_id, name, capacity, price, image_url, availability) VALUES (?, ?, ?, ?, ?, ?)',
+            venues
+        )
+
+    return {
+        'destinations_created': len(new_destinations),
+        'venues_created': len(venues),
+        'dry_run': dry_run
+    }
+
+
+@click.command('import-catalog')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Defaults to the file extension.')
+@click.option('--dry-run', is_flag=True, help='Validate only, write nothing.')
+@with_appcontext
+def import_catalog_command(path, fmt, dry_run):
+    """Bulk import destinations and venues from a JSON, NDJSON or CSV file."""
+    fmt = fmt or detect_format(filename=path)
+    if fmt is None:
+        raise click.UsageError('Cannot tell the format from the file name; pass --format.')
+
+    with open(path, encoding='utf-8-sig') as f:
+        text = f.read()
+    try:
+        summary = import_catalog(parse(text, fmt), dry_run=dry_run)
+    except CatalogImportError as e:
+        for error in e.errors:
+            click.echo(f"row {error['row']}: {error['error']}", err=True)
+        raise click.ClickException(f'{len(e.errors)} invalid row(s), nothing imported.')
+
+    click.echo(
+        f"{'Validated' if dry_run else 'Imported'} {summary['destinations_created']} new destination(s), "
+        f"{summary['venues_created']} venue(s)."
+    )
+
+
+def init_app(app):
+    app.cli.add_command(import_catalog_command)
@@ -0,0 +1,351 @@
+"""
+Per-endpoint request metrics in Prometheus text format at /metrics.
+
+For every request this records, labelled by endpoint:
+
+  eternaal_requests_total              count by method and status code
+  eternaal_request_duration_seconds    latency histogram
+  eternaal_sql_statements_total        statements run (see db.Connection)
+  eternaal_sql_seconds_total           time spent in SQLite, fetching included
+  eternaal_json_seconds_total          time spent serializing JSON
+  eternaal_template_seconds_total      time spent rendering templates
+
+Counting is a few dict updates per request under a lock. Each gunicorn
+worker keeps its own numbers; when METRICS_DIR is set (gunicorn.conf.py does
+this) a background thread in each worker writes them to
+<METRICS_DIR>/<pid>.json every METRICS_FLUSH_INTERVAL seconds, and /metrics
+adds up every worker's file.
+Files of workers that have exited are folded into one archive file so their
+counts are kept.
+
+/metrics is served to logged-in admins and to scrapers that send
+`Authorization: Bearer <METRICS_TOKEN>`. Requests from localhost are let in
+only with METRICS_ALLOW_LOCALHOST: behind a reverse proxy on the same host
+every request comes from 127.0.0.1.
+"""
+import fcntl
+import hmac
+import json
+import os
+import threading
+import time
+from flask import Blueprint, current_app, g, request, Response, abort
+from flask.json.provider import DefaultJSONProvider
+from flask.signals import before_render_template, template_rendered
+from eternaal.db import add_statement_listener
+
+bp = Blueprint('metrics', __name__)
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ARCHIVE = 'archive.json'
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+# Counter name -> its label names; values are keyed by a tuple of label values
+COUNTERS = {
+    'eternaal_requests_total': ('endpoint', 'method', 'status'),
+    'eternaal_sql_statements_total': ('endpoint',),
+    'eternaal_sql_seconds_total': ('endpoint',),
+    'eternaal_json_seconds_total': ('endpoint',),
+    'eternaal_template_seconds_total': ('endpoint',),
+}
+HELP = {
+    'eternaal_requests_total': 'Requests handled, by endpoint, method and status code.',
+    'eternaal_request_duration_seconds': 'Request latency by endpoint.',
+    'eternaal_sql_statements_total': 'SQL statements executed, by endpoint.',
+    'eternaal_sql_seconds_total': 'Seconds spent in SQLite, by endpoint.',
+    'eternaal_json_seconds_total': 'Seconds spent serializing JSON, by endpoint.',
+    'eternaal_template_seconds_total': 'Seconds spent rendering templates, by endpoint.',
+}
+
+
+class Registry:
+    """Counters and latency histograms for one worker process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        self.flusher = None
+        self.reset()
+
+    def reset(self):
+        self.counters = {name: {} for name in COUNTERS}
+        # endpoint -> [count per bucket..., +Inf count, sum]
+        self.histograms = {}
+
+    def _check_fork(self):
+        # Counts made in the gunicorn master before forking belong to it only,
+        # and its flusher thread does not exist in the child
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.flusher = None
+            self.reset()
+
+    def start_flusher(self, folder, interval):
+        """Write this process's numbers to `folder` every `interval` seconds, in the background."""
+        with self.lock:
+            self._check_fork()
+            if self.flusher is not None:
+                return
+
+            def run():
+                while True:
+                    time.sleep(interval)
+                    write_worker_file(folder, self)
+
+            self.flusher = threading.Thread(target=run, name='metrics-flush', daemon=True)
+            self.flusher.start()
+
+    def observe(self, endpoint, method, status, duration, stats):
+        with self.lock:
+            self._check_fork()
+            counters = self.counters
+            key = (endpoint, method, str(status))
+            counters['eternaal_requests_total'][key] = counters['eternaal_requests_total'].get(key, 0) + 1
+            for name, value in (('eternaal_sql_statements_total', stats['sql_statements']),
+                                ('eternaal_sql_seconds_total', stats['sql_seconds']),
+                                ('eternaal_json_seconds_total', stats['json_seconds']),
+                                ('eternaal_template_seconds_total', stats['template_seconds'])):
+                counters[name][(endpoint,)] = counters[name].get((endpoint,), 0) + value
+
+            histogram = self.histograms.get(endpoint)
+            if histogram is None:
+                histogram = self.histograms[endpoint] = [0] * (len(BUCKETS) + 2)
+            for i, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    histogram[i] += 1
+                    break
+            else:
+                histogram[len(BUCKETS)] += 1
+            histogram[-1] += duration
+
+    def to_dict(self):
+        with self.lock:
+            self._check_fork()
+            return serialize({'counters': self.counters, 'histograms': self.histograms})
+
+
+def serialize(total):
+    """JSON-friendly copy of a registry's numbers (label tuples become lists)."""
+    return {
+        'counters': {name: [[list(k), v] for k, v in values.items()]
+                     for name, values in total['counters'].items()},
+        'histograms': {endpoint: list(h) for endpoint, h in total['histograms'].items()},
+    }
+
+
+def merge(total, data):
+    """Add serialized numbers into `total`, whose counters are keyed by label tuples."""
+    for name, items in data.get('counters', {}).items():
+        values = total['counters'].setdefault(name, {})
+        for labels, value in items:
+            values[tuple(labels)] = values.get(tuple(labels), 0) + value
+    for endpoint, histogram in data.get('histograms', {}).items():
+        current = total['histograms'].get(endpoint)
+        if current is None:
+            total['histograms'][endpoint] = list(histogram)
+        else:
+            total['histograms'][endpoint] = [a + b for a, b in zip(current, histogram)]
+
+
+def _registry():
+    return current_app.extensions['eternaal_metrics']
+
+
+def _write_json(path, data):
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def write_worker_file(folder, registry):
+    os.makedirs(folder, exist_ok=True)
+    _write_json(os.path.join(folder, f'{os.getpid()}.json'), registry.to_dict())
+
+
+def flush():
+    """Write this worker's numbers to METRICS_DIR now (e.g. before the worker exits)."""
+    folder = current_app.config['METRICS_DIR']
+    if folder:
+        write_worker_file(folder, _registry())
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect():
+    """Every worker's numbers added together (just this process's without METRICS_DIR)."""
+    total = {'counters': {}, 'histograms': {}}
+    folder = current_app.config['METRICS_DIR']
+    if not folder:
+        merge(total, _registry().to_dict())
+        return total
+
+    flush()
+    with open(os.path.join(folder, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive_path = os.path.join(folder, ARCHIVE)
+        archive = {'counters': {}, 'histograms': {}}
+        if os.path.exists(archive_path):
+            with open(archive_path, encoding='utf-8') as f:
+                merge(archive, json.load(f))
+
+        folded = []
+        for filename in os.listdir(folder):
+            stem, ext = os.path.splitext(filename)
+            if ext != '.json' or not stem.isdigit():
+                continue
+            path = os.path.join(folder, filename)
+            try:
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if _pid_alive(int(stem)):
+                merge(total, data)
+            else:
+                merge(archive, data)
+                folded.append(path)
+
+        archived = serialize(archive)
+        if folded:
+            _write_json(archive_path, archived)
+            for path in folded:
+                os.remove(path)
+
+    merge(total, archived)
+    return total
+
+
+def _labels(names, values):
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in values)
+    return ','.join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+def render(total):
+    """Prometheus text exposition format."""
+    lines = []
+    for name, label_names in COUNTERS.items():
+        lines.append(f'# HELP {name} {HELP[name]}')
+        lines.append(f'# TYPE {name} counter')
+        for labels, value in sorted(total['counters'].get(name, {}).items()):
+            lines.append(f'{name}{{{_labels(label_names, labels)}}} {value:g}')
+
+    name = 'eternaal_request_duration_seconds'
+    lines.append(f'# HELP {name} {HELP[name]}')
+    lines.append(f'# TYPE {name} histogram')
+    for endpoint, histogram in sorted(total['histograms'].items()):
+        label = _labels(('endpoint',), (endpoint,))
+        cumulative = 0
+        for bound, count in zip(BUCKETS, histogram):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{label},le="{bound:g}"}} {cumulative}')
+        cumulative += histogram[len(BUCKETS)]
+        lines.append(f'{name}_bucket{{{label},le="+Inf"}} {cumulative}')
+        lines.append(f'{name}_sum{{{label}}} {histogram[-1]:g}')
+        lines.append(f'{name}_count{{{label}}} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, adding the time spent in dumps() to the request's stats."""
+
+    def dumps(self, obj, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            stats = g.get('_metrics') if g else None
+            if stats is not None:
+                stats['json_seconds'] += time.perf_counter() - start
+
+
+def _on_statement(sql, seconds):
+    stats = g.get('_metrics') if g else None
+    if stats is not None:
+        if sql is not None:
+            stats['sql_statements'] += 1
+        stats['sql_seconds'] += seconds
+
+
+def _before_template(sender, template, context, **extra):
+    if g.get('_metrics') is not None:
+        g._template_started = time.perf_counter()
+
+
+def _after_template(sender, template, context, **extra):
+    stats = g.get('_metrics')
+    started = g.pop('_template_started', None)
+    if stats is not None and started is not None:
+        stats['template_seconds'] += time.perf_counter() - started
+
+
+def start_request():
+    g._metrics = {
+        'started': time.perf_counter(),
+        'status': None,
+        'sql_statements': 0,
+        'sql_seconds': 0.0,
+        'json_seconds': 0.0,
+        'template_seconds': 0.0,
+    }
+
+
+def record_status(response):
+    stats = g.get('_metrics')
+    if stats is not None:
+        stats['status'] = response.status_code
+    return response
+
+
+def finish_request(exc=None):
+    stats = g.pop('_metrics', None)
+    if stats is None:
+        return
+    duration = time.perf_counter() - stats['started']
+    status = stats['status'] or 500
+    endpoint = request.endpoint or 'unmatched'
+    registry = _registry()
+    registry.observe(endpoint, request.method, status, duration, stats)
+    folder = current_app.config['METRICS_DIR']
+    if folder and registry.flusher is None:
+        registry.start_flusher(folder, current_app.config['METRICS_FLUSH_INTERVAL'])
+
+
+def allowed():
+    user = g.get('user')
+    if user is not None and user['role'] == 'admin':
+        return True
+    token = current_app.config['METRICS_TOKEN']
+    if token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return True
+    return current_app.config['METRICS_ALLOW_LOCALHOST'] and request.remote_addr in LOCAL_ADDRESSES
+
+
+@bp.route('/metrics')
+def metrics():
+    if not allowed():
+        abort(404)
+    return Response(render(collect()), mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app):
+    app.extensions['eternaal_metrics'] = Registry()
+    app.register_blueprint(bp)
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    app.json = TimedJSONProvider(app)
+    add_statement_listener(app, _on_statement)
+    before_render_template.connect(_before_template, app)
+    template_rendered.connect(_after_template, app)
+    app.before_request(start_request)
+    app.after_request(record_status)
+    app.teardown_request(finish_request)
@@ -0,0 +1,13 @@
+-- Indexes for the queries that run on every booking/browse request.
+
+-- Double-booking check in create_booking: venue_id = ? AND booking_date = ?
+CREATE INDEX IF NOT EXISTS idx_booking_venue_date ON booking (venue_id, booking_date);
+
+-- Customer "My Bookings" lookup in get_bookings: customer_name = ?
+CREATE INDEX IF NOT EXISTS idx_booking_customer_name ON booking (customer_name);
+
+-- Venue list / catalog filtered by destination
+CREATE INDEX IF NOT EXISTS idx_venue_destination ON venue (destination_id);
+
+-- Foreign key checks when deleting a destination
+CREATE INDEX IF NOT EXISTS idx_booking_destination ON booking (destination_id);
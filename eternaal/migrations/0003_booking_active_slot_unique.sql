@@ -0,0 +1,10 @@
+-- At most one active booking per venue and date, enforced by the database
+-- so concurrent create_booking calls in different workers cannot both win.
+-- Queries that want to use this index must repeat the same WHERE condition.
+--
+-- If this migration fails with "UNIQUE constraint failed", the database
+-- already contains double bookings; cancel or reject the duplicates and
+-- run `flask db-upgrade` again.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_booking_active_slot
+    ON booking (venue_id, booking_date)
+    WHERE status NOT IN ('cancelled', 'rejected');
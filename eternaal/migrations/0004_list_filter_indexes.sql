@@ -0,0 +1,8 @@
+-- Indexes for the paginated/filtered list endpoints.
+
+-- Admin bookings filtered by status and/or date range, sorted by date
+CREATE INDEX IF NOT EXISTS idx_booking_status_date ON booking (status, booking_date);
+CREATE INDEX IF NOT EXISTS idx_booking_date ON booking (booking_date);
+
+-- Venue list filtered/sorted by price
+CREATE INDEX IF NOT EXISTS idx_venue_price ON venue (price);
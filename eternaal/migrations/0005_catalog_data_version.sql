@@ -0,0 +1,25 @@
+-- A counter that changes on every destination/venue write, maintained by
+-- triggers so writes from any worker, CLI command or script are seen.
+-- Used for catalog ETags and to know when the cached catalog is stale.
+-- Starts at the current unix time so a re-initialised database never reuses
+-- versions (and therefore ETags) that clients may still hold.
+CREATE TABLE IF NOT EXISTS data_version (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO data_version (name, version)
+    VALUES ('catalog', CAST(strftime('%s', 'now') AS INTEGER));
+
+CREATE TRIGGER IF NOT EXISTS destination_insert_bump_catalog AFTER INSERT ON destination
+BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+CREATE TRIGGER IF NOT EXISTS destination_update_bump_catalog AFTER UPDATE ON destination
+BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+CREATE TRIGGER IF NOT EXISTS destination_delete_bump_catalog AFTER DELETE ON destination
+BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+
+CREATE TRIGGER IF NOT EXISTS venue_insert_bump_catalog AFTER INSERT ON venue
+BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+CREATE TRIGGER IF NOT EXISTS venue_update_bump_catalog AFTER UPDATE ON venue
+BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
+CREATE TRIGGER IF NOT EXISTS venue_delete_bump_catalog AFTER DELETE ON venue
+BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'catalog'; END;
@@ -0,0 +1,9 @@
+-- Bumped whenever a user's role or password changes (by the app or by the
+-- maintenance scripts). Sessions and per-worker user caches carry the
+-- version they saw, so stale copies of the user row can be detected.
+ALTER TABLE user ADD COLUMN session_version INTEGER NOT NULL DEFAULT 0;
+
+CREATE TRIGGER IF NOT EXISTS user_bump_session_version AFTER UPDATE OF role, password ON user
+BEGIN
+    UPDATE user SET session_version = session_version + 1 WHERE id = NEW.id;
+END;
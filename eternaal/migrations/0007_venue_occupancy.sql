@@ -0,0 +1,63 @@
+-- Compact per-venue occupancy index: one row per venue and month, with bit
+-- (day - 1) of `days` set when that day has an active booking. Kept in sync
+-- by triggers on booking, so a calendar for a venue (or every venue of a
+-- destination) is a handful of row reads instead of one query per day.
+--
+-- Each trigger recomputes the affected month(s) from booking using
+-- idx_booking_venue_date, which also handles status changes and deletes.
+-- Dates that are not YYYY-MM-DD are ignored.
+CREATE TABLE IF NOT EXISTS venue_occupancy (
+    venue_id INTEGER NOT NULL,
+    month TEXT NOT NULL,  -- 'YYYY-MM'
+    days INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (venue_id, month)
+) WITHOUT ROWID;
+
+INSERT OR REPLACE INTO venue_occupancy (venue_id, month, days)
+SELECT venue_id, substr(booking_date, 1, 7),
+       SUM(DISTINCT 1 << (CAST(substr(booking_date, 9, 2) AS INTEGER) - 1))
+FROM booking
+WHERE status NOT IN ('cancelled', 'rejected')
+  AND booking_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+GROUP BY venue_id, substr(booking_date, 1, 7);
+
+CREATE TRIGGER IF NOT EXISTS booking_insert_occupancy AFTER INSERT ON booking
+WHEN NEW.booking_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+BEGIN
+    INSERT OR REPLACE INTO venue_occupancy (venue_id, month, days)
+    SELECT NEW.venue_id, substr(NEW.booking_date, 1, 7), COALESCE(SUM(DISTINCT 1 << (CAST(substr(booking_date, 9, 2) AS INTEGER) - 1)), 0)
+    FROM booking
+    WHERE venue_id = NEW.venue_id
+      AND booking_date BETWEEN substr(NEW.booking_date, 1, 7) || '-01' AND substr(NEW.booking_date, 1, 7) || '-31'
+      AND status NOT IN ('cancelled', 'rejected');
+END;
+
+CREATE TRIGGER IF NOT EXISTS booking_update_occupancy AFTER UPDATE OF status, venue_id, booking_date ON booking
+BEGIN
+    INSERT OR REPLACE INTO venue_occupancy (venue_id, month, days)
+    SELECT OLD.venue_id, substr(OLD.booking_date, 1, 7), COALESCE(SUM(DISTINCT 1 << (CAST(substr(booking_date, 9, 2) AS INTEGER) - 1)), 0)
+    FROM booking
+    WHERE venue_id = OLD.venue_id
+      AND booking_date BETWEEN substr(OLD.booking_date, 1, 7) || '-01' AND substr(OLD.booking_date, 1, 7) || '-31'
+      AND status NOT IN ('cancelled', 'rejected')
+    HAVING OLD.booking_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]';
+
+    INSERT OR REPLACE INTO venue_occupancy (venue_id, month, days)
+    SELECT NEW.venue_id, substr(NEW.booking_date, 1, 7), COALESCE(SUM(DISTINCT 1 << (CAST(substr(booking_date, 9, 2) AS INTEGER) - 1)), 0)
+    FROM booking
+    WHERE venue_id = NEW.venue_id
+      AND booking_date BETWEEN substr(NEW.booking_date, 1, 7) || '-01' AND substr(NEW.booking_date, 1, 7) || '-31'
+      AND status NOT IN ('cancelled', 'rejected')
+    HAVING NEW.booking_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]';
+END;
+
+CREATE TRIGGER IF NOT EXISTS booking_delete_occupancy AFTER DELETE ON booking
+WHEN OLD.booking_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+BEGIN
+    INSERT OR REPLACE INTO venue_occupancy (venue_id, month, days)
+    SELECT OLD.venue_id, substr(OLD.booking_date, 1, 7), COALESCE(SUM(DISTINCT 1 << (CAST(substr(booking_date, 9, 2) AS INTEGER) - 1)), 0)
+    FROM booking
+    WHERE venue_id = OLD.venue_id
+      AND booking_date BETWEEN substr(OLD.booking_date, 1, 7) || '-01' AND substr(OLD.booking_date, 1, 7) || '-31'
+      AND status NOT IN ('cancelled', 'rejected');
+END;
@@ -0,0 +1,3 @@
+-- Venue search (/api/venues/search): destination + budget, ranked by price
+CREATE INDEX IF NOT EXISTS idx_venue_destination_price ON venue (destination_id, price);
+CREATE INDEX IF NOT EXISTS idx_venue_capacity ON venue (capacity);
@@ -0,0 +1,68 @@
+-- Full-text index over the catalog for /api/search.
+--
+-- One row per destination (name, description) and per venue (name, with the
+-- destination name in `place` so "dublin castle" finds the venue). The rowid
+-- encodes what the row is: destination id * 2 for destinations and
+-- venue id * 2 + 1 for venues, so the triggers below can update or delete a
+-- single row by rowid. dest_id is stored for the client and not indexed.
+--
+-- prefix='2 3' builds prefix indexes so type-ahead queries like "dub*" are
+-- index lookups rather than scans of the whole term list.
+CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+    name, description, place, dest_id UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+-- Rank name matches above description and place matches (bm25 weights are
+-- per column, in declaration order)
+INSERT INTO search_index (search_index, rank) VALUES ('rank', 'bm25(10.0, 2.0, 4.0, 0.0)');
+
+DELETE FROM search_index;
+INSERT INTO search_index (rowid, name, description, place, dest_id)
+SELECT id * 2, name, description, NULL, id FROM destination;
+INSERT INTO search_index (rowid, name, description, place, dest_id)
+SELECT v.id * 2 + 1, v.name, NULL, d.name, v.destination_id
+FROM venue v LEFT JOIN destination d ON d.id = v.destination_id;
+
+CREATE TRIGGER IF NOT EXISTS destination_insert_search AFTER INSERT ON destination
+BEGIN
+    INSERT INTO search_index (rowid, name, description, place, dest_id)
+    VALUES (NEW.id * 2, NEW.name, NEW.description, NULL, NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS destination_update_search AFTER UPDATE OF name, description ON destination
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 2;
+    INSERT INTO search_index (rowid, name, description, place, dest_id)
+    VALUES (NEW.id * 2, NEW.name, NEW.description, NULL, NEW.id);
+    -- Venue rows carry the destination name too
+    UPDATE search_index SET place = NEW.name
+    WHERE rowid IN (SELECT id * 2 + 1 FROM venue WHERE destination_id = NEW.id)
+      AND OLD.name IS NOT NEW.name;
+END;
+
+CREATE TRIGGER IF NOT EXISTS destination_delete_search AFTER DELETE ON destination
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 2;
+END;
+
+CREATE TRIGGER IF NOT EXISTS venue_insert_search AFTER INSERT ON venue
+BEGIN
+    INSERT INTO search_index (rowid, name, description, place, dest_id)
+    VALUES (NEW.id * 2 + 1, NEW.name, NULL,
+            (SELECT name FROM destination WHERE id = NEW.destination_id), NEW.destination_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS venue_update_search AFTER UPDATE OF name, destination_id ON venue
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 2 + 1;
+    INSERT INTO search_index (rowid, name, description, place, dest_id)
+    VALUES (NEW.id * 2 + 1, NEW.name, NULL,
+            (SELECT name FROM destination WHERE id = NEW.destination_id), NEW.destination_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS venue_delete_search AFTER DELETE ON venue
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 2 + 1;
+END;
@@ -0,0 +1,22 @@
+-- Every booking insert, update and delete appends a row here, so each
+-- worker's event broadcaster (see events.py) can pick up changes made by any
+-- worker, CLI command or script by polling for ids above the last one seen.
+-- Rows only carry the booking id; the current booking is read when the
+-- event is sent.
+CREATE TABLE IF NOT EXISTS booking_event (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    booking_id INTEGER NOT NULL,
+    kind TEXT NOT NULL, -- 'created', 'updated' or 'deleted'
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS booking_insert_event AFTER INSERT ON booking
+BEGIN INSERT INTO booking_event (booking_id, kind) VALUES (NEW.id, 'created'); END;
+CREATE TRIGGER IF NOT EXISTS booking_update_event AFTER UPDATE ON booking
+BEGIN INSERT INTO booking_event (booking_id, kind) VALUES (NEW.id, 'updated'); END;
+CREATE TRIGGER IF NOT EXISTS booking_delete_event AFTER DELETE ON booking
+BEGIN INSERT INTO booking_event (booking_id, kind) VALUES (OLD.id, 'deleted'); END;
+
+-- Only the latest 10000 events are kept; clients further behind reload instead
+CREATE TRIGGER IF NOT EXISTS booking_event_prune AFTER INSERT ON booking_event
+BEGIN DELETE FROM booking_event WHERE id <= NEW.id - 10000; END;
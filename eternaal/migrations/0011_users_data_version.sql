@@ -0,0 +1,12 @@
+-- A counter that changes whenever any user row is updated or deleted, by
+-- any worker, CLI command or script. Each worker's user cache (see auth.py)
+-- remembers the version its rows were loaded under and starts over when it
+-- changes, so a deleted, demoted or re-passworded user is never served from
+-- a stale copy.
+INSERT OR IGNORE INTO data_version (name, version)
+    VALUES ('users', CAST(strftime('%s', 'now') AS INTEGER));
+
+CREATE TRIGGER IF NOT EXISTS user_update_bump_users AFTER UPDATE ON user
+BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'users'; END;
+CREATE TRIGGER IF NOT EXISTS user_delete_bump_users AFTER DELETE ON user
+BEGIN UPDATE data_version SET version = version + 1 WHERE name = 'users'; END;
@@ -0,0 +1,154 @@
+"""
+Keyset (cursor) pagination for the list endpoints.
+
+Pages are fetched with `WHERE (sort_column, id) > (last_value, last_id)
+ORDER BY sort_column, id LIMIT n`, so every page costs the same no matter how
+deep into the table it is. The cursor handed to the client is an opaque
+base64 token holding the sort key and the last row's values.
+"""
+import base64
+import binascii
+import json
+from datetime import date
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+class PaginationError(ValueError):
+    """Bad paging, sort or filter parameters; routes turn this into a 400."""
+
+
+class Page:
+    """Parsed paging parameters for one list request."""
+
+    def __init__(self, sort, column, descending, limit, after):
+        self.sort = sort
+        self.column = column
+        self.descending = descending
+        self.limit = limit
+        self.after = after
+
+    @property
+    def paginated(self):
+        # Without limit/after the endpoints keep returning a plain list
+        return self.limit is not None
+
+
+def encode_cursor(sort, value, row_id):
+    raw = json.dumps([sort, value, row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, TypeError):
+        raise PaginationError('Invalid cursor')
+    # Well-formed JSON can still hold values that cannot be bound to the query
+    if (not isinstance(sort, str) or type(row_id) is not int
+            or not isinstance(value, (str, int, float, type(None)))):
+        raise PaginationError('Invalid cursor')
+    return sort, value, row_id
+
+
+def parse_page(args, sort_columns, default_sort='id'):
+    """
+    Read limit/after/sort/order from request.args.
+
+    sort_columns maps the public sort name (which is also the key of that
+    value in each result row) to the SQL column to order by.
+    """
+    sort = args.get('sort', default_sort)
+    if sort not in sort_columns:
+        raise PaginationError(f"Invalid sort, expected one of: {', '.join(sorted(sort_columns))}")
+
+    order = args.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        raise PaginationError("Invalid order, expected 'asc' or 'desc'")
+
+    limit = args.get('limit')
+    after = args.get('after')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise PaginationError('Invalid limit')
+        if limit < 1:
+            raise PaginationError('Invalid limit')
+        limit = min(limit, MAX_LIMIT)
+    elif after is not None:
+        limit = DEFAULT_LIMIT
+
+    if after is not None:
+        cursor_sort, value, row_id = decode_cursor(after)
+        if cursor_sort != sort:
+            raise PaginationError('Cursor does not match the requested sort')
+        after = (value, row_id)
+
+    return Page(sort, sort_columns[sort], order == 'desc', limit, after)
+
+
+def number_arg(args, name, cast=int):
+    """Optional numeric filter from request.args; invalid values raise PaginationError."""
+    value = args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return cast(value)
+    except ValueError:
+        raise PaginationError(f'Invalid {name}')
+
+
+def date_arg(args, name):
+    """Optional YYYY-MM-DD filter from request.args."""
+    value = args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise PaginationError(f'Invalid {name}, expected YYYY-MM-DD')
+
+
+def fetch_page(db, select, where, params, page, id_column='id'):
+    """
+    Run `select` with the filters in `where` (a list of SQL conditions) and
+    the page's keyset condition, ordering and limit applied.
+
+    Returns (rows as dicts, next_cursor or None).
+    """
+    where = list(where)
+    params = list(params)
+    op = '<' if page.descending else '>'
+    if page.after is not None:
+        value, row_id = page.after
+        if page.column == id_column:
+            where.append(f'{id_column} {op} ?')
+            params.append(row_id)
+        else:
+            where.append(f'({page.column}, {id_column}) {op} (?, ?)')
+            params.extend([value, row_id])
+
+    direction = 'DESC' if page.descending else 'ASC'
+    sql = select
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += f' ORDER BY {page.column} {direction}'
+    if page.column != id_column:
+        sql += f', {id_column} {direction}'
+
+    if not page.paginated:
+        return [dict(row) for row in db.execute(sql, params)], None
+
+    sql += ' LIMIT ?'
+    params.append(page.limit + 1)
+    rows = [dict(row) for row in db.execute(sql, params)]
+
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(page.sort, last[page.sort], last['id'])
+    return rows, next_cursor
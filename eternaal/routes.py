@@ -1,9 +1,70 @@
-from flask import Blueprint, render_template, request, jsonify, g, redirect, url_for, session
-from eternaal.db import get_db
-from eternaal.auth import login_required
+import csv
+import io
+import json
+import sys
+from flask import Blueprint, current_app, render_template, request, jsonify, g, redirect, url_for, session, Response, stream_with_context
+from werkzeug.test import EnvironBuilder
+from eternaal.db import get_db, get_write_db
+from datetime import date
+from eternaal import catalog, importer, availability, search, uploads, images
+from eternaal.auth import login_required, skip_user_load, invalidate_user
+from eternaal.pagination import PaginationError, parse_page, fetch_page, number_arg, date_arg
+from eternaal.writer import WriteError, run_write, transaction
 
 bp = Blueprint('routes', __name__)
 
+BOOKING_STATUSES = ['pending', 'accepted', 'rejected', 'paid', 'confirmed', 'cancelled']
+
+# Allowed booking status changes (setting the current status again is always allowed)
+BOOKING_TRANSITIONS = {
+    'pending': {'accepted', 'confirmed', 'rejected', 'cancelled'},
+    'accepted': {'paid', 'confirmed', 'rejected', 'cancelled'},
+    'paid': {'confirmed', 'cancelled'},
+    'confirmed': {'paid', 'cancelled'},
+    'rejected': {'pending'},
+    'cancelled': {'pending'},
+}
+MAX_BULK_UPDATES = 1000
+
+BOOKING_SELECT = '''
+    SELECT b.*, d.name as dest_name, v.name as venue_name
+    FROM booking b
+    JOIN destination d ON b.destination_id = d.id
+    JOIN venue v ON b.venue_id = v.id
+'''
+
+# Sortable fields for the list endpoints: public name -> SQL column
+DESTINATION_SORTS = {'id': 'id', 'name': 'name'}
+VENUE_SORTS = {'id': 'v.id', 'name': 'v.name', 'capacity': 'v.capacity', 'price': 'v.price'}
+BOOKING_SORTS = {'id': 'b.id', 'booking_date': 'b.booking_date'}
+# Venue search ranking: cheapest first, or 'capacity' for the tightest fit for the guest count
+SEARCH_SORTS = {'price': 'v.price', 'capacity': 'v.capacity'}
+MAX_SEARCH_DATES = 31
+USER_SORTS = {'id': 'id', 'username': 'username'}
+
+@bp.errorhandler(PaginationError)
+def pagination_error(e):
+    return jsonify({'error': str(e)}), 400
+
+@bp.errorhandler(WriteError)
+def write_error(e):
+    body = {'error': str(e)}
+    if e.errors is not None:
+        body['errors'] = e.errors
+    return jsonify(body), e.status
+
+def add_image_srcsets(rows):
+    # Resized copies for the cards (see images.py); None for external images
+    for row in rows:
+        row['image_srcset'] = images.image_srcset(row['image_url'])
+    return rows
+
+def list_response(rows, next_cursor, page):
+    """Plain list for legacy callers, {items, next_cursor} when limit/after was given."""
+    if page.paginated:
+        return jsonify({'items': rows, 'next_cursor': next_cursor})
+    return jsonify(rows)
+
 @bp.route('/')
 def index():
     return render_template('index.html')
@@ -28,20 +89,25 @@ def dashboard():
 @login_required
 def fix_admin():
     """Temporary helper to force current user to be admin"""
-    db = get_db()
+    # A GET that writes, so it needs the writer rather than get_db()
+    db = get_write_db()
     db.execute("UPDATE user SET role = 'admin' WHERE id = ?", (g.user['id'],))
     db.commit()
     # Update the session user immediately
-    g.user = db.execute('SELECT * FROM user WHERE id = ?', (g.user['id'],)).fetchone()
+    invalidate_user(g.user['id'])
+    g.user = dict(db.execute('SELECT * FROM user WHERE id = ?', (g.user['id'],)).fetchone())
+    session['user_version'] = g.user['session_version']
     return redirect(url_for('routes.admin'))
 
 # --- API Routes ---
 
 @bp.route('/api/destinations', methods=['GET'])
+@skip_user_load
+@catalog.conditional
 def get_destinations():
-    db = get_db()
-    dests = db.execute('SELECT * FROM destination').fetchall()
-    return jsonify([dict(d) for d in dests])
+    page = parse_page(request.args, DESTINATION_SORTS)
+    rows, next_cursor = fetch_page(get_db(), 'SELECT * FROM destination', [], [], page)
+    return list_response(add_image_srcsets(rows), next_cursor, page)
 
 @bp.route('/api/destinations', methods=['POST'])
 @login_required
@@ -52,11 +118,13 @@ def create_destination():
     if not data.get('name') or not data.get('description'):
          return jsonify({'error': 'Missing name or description'}), 400
          
-    db = get_db()
-    db.execute('INSERT INTO destination (name, description, image_url, availability) VALUES (?, ?, ?, ?)',
-               (data['name'], data['description'], data.get('image_url'), 1))
-    db.commit()
-    return jsonify({'message': 'Destination created'}), 201
+    def insert(db):
+        return db.execute('INSERT INTO destination (name, description, image_url, availability) VALUES (?, ?, ?, ?)',
+                          (data['name'], data['description'], data.get('image_url'), 1)).lastrowid
+
+    dest_id = run_write(insert)
+    catalog.invalidate()
+    return jsonify({'message': 'Destination created', 'id': dest_id}), 201
 
 @bp.route('/api/destinations/<int:id>', methods=['PUT'])
 @login_required
@@ -67,35 +135,216 @@ def update_destination(id):
     if not data.get('name') or not data.get('description'):
          return jsonify({'error': 'Missing name or description'}), 400
     
-    db = get_db()
-    # Check if destination exists
-    dest = db.execute('SELECT id FROM destination WHERE id = ?', (id,)).fetchone()
-    if not dest:
-        return jsonify({'error': 'Destination not found'}), 404
-    
-    db.execute('UPDATE destination SET name = ?, description = ?, image_url = ? WHERE id = ?',
-               (data['name'], data['description'], data.get('image_url'), id))
-    db.commit()
+    def update(db):
+        # Check if destination exists
+        dest = db.execute('SELECT id, image_url FROM destination WHERE id = ?', (id,)).fetchone()
+        if not dest:
+            raise WriteError('Destination not found', 404)
+
+        # Leave an uploaded image alone unless image_url is sent explicitly
+        db.execute('UPDATE destination SET name = ?, description = ?, image_url = ? WHERE id = ?',
+                   (data['name'], data['description'], data.get('image_url', dest['image_url']), id))
+
+    run_write(update)
+    catalog.invalidate()
     return jsonify({'message': 'Destination updated'}), 200
 
 @bp.route('/api/destinations/<int:id>', methods=['DELETE'])
 @login_required
 def delete_destination(id):
     if g.user['role'] != 'admin': return jsonify({'error': 'Unauthorized'}), 401
-    db = get_db()
-    db.execute('DELETE FROM destination WHERE id = ?', (id,))
-    db.commit()
+    def delete(db):
+        try:
+            db.execute('DELETE FROM destination WHERE id = ?', (id,))
+        except db.IntegrityError:
+            # foreign_keys=ON: venues/bookings still reference this destination
+            raise WriteError('Destination still has venues or bookings', 409)
+
+    run_write(delete)
+    catalog.invalidate()
     return jsonify({'message': 'Deleted'}), 200
 
+@bp.route('/api/import', methods=['POST'])
+@login_required
+def import_catalog():
+    """Bulk import destinations with nested venues (JSON, NDJSON or CSV body)."""
+    if g.user['role'] != 'admin': return jsonify({'error': 'Unauthorized'}), 401
+
+    fmt = request.args.get('format') or importer.detect_format(content_type=request.mimetype)
+    if fmt not in importer.FORMATS:
+        return jsonify({'error': "Unknown format, pass ?format=json|ndjson|csv or a matching Content-Type"}), 400
+    dry_run = request.args.get('dry_run') in ('1', 'true')
+
+    try:
+        records = importer.parse(request.get_data(as_text=True), fmt)
+        summary = importer.import_catalog(records, dry_run=dry_run)
+    except importer.CatalogImportError as e:
+        return jsonify({'error': 'Import failed, nothing was written', 'errors': e.errors}), 400
+
+    if dry_run:
+        return jsonify(summary), 200
+    catalog.invalidate()
+    return jsonify(summary), 201
+
+def set_image(table, id):
+    """Store the request body as the image of a destination or venue."""
+    if g.user['role'] != 'admin': return jsonify({'error': 'Unauthorized'}), 401
+
+    db = get_db()
+    if not db.execute(f'SELECT id FROM {table} WHERE id = ?', (id,)).fetchone():
+        return jsonify({'error': f'{table.capitalize()} not found'}), 404
+
+    try:
+        image_url = uploads.save_upload(request.stream, request.content_length)
+    except uploads.UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+
+    # The file is already in place, so the row only ever points at a complete image
+    def update(db):
+        return db.execute(f'UPDATE {table} SET image_url = ? WHERE id = ?', (image_url, id)).rowcount
+
+    if run_write(update) == 0:
+        return jsonify({'error': f'{table.capitalize()} not found'}), 404
+    catalog.invalidate()
+    return jsonify({'message': 'Image updated', 'image_url': image_url}), 200
+
+@bp.route('/api/destinations/<int:id>/image', methods=['PUT'])
+@login_required
+def upload_destination_image(id):
+    """Raw image body (PNG, JPEG, GIF or WebP), up to MAX_UPLOAD_BYTES."""
+    return set_image('destination', id)
+
+@bp.route('/api/venues/<int:id>/image', methods=['PUT'])
+@login_required
+def upload_venue_image(id):
+    """Raw image body (PNG, JPEG, GIF or WebP), up to MAX_UPLOAD_BYTES."""
+    return set_image('venue', id)
+
 @bp.route('/api/venues', methods=['GET'])
+@skip_user_load
+@catalog.conditional
 def get_venues():
+    page = parse_page(request.args, VENUE_SORTS)
+    where, params = [], []
+    filters = [
+        ('destination_id', 'v.destination_id = ?', int),
+        ('min_capacity', 'v.capacity >= ?', int),
+        ('min_price', 'v.price >= ?', float),
+        ('max_price', 'v.price <= ?', float),
+    ]
+    for name, condition, cast in filters:
+        value = number_arg(request.args, name, cast)
+        if value is not None:
+            where.append(condition)
+            params.append(value)
+
+    rows, next_cursor = fetch_page(
+        get_db(),
+        'SELECT v.*, d.name as destination_name FROM venue v JOIN destination d ON v.destination_id = d.id',
+        where, params, page, id_column='v.id'
+    )
+    return list_response(add_image_srcsets(rows), next_cursor, page)
+
+@bp.route('/api/venues/search', methods=['GET'])
+@skip_user_load
+def search_venues():
+    """
+    Venues that are bookable on every requested date and fit the guest count
+    and budget, e.g. ?destination=Dublin&date=2026-06-12&guests=180&max_price=3000.
+    Ranked by price (or ?sort=capacity for best fit) and keyset paginated.
+    """
+    page = parse_page(request.args, SEARCH_SORTS, default_sort='price')
+    if page.limit is None:
+        page.limit = 20
+
+    where = ['v.availability = 1', 'd.availability = 1']
+    params = []
+    filters = [
+        ('destination_id', 'v.destination_id = ?', int),
+        ('guests', 'v.capacity >= ?', int),
+        ('max_price', 'v.price <= ?', float),
+    ]
+    for name, condition, cast in filters:
+        value = number_arg(request.args, name, cast)
+        if value is not None:
+            where.append(condition)
+            params.append(value)
+
+    destination = request.args.get('destination')
+    if destination:
+        # Resolved to destination ids first so the planner walks
+        # idx_venue_destination_price instead of every venue by price
+        where.append("v.destination_id IN (SELECT id FROM destination WHERE name LIKE ? || '%' ESCAPE '\\')")
+        # % and _ in the input are matched literally
+        params.append(destination.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_'))
+
+    dates = [d for d in request.args.get('date', '').split(',') if d]
+    if len(dates) > MAX_SEARCH_DATES:
+        raise PaginationError(f'At most {MAX_SEARCH_DATES} dates can be searched at once')
+    dates = [date_arg({'date': d}, 'date') for d in dates]
+    if dates:
+        # Same condition as idx_booking_active_slot, so this is an index probe per venue
+        where.append(f'''NOT EXISTS (
+            SELECT 1 FROM booking b
+            WHERE b.venue_id = v.id AND b.booking_date IN ({', '.join('?' * len(dates))})
+              AND b.status NOT IN ('cancelled', 'rejected'))''')
+        params.extend(dates)
+
+    rows, next_cursor = fetch_page(
+        get_db(),
+        'SELECT v.*, d.name as destination_name FROM venue v JOIN destination d ON v.destination_id = d.id',
+        where, params, page, id_column='v.id'
+    )
+    return jsonify({'items': rows, 'next_cursor': next_cursor})
+
+@bp.route('/api/search', methods=['GET'])
+@skip_user_load
+@catalog.conditional
+def search_catalog():
+    """Type-ahead search over destination and venue names (?q=dub&limit=10)."""
+    limit = number_arg(request.args, 'limit')
+    if limit is None:
+        limit = search.DEFAULT_LIMIT
+    elif limit < 1:
+        raise PaginationError('Invalid limit')
+    limit = min(limit, search.MAX_LIMIT)
+    results = search.search(get_db(), request.args.get('q', ''), limit)
+    return jsonify({'items': results})
+
+@bp.route('/api/venues/<int:id>/availability', methods=['GET'])
+@skip_user_load
+def get_venue_availability(id):
+    """Booked and free dates for one venue (?from=&to= or ?month=, default this month)."""
+    start, end = availability.parse_range(request.args)
     db = get_db()
-    dest_id = request.args.get('destination_id')
-    if dest_id:
-        venues = db.execute('SELECT * FROM venue WHERE destination_id = ?', (dest_id,)).fetchall()
-    else:
-        venues = db.execute('SELECT v.*, d.name as destination_name FROM venue v JOIN destination d ON v.destination_id = d.id').fetchall()
-    return jsonify([dict(v) for v in venues])
+    venue = db.execute('SELECT id, availability FROM venue WHERE id = ?', (id,)).fetchone()
+    if not venue:
+        return jsonify({'error': 'Venue not found'}), 404
+
+    months = availability.load_bitmaps(db, [id], start, end)[id]
+    result = {'venue_id': id, 'from': start.isoformat(), 'to': end.isoformat(), 'available': bool(venue['availability'])}
+    result.update(availability.calendar(months, start, end, bool(venue['availability'])))
+    return jsonify(result)
+
+@bp.route('/api/destinations/<int:id>/availability', methods=['GET'])
+@skip_user_load
+def get_destination_availability(id):
+    """Calendars for every venue of a destination in one response."""
+    start, end = availability.parse_range(request.args)
+    db = get_db()
+    venues = db.execute(
+        'SELECT id, name, availability FROM venue WHERE destination_id = ? ORDER BY id', (id,)
+    ).fetchall()
+    if not venues and not db.execute('SELECT id FROM destination WHERE id = ?', (id,)).fetchone():
+        return jsonify({'error': 'Destination not found'}), 404
+
+    bitmaps = availability.load_bitmaps(db, [v['id'] for v in venues], start, end)
+    result = []
+    for v in venues:
+        entry = {'venue_id': v['id'], 'name': v['name'], 'available': bool(v['availability'])}
+        entry.update(availability.calendar(bitmaps[v['id']], start, end, bool(v['availability'])))
+        result.append(entry)
+    return jsonify({'destination_id': id, 'from': start.isoformat(), 'to': end.isoformat(), 'venues': result})
 
 @bp.route('/api/venues', methods=['POST'])
 @login_required
@@ -107,16 +356,18 @@ def create_venue():
     if not all(k in data for k in required):
          return jsonify({'error': 'Missing fields'}), 400
     
-    # Validate destination exists
-    db = get_db()
-    dest = db.execute('SELECT id FROM destination WHERE id = ?', (data['destination_id'],)).fetchone()
-    if not dest:
-        return jsonify({'error': 'Invalid destination_id'}), 400
-         
-    db.execute('INSERT INTO venue (destination_id, name, capacity, price, availability) VALUES (?, ?, ?, ?, ?)',
-               (data['destination_id'], data['name'], data['capacity'], data['price'], 1))
-    db.commit()
-    return jsonify({'message': 'Venue created'}), 201
+    def insert(db):
+        # Validate destination exists
+        dest = db.execute('SELECT id FROM destination WHERE id = ?', (data['destination_id'],)).fetchone()
+        if not dest:
+            raise WriteError('Invalid destination_id')
+
+        return db.execute('INSERT INTO venue (destination_id, name, capacity, price, availability) VALUES (?, ?, ?, ?, ?)',
+                          (data['destination_id'], data['name'], data['capacity'], data['price'], 1)).lastrowid
+
+    venue_id = run_write(insert)
+    catalog.invalidate()
+    return jsonify({'message': 'Venue created', 'id': venue_id}), 201
 
 @bp.route('/api/venues/<int:id>', methods=['PUT'])
 @login_required
@@ -128,111 +379,146 @@ def update_venue(id):
     if not all(k in data for k in required):
          return jsonify({'error': 'Missing fields'}), 400
     
-    db = get_db()
-    # Check if venue exists
-    venue = db.execute('SELECT id FROM venue WHERE id = ?', (id,)).fetchone()
-    if not venue:
-        return jsonify({'error': 'Venue not found'}), 404
-    
-    # Validate destination exists
-    dest = db.execute('SELECT id FROM destination WHERE id = ?', (data['destination_id'],)).fetchone()
-    if not dest:
-        return jsonify({'error': 'Invalid destination_id'}), 400
-    
-    db.execute('UPDATE venue SET destination_id = ?, name = ?, capacity = ?, price = ? WHERE id = ?',
-               (data['destination_id'], data['name'], data['capacity'], data['price'], id))
-    db.commit()
+    def update(db):
+        # Check if venue exists
+        venue = db.execute('SELECT id FROM venue WHERE id = ?', (id,)).fetchone()
+        if not venue:
+            raise WriteError('Venue not found', 404)
+
+        # Validate destination exists
+        dest = db.execute('SELECT id FROM destination WHERE id = ?', (data['destination_id'],)).fetchone()
+        if not dest:
+            raise WriteError('Invalid destination_id')
+
+        db.execute('UPDATE venue SET destination_id = ?, name = ?, capacity = ?, price = ? WHERE id = ?',
+                   (data['destination_id'], data['name'], data['capacity'], data['price'], id))
+
+    run_write(update)
+    catalog.invalidate()
     return jsonify({'message': 'Venue updated'}), 200
 
 @bp.route('/api/venues/<int:id>', methods=['DELETE'])
 @login_required
 def delete_venue(id):
     if g.user['role'] != 'admin': return jsonify({'error': 'Unauthorized'}), 401
-    db = get_db()
-    db.execute('DELETE FROM venue WHERE id = ?', (id,))
-    db.commit()
+    def delete(db):
+        try:
+            db.execute('DELETE FROM venue WHERE id = ?', (id,))
+        except db.IntegrityError:
+            raise WriteError('Venue still has bookings', 409)
+
+    run_write(delete)
+    catalog.invalidate()
     return jsonify({'message': 'Deleted'}), 200
 
+def booking_filters(args):
+    """WHERE conditions for the status / date range filters on booking lists."""
+    where, params = [], []
+
+    status = args.get('status')
+    if status:
+        statuses = status.split(',')
+        if any(s not in BOOKING_STATUSES for s in statuses):
+            raise PaginationError('Invalid status')
+        where.append(f"b.status IN ({', '.join('?' * len(statuses))})")
+        params.extend(statuses)
+
+    date_from = date_arg(args, 'from')
+    if date_from:
+        where.append('b.booking_date >= ?')
+        params.append(date_from)
+    date_to = date_arg(args, 'to')
+    if date_to:
+        where.append('b.booking_date <= ?')
+        params.append(date_to)
+
+    return where, params
+
 @bp.route('/api/bookings', methods=['GET'])
 @login_required
 def get_bookings():
-    db = get_db()
-    
-    if g.user['role'] == 'admin':
-        # Admin sees all bookings
-        bookings = db.execute('''
-            SELECT b.*, d.name as dest_name, v.name as venue_name 
-            FROM booking b
-            JOIN destination d ON b.destination_id = d.id
-            JOIN venue v ON b.venue_id = v.id
-        ''').fetchall()
-    else:
-        # Customer sees only their own bookings
-        bookings = db.execute('''
-            SELECT b.*, d.name as dest_name, v.name as venue_name 
-            FROM booking b
-            JOIN destination d ON b.destination_id = d.id
-            JOIN venue v ON b.venue_id = v.id
-            WHERE b.customer_email = ?
-        ''', (g.user['username'],)).fetchall() # Using username as email/identifier for now based on auth logic
-        
-        # NOTE: In auth.py registration, we only saved 'username'. 
-        # But booking table has 'customer_email'. 
-        # If the user registered with an email as username, this works.
-        # If not, we should probably query by customer_name = username.
-        # Let's double check the booking creation logic. 
-        # create_booking uses: customer_email = g.user.get('email', '')
-        # But 'user' table has no email column!
-        
-        # Correction: The user table only has username.
-        # The booking table has customer_name and customer_email.
-        # When booking as a user, we should match by something unique.
-        # Let's match by customer_name = username for now since that's what we have.
-        
-        bookings = db.execute('''
-            SELECT b.*, d.name as dest_name, v.name as venue_name 
-            FROM booking b
-            JOIN destination d ON b.destination_id = d.id
-            JOIN venue v ON b.venue_id = v.id
-            WHERE b.customer_name = ?
-        ''', (g.user['username'],)).fetchall()
+    page = parse_page(request.args, BOOKING_SORTS)
+    where, params = booking_filters(request.args)
+
+    if g.user['role'] != 'admin':
+        # Customers only see their own bookings. The user table has no email
+        # column, so bookings are matched on customer_name = username.
+        where.insert(0, 'b.customer_name = ?')
+        params.insert(0, g.user['username'])
+
+    rows, next_cursor = fetch_page(get_db(), BOOKING_SELECT, where, params, page, id_column='b.id')
+    return list_response(rows, next_cursor, page)
+
+EXPORT_BATCH_SIZE = 500
+
+@bp.route('/api/bookings/export', methods=['GET'])
+@login_required
+def export_bookings():
+    """Stream bookings as NDJSON or CSV straight off the cursor (admin only)."""
+    if g.user['role'] != 'admin': return jsonify({'error': 'Unauthorized'}), 401
+
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'error': "Invalid format, expected 'ndjson' or 'csv'"}), 400
+
+    where, params = booking_filters(request.args)
+    sql = BOOKING_SELECT
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += ' ORDER BY b.id'
+    cursor = get_db().execute(sql, params)
+    columns = [c[0] for c in cursor.description]
+
+    # Rows are pulled EXPORT_BATCH_SIZE at a time and written out immediately,
+    # so memory use does not grow with the number of bookings.
+    def batches():
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                return
+            yield rows
 
-    return jsonify([dict(b) for b in bookings])
+    def generate_ndjson():
+        for rows in batches():
+            yield ''.join(json.dumps(dict(row)) + '\n' for row in rows)
+
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for rows in batches():
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        # Header only, when there are no rows
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    if fmt == 'csv':
+        generate, mimetype = generate_csv, 'text/csv'
+    else:
+        generate, mimetype = generate_ndjson, 'application/x-ndjson'
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=bookings.{fmt}'}
+    )
 
 @bp.route('/api/bookings/<int:id>', methods=['DELETE'])
 @login_required
 def delete_booking(id):
     if g.user['role'] != 'admin': return jsonify({'error': 'Unauthorized'}), 401
-    db = get_db()
-    db.execute('DELETE FROM booking WHERE id = ?', (id,))
-    db.commit()
+    run_write(lambda db: db.execute('DELETE FROM booking WHERE id = ?', (id,)))
     return jsonify({'message': 'Deleted'}), 200
 
 @bp.route('/api/catalog', methods=['GET'])
+@skip_user_load
+@catalog.conditional
 def get_catalog():
     """Get all destinations with their venues grouped for catalog display"""
-    db = get_db()
-    destinations = db.execute('SELECT * FROM destination').fetchall()
-    
-    catalog = []
-    for dest in destinations:
-        venues = db.execute('SELECT * FROM venue WHERE destination_id = ?', (dest['id'],)).fetchall()
-        catalog.append({
-            'id': dest['id'],
-            'name': dest['name'],
-            'description': dest['description'],
-            'image': dest.get('image_url'),
-            'price': 100,  # Default price per hour, adjust as needed
-            'items': [{
-                'id': v['id'],
-                'name': v['name'],
-                'description': f"Capacity: {v['capacity']} guests",
-                'image': None,
-                'status': 'Available' if v['availability'] else 'Unavailable'
-            } for v in venues]
-        })
-    
-    return jsonify(catalog)
+    # Served from the in-memory snapshot; rebuilt with one query after any change
+    return Response(catalog.get_snapshot(get_db()), mimetype='application/json')
 
 @bp.route('/api/bookings', methods=['POST'])
 @login_required
@@ -246,8 +532,8 @@ def create_booking():
         venue_id = data.get('category_id')  # category_id is actually venue_id from the modal
         destination_id = data.get('destination_id')
         booking_date = data.get('date')
-        customer_name = g.user.get('username', 'Guest')  # Get from session
-        customer_email = g.user.get('email', '')
+        customer_name = g.user['username']  # Get from session
+        customer_email = ''  # user table has no email column
     else:
         # Old format
         if not all(k in data for k in ['customer_name', 'destination_id', 'venue_id', 'booking_date']):
@@ -257,27 +543,31 @@ def create_booking():
         venue_id = data['venue_id']
         booking_date = data['booking_date']
         customer_email = data.get('customer_email', '')
+
+    # Dates are stored as YYYY-MM-DD (the occupancy index relies on it)
+    try:
+        booking_date = date.fromisoformat(booking_date).isoformat()
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid booking date, expected YYYY-MM-DD'}), 400
     
-    db = get_db()
-    # Check availability
-    dest = db.execute('SELECT availability FROM destination WHERE id = ?', (destination_id,)).fetchone()
-    venue = db.execute('SELECT availability FROM venue WHERE id = ?', (venue_id,)).fetchone()
-    
-    if not dest or not dest['availability'] or not venue or not venue['availability']:
-        return jsonify({'error': 'Selected destination or venue is unavailable'}), 400
-
-    # Prevent double booking
-    existing_booking = db.execute(
-        'SELECT id FROM booking WHERE venue_id = ? AND booking_date = ? AND status NOT IN ("cancelled", "rejected")',
-        (venue_id, booking_date)
-    ).fetchone()
-    
-    if existing_booking:
-        return jsonify({'error': 'This venue is already booked for the selected date.'}), 409 # 409 Conflict
+    # The availability check and the insert run in one write transaction, so
+    # they see the same state, even with several gunicorn workers.
+    def insert(db):
+        # Check availability
+        dest = db.execute('SELECT availability FROM destination WHERE id = ?', (destination_id,)).fetchone()
+        venue = db.execute('SELECT availability FROM venue WHERE id = ?', (venue_id,)).fetchone()
 
-    db.execute('INSERT INTO booking (customer_name, customer_email, destination_id, venue_id, booking_date, status) VALUES (?, ?, ?, ?, ?, ?)',
-               (customer_name, customer_email, destination_id, venue_id, booking_date, 'pending'))
-    db.commit()
+        if not dest or not dest['availability'] or not venue or not venue['availability']:
+            raise WriteError('Selected destination or venue is unavailable')
+
+        try:
+            # Double booking is prevented by the idx_booking_active_slot partial unique index
+            db.execute('INSERT INTO booking (customer_name, customer_email, destination_id, venue_id, booking_date, status) VALUES (?, ?, ?, ?, ?, ?)',
+                       (customer_name, customer_email, destination_id, venue_id, booking_date, 'pending'))
+        except db.IntegrityError:
+            raise WriteError('This venue is already booked for the selected date.', 409) # 409 Conflict
+
+    run_write(insert)
     return jsonify({'message': 'Booking request submitted successfully!'}), 201
 
 @bp.route('/api/bookings/<int:id>', methods=['PATCH'])
@@ -288,13 +578,112 @@ def update_booking(id):
 
     data = request.get_json()
     status = data.get('status')
-    if status not in ['pending', 'accepted', 'rejected', 'paid', 'confirmed', 'cancelled']:
+    if status not in BOOKING_STATUSES:
          return jsonify({'error': 'Invalid status'}), 400
          
-    db = get_db()
-    db.execute('UPDATE booking SET status = ? WHERE id = ?', (status, id))
-    db.commit()
-    return jsonify({'message': 'Booking updated'}), 200
+    def update(db):
+        booking = db.execute('SELECT status FROM booking WHERE id = ?', (id,)).fetchone()
+        if not booking:
+            raise WriteError('Booking not found', 404)
+        if not transition_allowed(booking['status'], status):
+            raise WriteError(f"Cannot change a {booking['status']} booking to {status}")
+
+        try:
+            db.execute('UPDATE booking SET status = ? WHERE id = ?', (status, id))
+        except db.IntegrityError:
+            # Re-activating a cancelled/rejected booking whose slot is taken
+            raise WriteError('This venue is already booked for the selected date.', 409)
+        return dict(db.execute(BOOKING_SELECT + ' WHERE b.id = ?', (id,)).fetchone())
+
+    updated = run_write(update)
+    return jsonify({'message': 'Booking updated', 'booking': updated}), 200
+
+def transition_allowed(current, new):
+    return current == new or new in BOOKING_TRANSITIONS.get(current, ())
+
+@bp.route('/api/bookings', methods=['PATCH'])
+@login_required
+def bulk_update_bookings():
+    """
+    Change the status of many bookings in one transaction (admin only).
+
+    Body is either {"updates": [{"id": 1, "status": "confirmed"}, ...]} or
+    {"filter": {"status": ..., "from": ..., "to": ...}, "status": "confirmed"}.
+    Every change is validated first; if any is invalid nothing is applied.
+    Returns the updated rows so the admin UI can patch them in place.
+    """
+    if g.user['role'] != 'admin': return jsonify({'error': 'Unauthorized'}), 401
+
+    data = request.get_json(silent=True) or {}
+
+    def update(db):
+        if 'updates' in data:
+            updates = data['updates']
+            if not isinstance(updates, list) or not all(isinstance(u, dict) for u in updates):
+                raise WriteError('updates must be a list of {id, status}')
+            targets = [(u.get('id'), u.get('status')) for u in updates]
+            # bool is an int subclass, but True is not a booking id
+            if not all(type(booking_id) is int for booking_id, _ in targets):
+                raise WriteError('Every update needs an integer id')
+        elif 'filter' in data and isinstance(data['filter'], dict):
+            status = data.get('status')
+            # One status for every match, so check it before looking any up
+            if status not in BOOKING_STATUSES:
+                raise WriteError('Invalid status')
+            try:
+                where, params = booking_filters(data['filter'])
+            except PaginationError as e:
+                raise WriteError(str(e))
+            if not where:
+                raise WriteError('filter must narrow the bookings (status, from or to)')
+            rows = db.execute(
+                'SELECT b.id FROM booking b WHERE ' + ' AND '.join(where) + ' LIMIT ?',
+                params + [MAX_BULK_UPDATES + 1]
+            ).fetchall()
+            targets = [(row['id'], status) for row in rows]
+        else:
+            raise WriteError('Provide either updates or filter and status')
+
+        if len(targets) > MAX_BULK_UPDATES:
+            raise WriteError(f'At most {MAX_BULK_UPDATES} bookings can be updated at once')
+
+        ids = [booking_id for booking_id, _ in targets]
+        current = {}
+        if ids:
+            current = {row['id']: row['status'] for row in db.execute(
+                f"SELECT id, status FROM booking WHERE id IN ({', '.join('?' * len(ids))})", ids
+            )}
+
+        errors = []
+        seen = set()
+        for booking_id, status in targets:
+            # Each change is checked against the status before the request,
+            # so a second change to the same booking could skip a transition
+            if booking_id in seen:
+                errors.append({'id': booking_id, 'error': 'Listed more than once'})
+                continue
+            seen.add(booking_id)
+            if status not in BOOKING_STATUSES:
+                errors.append({'id': booking_id, 'error': 'Invalid status'})
+            elif booking_id not in current:
+                errors.append({'id': booking_id, 'error': 'Booking not found'})
+            elif not transition_allowed(current[booking_id], status):
+                errors.append({'id': booking_id, 'error': f'Cannot change a {current[booking_id]} booking to {status}'})
+        if errors:
+            raise WriteError('No bookings were updated', errors=errors)
+
+        try:
+            db.executemany('UPDATE booking SET status = ? WHERE id = ?', [(status, booking_id) for booking_id, status in targets])
+        except db.IntegrityError:
+            raise WriteError('A venue is already booked for one of the selected dates; no bookings were updated', 409)
+        if not ids:
+            return []
+        return [dict(row) for row in db.execute(
+            BOOKING_SELECT + f" WHERE b.id IN ({', '.join('?' * len(ids))}) ORDER BY b.id", ids
+        )]
+
+    updated = run_write(update)
+    return jsonify({'updated': updated}), 200
 
 @bp.route('/api/users', methods=['GET'])
 @login_required
@@ -302,9 +691,9 @@ def get_users():
     if g.user['role'] != 'admin':
         return jsonify({'error': 'Unauthorized'}), 401
     
-    db = get_db()
-    users = db.execute('SELECT id, username, role FROM user').fetchall()
-    return jsonify([dict(u) for u in users])
+    page = parse_page(request.args, USER_SORTS)
+    rows, next_cursor = fetch_page(get_db(), 'SELECT id, username, role FROM user', [], [], page)
+    return list_response(rows, next_cursor, page)
 
 @bp.route('/api/users/<int:id>', methods=['DELETE'])
 @login_required
@@ -312,15 +701,175 @@ def delete_user(id):
     if g.user['role'] != 'admin':
         return jsonify({'error': 'Unauthorized'}), 401
         
-    db = get_db()
     # Prevent admin from deleting themselves
     if id == g.user['id']:
         return jsonify({'error': 'Cannot delete yourself'}), 400
 
-    db.execute('DELETE FROM user WHERE id = ?', (id,))
-    db.commit()
+    run_write(lambda db: db.execute('DELETE FROM user WHERE id = ?', (id,)))
+    invalidate_user(id)
     return jsonify({'message': 'User deleted'}), 200
 
+# Sections of /api/admin/bootstrap: name -> (select, sorts, id column, paginated by default)
+BOOTSTRAP_SECTIONS = {
+    'destinations': ('SELECT * FROM destination', DESTINATION_SORTS, 'id', False),
+    'venues': ('SELECT v.*, d.name as destination_name FROM venue v JOIN destination d ON v.destination_id = d.id',
+               VENUE_SORTS, 'v.id', True),
+    'bookings': (BOOKING_SELECT, BOOKING_SORTS, 'b.id', True),
+    'users': ('SELECT id, username, role FROM user', USER_SORTS, 'id', False),
+}
+BOOTSTRAP_LIMIT = 50
+
+@bp.route('/api/admin/bootstrap', methods=['GET'])
+@login_required
+def admin_bootstrap():
+    """
+    Everything the admin page shows on load, read in one transaction so the
+    sections agree with each other and with last_event_id (where the live
+    booking events should resume from).
+
+    ?sections=venues,bookings picks sections (default all). Venues and
+    bookings come back as the first page of {items, next_cursor}, with
+    ?limit= (default 50) or ?venues_limit=/?bookings_limit= per section;
+    destinations and users are whole lists unless given a <section>_limit.
+    ?<section>_order=desc lists a section newest first (the admin page does
+    this for bookings, so new requests are on the first page).
+    """
+    if g.user['role'] != 'admin': return jsonify({'error': 'Unauthorized'}), 401
+
+    names = request.args.get('sections')
+    names = names.split(',') if names else list(BOOTSTRAP_SECTIONS)
+    unknown = [name for name in names if name not in BOOTSTRAP_SECTIONS]
+    if unknown:
+        raise PaginationError(f"Unknown section(s): {', '.join(unknown)}")
+
+    pages = {}
+    for name in names:
+        _, sorts, _, paged = BOOTSTRAP_SECTIONS[name]
+        limit = request.args.get(f'{name}_limit')
+        if limit is None and paged:
+            limit = request.args.get('limit', BOOTSTRAP_LIMIT)
+        args = {} if limit is None else {'limit': limit}
+        if f'{name}_order' in request.args:
+            args['order'] = request.args[f'{name}_order']
+        pages[name] = parse_page(args, sorts)
+
+    db = get_db()
+    # Inside an atomic /api/batch the writer's transaction is already open
+    # (and must not be rolled back here)
+    own_transaction = not db.in_transaction
+    if own_transaction:
+        db.execute('BEGIN')
+    try:
+        result = {
+            'last_event_id': db.execute('SELECT COALESCE(MAX(id), 0) FROM booking_event').fetchone()[0]
+        }
+        for name in names:
+            select, _, id_column, _ = BOOTSTRAP_SECTIONS[name]
+            rows, next_cursor = fetch_page(db, select, [], [], pages[name], id_column=id_column)
+            result[name] = {'items': rows, 'next_cursor': next_cursor} if pages[name].paginated else rows
+    finally:
+        if own_transaction:
+            db.rollback()
+    return jsonify(result)
+
+BATCH_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+# Streaming responses, raw uploads and endpoints that manage their own
+# transaction cannot run as sub-requests
+BATCH_EXCLUDED = {'routes.batch', 'routes.import_catalog', 'routes.export_bookings',
+                  'routes.upload_destination_image', 'routes.upload_venue_image',
+                  'events.booking_events'}
+
+class BatchAborted(Exception):
+    """A sub-request of an atomic batch failed; rolls the whole batch back."""
+
+def run_sub_request(item):
+    """Dispatch one {method, path, body} through the URL map; returns {status, body}."""
+    method = str(item.get('method', 'GET')).upper()
+    path = item.get('path')
+    if method not in BATCH_METHODS:
+        return {'status': 400, 'body': {'error': f'Unsupported method {method}'}}
+    if not isinstance(path, str) or not path.startswith('/api/'):
+        return {'status': 400, 'body': {'error': 'path must start with /api/'}}
+
+    # Same session cookie and client address as the batch request
+    builder = EnvironBuilder(
+        path=path, method=method, base_url=request.host_url,
+        json=item.get('body') if 'body' in item else None,
+        headers={'Cookie': request.headers.get('Cookie', '')},
+        environ_overrides={'REMOTE_ADDR': request.remote_addr}
+    )
+    environ = builder.get_environ()
+    builder.close()
+
+    # The sub-request shares this request's app context, so g (and the
+    # database connections on it) is shared. Connections it opens are kept
+    # for teardown; anything else it leaves on g is put back as it was.
+    saved = dict(vars(g))
+    try:
+        with current_app.request_context(environ):
+            if request.endpoint in BATCH_EXCLUDED:
+                return {'status': 400, 'body': {'error': f'{path} cannot be used in a batch'}}
+            try:
+                response = current_app.full_dispatch_request()
+            except Exception:
+                current_app.log_exception(sys.exc_info())
+                return {'status': 500, 'body': {'error': 'Internal server error'}}
+    finally:
+        kept = {key: value for key, value in vars(g).items() if key in ('db', 'read_db')}
+        vars(g).clear()
+        vars(g).update(saved)
+        vars(g).update(kept)
+
+    body = response.get_json(silent=True) if response.is_json else response.get_data(as_text=True)
+    return {'status': response.status_code, 'body': body}
+
+@bp.route('/api/batch', methods=['POST'])
+@skip_user_load
+def batch():
+    """
+    Run several API calls in one HTTP request:
+
+        {"requests": [{"method": "POST", "path": "/api/venues", "body": {...}}, ...],
+         "atomic": false}
+
+    Sub-requests run in order with the caller's session and each gets its
+    own {status, body} in "responses". With "atomic": true they share one
+    database transaction: the first one that fails (status >= 400) stops the
+    batch and nothing is saved. At most BATCH_MAX_REQUESTS sub-requests.
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get('requests')
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        return jsonify({'error': 'requests must be a list of {method, path, body}'}), 400
+    limit = current_app.config['BATCH_MAX_REQUESTS']
+    if len(items) > limit:
+        return jsonify({'error': f'At most {limit} requests can be batched at once'}), 400
+
+    responses = []
+    if not data.get('atomic'):
+        for item in items:
+            responses.append(run_sub_request(item))
+        return jsonify({'responses': responses}), 200
+
+    try:
+        with transaction():
+            for index, item in enumerate(items):
+                responses.append(run_sub_request(item))
+                if responses[-1]['status'] >= 400:
+                    raise BatchAborted(index)
+    except BatchAborted as e:
+        index = e.args[0]
+        return jsonify({
+            'error': f'Request {index} failed, nothing was saved',
+            'failed_index': index,
+            'responses': responses
+        }), 400
+    finally:
+        # Sub-requests invalidated the catalog before their changes were
+        # committed (or rolled back); drop anything cached in between
+        catalog.invalidate()
+    return jsonify({'responses': responses}), 200
+
 @bp.route('/logout')
 @login_required
 def logout():
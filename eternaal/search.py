@@ -0,0 +1,63 @@
+"""
+Type-ahead search over destinations and venues, backed by the search_index
+FTS5 table (see migrations/0009_catalog_search.sql).
+"""
+import re
+from markupsafe import escape
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+MAX_TERMS = 8
+
+# snippet() wraps matches in these before the text is HTML-escaped, so
+# catalog text can never inject markup into the highlighted result
+_OPEN, _CLOSE = '\x02', '\x03'
+
+SEARCH_QUERY = f'''
+    SELECT rowid, name, place, dest_id, rank,
+           snippet(search_index, -1, '{_OPEN}', '{_CLOSE}', '…', 12) AS snippet
+    FROM search_index
+    WHERE search_index MATCH ?
+    ORDER BY rank
+    LIMIT ?
+'''
+
+
+def match_expression(q):
+    """
+    Turn free text into an FTS5 query: every word must match, and each word
+    is treated as a prefix ("dub cas" -> "dub"* AND "cas"*). Words are quoted
+    so FTS5 operators and punctuation in the input are taken literally.
+    Returns None if the text has no searchable words.
+    """
+    words = re.findall(r'\w+', q or '')[:MAX_TERMS]
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def highlight(snippet):
+    """HTML-escape a snippet and turn the match markers into <mark> tags."""
+    html = str(escape(snippet or ''))
+    return html.replace(_OPEN, '<mark>').replace(_CLOSE, '</mark>')
+
+
+def search(db, q, limit=DEFAULT_LIMIT):
+    """Best matches first (bm25, name matches weighted highest)."""
+    expression = match_expression(q)
+    if expression is None:
+        return []
+
+    results = []
+    for row in db.execute(SEARCH_QUERY, (expression, limit)):
+        is_venue = row['rowid'] % 2 == 1
+        results.append({
+            'type': 'venue' if is_venue else 'destination',
+            'id': row['rowid'] // 2,
+            'destination_id': row['dest_id'],
+            'destination_name': row['place'] if is_venue else row['name'],
+            'name': row['name'],
+            'snippet': highlight(row['snippet']),
+            'score': round(-row['rank'], 4)
+        })
+    return results
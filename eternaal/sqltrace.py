@@ -0,0 +1,110 @@
+"""
+Opt-in SQL tracing (SQL_TRACE = True), built on the statement listeners in
+db.py:
+
+  * statements slower than SQL_SLOW_THRESHOLD seconds are logged with the
+    endpoint that ran them
+  * when one request runs the same statement shape (the SQL with literals
+    and IN lists collapsed) more than SQL_REPEAT_THRESHOLD times, that is
+    logged as a likely N+1 query
+
+Tests can use capture_queries()/assert_max_queries() whether or not
+tracing is on, e.g.
+
+    with assert_max_queries(app, 2):
+        client.get('/api/catalog')
+"""
+import contextlib
+import re
+import threading
+from flask import current_app, g, request, has_request_context
+from eternaal.db import add_statement_listener
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACE = re.compile(r'\s+')
+
+
+def statement_shape(sql):
+    """Normalize SQL so the same query with different values compares equal."""
+    shape = _STRING.sub('?', sql)
+    shape = _NUMBER.sub('?', shape)
+    shape = _IN_LIST.sub('(?...)', shape)
+    return _SPACE.sub(' ', shape).strip()
+
+
+def _endpoint():
+    return (request.endpoint or request.path) if has_request_context() else 'no request'
+
+
+def _on_statement(sql, seconds):
+    if sql is None or not g:
+        return
+
+    threshold = current_app.config['SQL_SLOW_THRESHOLD']
+    if seconds >= threshold:
+        current_app.logger.warning(
+            'Slow query (%.1f ms) in %s: %s', seconds * 1000, _endpoint(), _SPACE.sub(' ', sql).strip()
+        )
+
+    if has_request_context():
+        shapes = g.setdefault('_sql_shapes', {})
+        shape = statement_shape(sql)
+        shapes[shape] = shapes.get(shape, 0) + 1
+
+
+def _check_repeats(exc=None):
+    shapes = g.pop('_sql_shapes', None)
+    if not shapes:
+        return
+    limit = current_app.config['SQL_REPEAT_THRESHOLD']
+    for shape, count in shapes.items():
+        if count > limit:
+            current_app.logger.warning(
+                'Possible N+1 query in %s: ran %d times: %s', _endpoint(), count, shape
+            )
+
+
+class QueryCapture:
+    """Statements run on one thread while capture_queries() is active."""
+
+    def __init__(self):
+        self.thread = threading.get_ident()
+        self.statements = []
+
+    def __call__(self, sql, seconds):
+        if sql is not None and threading.get_ident() == self.thread:
+            self.statements.append(sql)
+
+    def __len__(self):
+        return len(self.statements)
+
+
+@contextlib.contextmanager
+def capture_queries(app):
+    """Collect the SQL run inside the block (on this thread) into a list-like QueryCapture."""
+    capture = QueryCapture()
+    listeners = app.extensions['eternaal_db_listeners']
+    listeners.append(capture)
+    try:
+        yield capture
+    finally:
+        listeners.remove(capture)
+
+
+@contextlib.contextmanager
+def assert_max_queries(app, limit):
+    """Fail if the block runs more than `limit` SQL statements."""
+    with capture_queries(app) as capture:
+        yield capture
+    if len(capture) > limit:
+        listing = '\n'.join(f'  {i}. {_SPACE.sub(" ", sql).strip()}' for i, sql in enumerate(capture.statements, 1))
+        raise AssertionError(f'Expected at most {limit} queries, {len(capture)} were run:\n{listing}')
+
+
+def init_app(app):
+    if not app.config['SQL_TRACE']:
+        return
+    add_statement_listener(app, _on_statement)
+    app.teardown_request(_check_repeats)
@@ -2,15 +2,13 @@ document.addEventListener('DOMContentLoaded', () => {
     // Determine which page we are on and load relevant data
     if (document.getElementById('admin-dest-list')) {
         // Admin Page
-        loadAdminDestinations();
         setupAdminForms();
-        loadAdminVenues();
-        loadAdminBookings();
-        loadAdminUsers(); // Add this line
+        loadAdminBootstrap();
     } else if (document.getElementById('destinations-list')) {
         // Index Page
         loadDestinations();
         setupBookingForm();
+        setupSearch();
         loadUserBookings(); // Add this
     }
 });
@@ -46,6 +44,21 @@ function showAdminAlert(msg, type = 'success') {
 
 // --- CUSTOMER FUNCTIONS ---
 
+// --- IMAGES ---
+// Cards get resized WebP (JPEG fallback) copies of local images, loaded lazily.
+// The server sends their srcsets with each row (image_srcset, null for
+// external images, which are used as they are).
+function imageTag(url, srcset, alt) {
+    if (!srcset) {
+        return `<img src="${url}" alt="${alt}" loading="lazy" decoding="async">`;
+    }
+    const sizes = '(max-width: 600px) 100vw, 50vw';
+    return `<picture>
+        <source type="image/webp" srcset="${srcset.webp}" sizes="${sizes}">
+        <img src="${url}" srcset="${srcset.jpeg}" sizes="${sizes}" alt="${alt}" loading="lazy" decoding="async">
+    </picture>`;
+}
+
 async function loadDestinations() {
     const list = document.getElementById('destinations-list');
     try {
@@ -56,7 +69,7 @@ async function loadDestinations() {
             div.className = 'item-card';
             div.innerHTML = `
                 <h3>${d.name}</h3>
-                ${d.image_url ? `<img src="${d.image_url}" alt="Dest Image">` : ''}
+                ${d.image_url ? imageTag(d.image_url, d.image_srcset, 'Dest Image') : ''}
                 <p>${d.description}</p>
                 <p>Status: <strong>${d.availability ? 'Available' : 'Unavailable'}</strong></p>
                 <button onclick="selectDestination(${d.id}, '${d.name}')" ${!d.availability ? 'disabled' : ''}>
@@ -68,6 +81,48 @@ async function loadDestinations() {
     } catch (e) { list.innerHTML = 'Error loading destinations'; }
 }
 
+// --- SEARCH ---
+// Waits for a pause in typing, and ignores responses to older queries
+let searchTimer = null;
+let searchSeq = 0;
+
+function setupSearch() {
+    const input = document.getElementById('catalog-search');
+    if (!input) return;
+    input.addEventListener('input', () => {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => runSearch(input.value.trim()), 200);
+    });
+}
+
+async function runSearch(q) {
+    const box = document.getElementById('search-results');
+    const seq = ++searchSeq;
+    if (q.length < 2) {
+        box.style.display = 'none';
+        box.innerHTML = '';
+        return;
+    }
+    try {
+        const data = await apiCall(`/api/search?q=${encodeURIComponent(q)}`);
+        if (seq !== searchSeq) return;
+        box.innerHTML = '';
+        if (data.items.length === 0) box.innerHTML = '<p>No matches.</p>';
+        data.items.forEach(r => {
+            const div = document.createElement('div');
+            div.className = 'search-result';
+            // The snippet is escaped by the server, only <mark> tags are added
+            div.innerHTML = `<small>${r.type === 'venue' ? 'Venue' : 'Destination'}</small> ${r.snippet}`;
+            div.onclick = () => {
+                box.style.display = 'none';
+                selectDestination(r.destination_id, r.destination_name);
+            };
+            box.appendChild(div);
+        });
+        box.style.display = 'block';
+    } catch (e) { box.innerHTML = 'Error searching'; }
+}
+
 async function selectDestination(id, name) {
     document.getElementById('selected-destination-name').innerText = name;
     document.getElementById('venues-section').style.display = 'block';
@@ -86,7 +141,7 @@ async function selectDestination(id, name) {
             div.className = 'item-card';
             div.innerHTML = `
                 <h4>${v.name}</h4>
-                ${v.image_url ? `<img src="${v.image_url}" alt="Venue Image">` : ''}
+                ${v.image_url ? imageTag(v.image_url, v.image_srcset, 'Venue Image') : ''}
                 <p>Capacity: ${v.capacity}, Price: $${v.price}</p>
                 <button onclick="showBookingForm(${id}, ${v.id}, '${v.name}', ${v.price})" ${!v.availability ? 'disabled' : ''}>
                     ${v.availability ? 'Book This Venue' : 'Fully Booked'}
@@ -97,6 +152,9 @@ async function selectDestination(id, name) {
     } catch (e) { list.innerHTML = 'Error loading venues'; }
 }
 
+// Booked dates of the venue currently shown in the booking form
+let bookedDates = new Set();
+
 function showBookingForm(destId, venueId, venueName, price) {
     document.getElementById('book-dest-id').value = destId;
     document.getElementById('book-venue-id').value = venueId;
@@ -105,12 +163,44 @@ function showBookingForm(destId, venueId, venueName, price) {
 
     document.getElementById('booking-section').style.display = 'block';
     document.getElementById('booking-section').scrollIntoView();
+
+    loadVenueCalendar(venueId);
+}
+
+// One request fetches the next year of booked dates for the venue
+async function loadVenueCalendar(venueId) {
+    bookedDates = new Set();
+    const today = new Date();
+    const from = today.toISOString().slice(0, 10);
+    const until = new Date(today.getTime() + 365 * 24 * 60 * 60 * 1000).toISOString().slice(0, 10);
+    try {
+        const cal = await apiCall(`/api/venues/${venueId}/availability?from=${from}&to=${until}`);
+        bookedDates = new Set(cal.booked || []);
+    } catch (e) {
+        console.error('Error loading availability', e);
+    }
+    checkBookingDate();
+}
+
+function checkBookingDate() {
+    const input = document.getElementById('book-date');
+    const status = document.getElementById('book-date-status');
+    if (!input || !status) return;
+    if (input.value && bookedDates.has(input.value)) {
+        status.innerText = 'This venue is already booked on that date. Please pick another.';
+        input.setCustomValidity('Date already booked');
+    } else {
+        status.innerText = '';
+        input.setCustomValidity('');
+    }
 }
 
 function setupBookingForm() {
     const form = document.getElementById('booking-form');
     if (!form) return;
 
+    document.getElementById('book-date').addEventListener('change', checkBookingDate);
+
     form.addEventListener('submit', async (e) => {
         e.preventDefault();
         const data = {
@@ -174,44 +264,142 @@ function getStatusBadge(status) {
 
 // --- ADMIN FUNCTIONS ---
 
-async function loadAdminBookings() {
+// Admin lists are fetched one page at a time; "Load more" follows next_cursor.
+// Bookings come newest first, so new requests are on the first page.
+const ADMIN_PAGE_SIZE = 50;
+let adminBookingsCursor = null;
+let adminVenuesCursor = null;
+
+function toggleLoadMore(id, cursor) {
+    const btn = document.getElementById(id);
+    if (btn) btn.style.display = cursor ? 'inline-block' : 'none';
+}
+
+// Everything the admin page shows, from one request and one consistent snapshot
+async function loadAdminBootstrap() {
+    const data = await apiCall(`/api/admin/bootstrap?limit=${ADMIN_PAGE_SIZE}&bookings_order=desc`);
+    if (data.error) {
+        showAdminAlert('Error loading admin data: ' + data.error, 'danger');
+        return;
+    }
+    renderAdminDestinations(data.destinations);
+    showAdminVenues(data.venues);
+    showAdminBookings(data.bookings);
+    renderAdminUsers(data.users);
+    watchBookingEvents(data.last_event_id);
+}
+
+function adminBookingRow(b) {
+    if (b.status === 'pending') {
+        return `
+            <tr data-booking-id="${b.id}">
+                <td><input type="checkbox" class="booking-select" value="${b.id}"></td>
+                <td>${b.id}</td>
+                <td>${b.customer_name} (${b.customer_email})</td>
+                <td>${b.venue_name}</td>
+                <td>${b.booking_date}</td>
+                <td>
+                    <button onclick="updateBooking(${b.id}, 'confirmed')">Confirm</button>
+                    <button onclick="updateBooking(${b.id}, 'cancelled')" class="btn-danger">Cancel</button>
+                </td>
+            </tr>
+        `;
+    }
+    return `
+        <tr data-booking-id="${b.id}">
+            <td>${b.id}</td>
+            <td>${b.customer_name}</td>
+            <td>${b.venue_name}</td>
+            <td>${b.booking_date}</td>
+            <td>${b.status}</td>
+            <td><button onclick="deleteBooking(${b.id})" class="btn-danger">Delete</button></td>
+        </tr>
+    `;
+}
+
+function renderAdminBookings(bookings) {
     const pendingBody = document.getElementById('bookings-pending-body');
     const historyBody = document.getElementById('bookings-history-body');
+    bookings.forEach(b => {
+        // A live update may already have shown this booking
+        const existing = document.querySelector(`tr[data-booking-id="${b.id}"]`);
+        if (existing) existing.remove();
+        const body = b.status === 'pending' ? pendingBody : historyBody;
+        // Keep newest first: before the first row with a lower id
+        const next = [...body.querySelectorAll('tr[data-booking-id]')]
+            .find(row => parseInt(row.dataset.bookingId) < b.id);
+        if (next) next.insertAdjacentHTML('beforebegin', adminBookingRow(b));
+        else body.insertAdjacentHTML('beforeend', adminBookingRow(b));
+    });
+}
+
+async function loadAdminBookings(append = false) {
+    const pendingBody = document.getElementById('bookings-pending-body');
     if (!pendingBody) return;
 
-    pendingBody.innerHTML = '<tr><td colspan="5">Loading...</td></tr>';
+    if (!append) adminBookingsLoading = true;
+    let url = `/api/bookings?limit=${ADMIN_PAGE_SIZE}&order=desc`;
+    if (append && adminBookingsCursor) {
+        url += `&after=${encodeURIComponent(adminBookingsCursor)}`;
+    } else {
+        pendingBody.innerHTML = '<tr><td colspan="6">Loading...</td></tr>';
+    }
 
-    const bookings = await apiCall('/api/bookings');
-    pendingBody.innerHTML = '';
-    historyBody.innerHTML = '';
+    showAdminBookings(await apiCall(url), append);
+}
 
-    bookings.forEach(b => {
-        if (b.status === 'pending') {
-            pendingBody.innerHTML += `
-                <tr>
-                    <td>${b.id}</td>
-                    <td>${b.customer_name} (${b.customer_email})</td>
-                    <td>${b.venue_name}</td>
-                    <td>${b.booking_date}</td>
-                    <td>
-                        <button onclick="updateBooking(${b.id}, 'confirmed')">Confirm</button>
-                        <button onclick="updateBooking(${b.id}, 'cancelled')" class="btn-danger">Cancel</button>
-                    </td>
-                </tr>
-            `;
-        } else {
-            historyBody.innerHTML += `
-                <tr>
-                    <td>${b.id}</td>
-                    <td>${b.customer_name}</td>
-                    <td>${b.venue_name}</td>
-                    <td>${b.booking_date}</td>
-                    <td>${b.status}</td>
-                    <td><button onclick="deleteBooking(${b.id})" class="btn-danger">Delete</button></td>
-                </tr>
-            `;
-        }
+function showAdminBookings(page, append = false) {
+    if (!append) {
+        document.getElementById('bookings-pending-body').innerHTML = '';
+        document.getElementById('bookings-history-body').innerHTML = '';
+    }
+
+    renderAdminBookings(page.items);
+    adminBookingsCursor = page.next_cursor;
+    toggleLoadMore('bookings-load-more', adminBookingsCursor);
+
+    if (!append) {
+        // Changes that arrived while the list was loading go on top of it
+        adminBookingsLoading = false;
+        pendingBookingEvents.splice(0).forEach(applyBookingEvent);
+    }
+}
+
+// --- LIVE BOOKING UPDATES (server-sent events) ---
+let adminBookingsLoading = false;
+let pendingBookingEvents = [];
+
+function watchBookingEvents(lastEventId) {
+    if (!window.EventSource) return;
+    // Starts after the bootstrap snapshot; the browser reconnects by itself
+    // and resumes after the last event it saw
+    const source = new EventSource(`/api/bookings/events?last_event_id=${lastEventId}`);
+    source.addEventListener('booking', e => {
+        const event = JSON.parse(e.data);
+        if (adminBookingsLoading) pendingBookingEvents.push(event);
+        else applyBookingEvent(event);
     });
+    // Missed too many changes to catch up: start over
+    source.addEventListener('reset', () => loadAdminBookings());
+}
+
+function applyBookingEvent(event) {
+    const existing = document.querySelector(`tr[data-booking-id="${event.id}"]`);
+    if (event.type === 'deleted' || !event.booking) {
+        if (existing) existing.remove();
+        return;
+    }
+    // New bookings go on top. A change to a booking on a page that is not
+    // loaded yet is left for Load more to bring
+    if (!existing && event.type !== 'created' && adminBookingsCursor) return;
+    applyBookingUpdate(event.booking);
+}
+
+// Replace (or add) a single booking row after a status change
+function applyBookingUpdate(b) {
+    const existing = document.querySelector(`tr[data-booking-id="${b.id}"]`);
+    if (existing) existing.remove();
+    renderAdminBookings([b]);
 }
 
 async function updateBooking(id, status) {
@@ -219,7 +407,7 @@ async function updateBooking(id, status) {
         const res = await apiCall(`/api/bookings/${id}`, 'PATCH', { status }); // Changed PUT to PATCH to match routes.py
         if (res.message) {
             showAdminAlert('Booking updated to: ' + status, 'success');
-            loadAdminBookings();
+            applyBookingUpdate(res.booking);
         } else {
             showAdminAlert('Error updating booking: ' + (res.error || 'Unknown error'), 'danger');
         }
@@ -229,10 +417,38 @@ async function updateBooking(id, status) {
     }
 }
 
+function toggleAllBookings(checked) {
+    document.querySelectorAll('.booking-select').forEach(cb => cb.checked = checked);
+}
+
+// Update every ticked pending booking in one request
+async function bulkUpdateBookings(status) {
+    const ids = [...document.querySelectorAll('.booking-select:checked')].map(cb => parseInt(cb.value));
+    if (ids.length === 0) {
+        showAdminAlert('Select at least one booking first.', 'danger');
+        return;
+    }
+
+    try {
+        const res = await apiCall('/api/bookings', 'PATCH', { updates: ids.map(id => ({ id, status })) });
+        if (res.updated) {
+            res.updated.forEach(applyBookingUpdate);
+            document.getElementById('bookings-select-all').checked = false;
+            showAdminAlert(`${res.updated.length} booking(s) updated to: ${status}`, 'success');
+        } else {
+            const details = (res.errors || []).map(e => `#${e.id}: ${e.error}`).join(', ');
+            showAdminAlert('Error updating bookings: ' + (res.error || 'Unknown error') + (details ? ` (${details})` : ''), 'danger');
+        }
+    } catch (e) {
+        console.error(e);
+        showAdminAlert('Failed to communicate with server.', 'danger');
+    }
+}
+
 async function deleteBooking(id) {
     if (confirm('Delete this booking?')) {
         await apiCall(`/api/bookings/${id}`, 'DELETE');
-        loadAdminBookings();
+        applyBookingEvent({ type: 'deleted', id });
     }
 }
 
@@ -244,28 +460,32 @@ async function loadAdminUsers() {
     tableBody.innerHTML = '<tr><td colspan="4">Loading...</td></tr>';
 
     try {
-        const users = await apiCall('/api/users');
-        tableBody.innerHTML = '';
-
-        users.forEach(u => {
-            tableBody.innerHTML += `
-                <tr>
-                    <td>${u.id}</td>
-                    <td>${u.username}</td>
-                    <td>${u.role}</td>
-                    <td>
-                        <button onclick="deleteUser(${u.id}, '${u.username}')" class="btn-delete" ${u.role === 'admin' ? 'disabled title="Cannot delete admin"' : ''}>
-                            <i class="fas fa-trash-alt"></i> Delete
-                        </button>
-                    </td>
-                </tr>
-            `;
-        });
+        renderAdminUsers(await apiCall('/api/users'));
     } catch (e) {
         tableBody.innerHTML = '<tr><td colspan="4">Error loading users</td></tr>';
     }
 }
 
+function renderAdminUsers(users) {
+    const tableBody = document.getElementById('users-table-body');
+    tableBody.innerHTML = '';
+
+    users.forEach(u => {
+        tableBody.innerHTML += `
+            <tr>
+                <td>${u.id}</td>
+                <td>${u.username}</td>
+                <td>${u.role}</td>
+                <td>
+                    <button onclick="deleteUser(${u.id}, '${u.username}')" class="btn-delete" ${u.role === 'admin' ? 'disabled title="Cannot delete admin"' : ''}>
+                        <i class="fas fa-trash-alt"></i> Delete
+                    </button>
+                </td>
+            </tr>
+        `;
+    });
+}
+
 async function deleteUser(id, username) {
     if (confirm(`Are you sure you want to delete user "${username}"? This cannot be undone.`)) {
         const res = await apiCall(`/api/users/${id}`, 'DELETE');
@@ -279,8 +499,11 @@ async function deleteUser(id, username) {
 }
 
 async function loadAdminDestinations() {
+    renderAdminDestinations(await apiCall('/api/destinations'));
+}
+
+function renderAdminDestinations(dests) {
     const list = document.getElementById('admin-dest-list');
-    const dests = await apiCall('/api/destinations');
     list.innerHTML = ''; // clear
 
     dests.forEach(d => {
@@ -354,15 +577,8 @@ async function deleteDest(id) {
     }
 }
 
-async function loadAdminVenues() {
+function renderAdminVenues(venues) {
     const list = document.getElementById('admin-venue-list');
-    const filter = document.getElementById('admin-venue-filter-dest').value;
-    let url = '/api/venues';
-    if (filter) url += `?destination_id=${filter}`;
-
-    const venues = await apiCall(url);
-    list.innerHTML = '';
-
     venues.forEach(v => {
         const div = document.createElement('div');
         div.className = 'admin-card'; // New class
@@ -386,6 +602,23 @@ async function loadAdminVenues() {
     });
 }
 
+async function loadAdminVenues(append = false) {
+    const filter = document.getElementById('admin-venue-filter-dest').value;
+    let url = `/api/venues?limit=${ADMIN_PAGE_SIZE}`;
+    if (filter) url += `&destination_id=${filter}`;
+    if (append && adminVenuesCursor) url += `&after=${encodeURIComponent(adminVenuesCursor)}`;
+
+    showAdminVenues(await apiCall(url), append);
+}
+
+function showAdminVenues(page, append = false) {
+    if (!append) document.getElementById('admin-venue-list').innerHTML = '';
+
+    renderAdminVenues(page.items);
+    adminVenuesCursor = page.next_cursor;
+    toggleLoadMore('venues-load-more', adminVenuesCursor);
+}
+
 function openEditVenue(id, name, cap, price, avail, destId) {
     document.getElementById('edit-venue-id').value = id;
     document.getElementById('edit-venue-dest-id').value = destId;
@@ -404,6 +637,22 @@ async function deleteVenue(id) {
     }
 }
 
+// Sends the file chosen in a form's file input (if any) as the raw request body
+async function uploadImage(kind, id, inputId) {
+    const input = document.getElementById(inputId);
+    if (!input.files.length) return;
+    const file = input.files[0];
+    const res = await fetch(`/api/${kind}/${id}/image`, {
+        method: 'PUT',
+        headers: { 'Content-Type': file.type || 'application/octet-stream' },
+        body: file
+    });
+    if (!res.ok) {
+        const data = await res.json();
+        showAdminAlert(data.error || 'Image upload failed', 'danger');
+    }
+}
+
 function setupAdminForms() {
     // Add Destination
     document.getElementById('add-destination-form').addEventListener('submit', async (e) => {
@@ -412,10 +661,10 @@ function setupAdminForms() {
             name: document.getElementById('new-dest-name').value,
             description: document.getElementById('new-dest-desc').value,
             availability: document.getElementById('new-dest-avail').checked
-            // image upload skipped for simple JSON API
         };
 
-        await apiCall('/api/destinations', 'POST', data);
+        const created = await apiCall('/api/destinations', 'POST', data);
+        if (created.id) await uploadImage('destinations', created.id, 'new-dest-img');
         loadAdminDestinations();
         e.target.reset();
         alert('Destination Added');
@@ -432,6 +681,7 @@ function setupAdminForms() {
         };
 
         await apiCall(`/api/destinations/${id}`, 'PUT', data);
+        await uploadImage('destinations', id, 'edit-dest-img');
         document.getElementById('edit-dest-container').style.display = 'none';
         loadAdminDestinations();
         alert('Destination Updated');
@@ -447,7 +697,8 @@ function setupAdminForms() {
             price: parseFloat(document.getElementById('new-venue-price').value)
         };
 
-        await apiCall('/api/venues', 'POST', data);
+        const created = await apiCall('/api/venues', 'POST', data);
+        if (created.id) await uploadImage('venues', created.id, 'new-venue-img');
         loadAdminVenues();
         e.target.reset();
         alert('Venue Added');
@@ -465,6 +716,7 @@ function setupAdminForms() {
         };
 
         await apiCall(`/api/venues/${id}`, 'PUT', data);
+        await uploadImage('venues', id, 'edit-venue-img');
         document.getElementById('edit-venue-container').style.display = 'none';
         loadAdminVenues();
         alert('Venue Updated');
@@ -0,0 +1,92 @@
+"""
+Image uploads for destinations and venues.
+
+The request body is the raw image (PUT with Content-Type image/...). It is
+copied to a temporary file in UPLOAD_FOLDER in 64 KB chunks while being
+hashed, so memory use does not depend on the file size, and the upload is
+cut off as soon as it passes MAX_UPLOAD_BYTES. The finished file is renamed
+to <sha256>.<ext>, so the same image uploaded twice is stored once and a
+stored file never changes (which also keeps image derivative hashes valid).
+"""
+import hashlib
+import os
+import tempfile
+from flask import current_app, url_for
+
+CHUNK_SIZE = 64 * 1024
+
+# Leading bytes of each accepted format; the extension is taken from the
+# content, never from the client
+SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+]
+
+
+class UploadError(Exception):
+    """Rejected upload; status is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def sniff(head):
+    """Image extension for the first bytes of a file, or None."""
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    for signature, ext in SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    return None
+
+
+def save_upload(stream, content_length=None):
+    """
+    Store an image from a file-like stream and return its URL
+    (/static/uploads/<sha256>.<ext>).
+    """
+    limit = current_app.config['MAX_UPLOAD_BYTES']
+    if content_length is not None and content_length > limit:
+        raise UploadError(f'Image is larger than {limit} bytes', 413)
+
+    folder = current_app.config['UPLOAD_FOLDER']
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.part')
+    try:
+        digest = hashlib.sha256()
+        size = 0
+        head = b''
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > limit:
+                    raise UploadError(f'Image is larger than {limit} bytes', 413)
+                if len(head) < 12:
+                    head += chunk[:12 - len(head)]
+                digest.update(chunk)
+                f.write(chunk)
+
+        if size == 0:
+            raise UploadError('Empty upload')
+        ext = sniff(head)
+        if ext is None:
+            raise UploadError('Unsupported image type, expected PNG, JPEG, GIF or WebP', 415)
+
+        filename = f'{digest.hexdigest()}.{ext}'
+        path = os.path.join(folder, filename)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return url_for('static', filename=f'uploads/{filename}')
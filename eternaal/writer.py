@@ -0,0 +1,229 @@
+"""
+Funnels database writes through one writer per worker (DB_WRITE_QUEUE).
+
+Routes hand their write to run_write(fn) as a function of the connection:
+
+    def insert(db):
+        return db.execute('INSERT INTO ...', (...)).lastrowid
+
+    booking_id = run_write(insert)
+
+fn runs inside a transaction that is committed before run_write() returns
+its result. It must not commit or roll back itself; raising WriteError (or
+any other exception) undoes everything fn did and re-raises in the route.
+
+With DB_WRITE_QUEUE off, fn simply runs on the request's writer connection
+in a BEGIN IMMEDIATE transaction. With it on, each worker process starts a
+writer thread with its own connection, and requests queue their functions
+for it:
+
+  * the writer takes every function waiting (up to DB_WRITE_BATCH_SIZE),
+    runs each inside its own SAVEPOINT and commits them all at once, so a
+    burst of small writes pays for one commit (group commit) instead of one
+    each. A function that fails only rolls back its own savepoint.
+  * around each batch it holds an exclusive fcntl lock on
+    <DATABASE>.write-lock. Writers in other workers wait for that lock in
+    the kernel, in order, instead of SQLite's busy handler polling (which
+    shows up as `database is locked` errors and long tail latency).
+
+The writer thread has no app or request context, so fn must only use the
+connection and the values it closes over.
+
+Inside `with transaction():` every run_write() instead runs in a savepoint
+of one transaction on the request's writer connection, committed when the
+block ends or rolled back entirely if it raises (see /api/batch).
+"""
+import contextlib
+import fcntl
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from flask import current_app, g
+from eternaal.db import connect, get_write_db, WRITE_TRANSACTION
+
+
+class WriteError(Exception):
+    """A write that was refused; routes turn this into an error response with `status`."""
+
+    def __init__(self, message, status=400, errors=None):
+        super().__init__(message)
+        self.status = status
+        self.errors = errors
+
+
+class WriteQueue:
+    """The writer thread of one worker process and its queue of pending writes."""
+
+    def __init__(self, connect, lock_path, batch_size):
+        self.connect = connect
+        self.lock_path = lock_path
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.jobs = None
+        self.thread = None
+        self.pid = None
+
+    def submit(self, fn):
+        """Queue fn for the writer thread and wait for its result."""
+        future = Future()
+        with self.lock:
+            # Threads do not survive a fork, so a new worker starts its own
+            if self.thread is None or self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.jobs = queue.SimpleQueue()
+                self.thread = threading.Thread(target=self._run, args=(self.jobs,), name='db-writer', daemon=True)
+                self.thread.start()
+            self.jobs.put((fn, future))
+        return future.result()
+
+    def stop(self):
+        """Let the writer finish what is queued, then close its connection."""
+        with self.lock:
+            thread, jobs = self.thread, self.jobs
+            if thread is None or self.pid != os.getpid():
+                return
+            self.thread = None
+            jobs.put(None)
+        thread.join()
+
+    def _run(self, jobs):
+        conn = None
+        with open(self.lock_path, 'a') as lock_file:
+            stopping = False
+            while not stopping:
+                job = jobs.get()
+                if job is None:
+                    break
+                batch = [job]
+                while len(batch) < self.batch_size:
+                    try:
+                        job = jobs.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is None:
+                        stopping = True
+                        break
+                    batch.append(job)
+
+                try:
+                    if conn is None:
+                        conn = self.connect()
+                except Exception as e:
+                    for _, future in batch:
+                        future.set_exception(e)
+                    continue
+
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._commit_batch(conn, batch)
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        if conn is not None:
+            conn.close()
+
+    def _commit_batch(self, conn, batch):
+        done = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for fn, future in batch:
+                conn.execute('SAVEPOINT job')
+                try:
+                    result = fn(conn)
+                except Exception as e:
+                    if not conn.in_transaction:
+                        # SQLite rolled the whole transaction back (e.g. disk
+                        # full), taking the earlier functions' work with it
+                        raise
+                    conn.execute('ROLLBACK TO job')
+                    conn.execute('RELEASE job')
+                    future.set_exception(e)
+                else:
+                    conn.execute('RELEASE job')
+                    done.append((future, result))
+            conn.commit()
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            # Nothing in this batch was saved
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result in done:
+            future.set_result(result)
+
+
+def run_write(fn):
+    """Run fn(db) in a committed write transaction and return its result (see module docstring)."""
+    db = g.get(WRITE_TRANSACTION) if g else None
+    if db is not None:
+        # Part of an open transaction(): only this function's work is undone if it fails
+        db.execute('SAVEPOINT write')
+        try:
+            result = fn(db)
+        except BaseException:
+            db.execute('ROLLBACK TO write')
+            db.execute('RELEASE write')
+            raise
+        db.execute('RELEASE write')
+        return result
+
+    if current_app.config['DB_WRITE_QUEUE']:
+        return current_app.extensions['eternaal_writer'].submit(fn)
+
+    db = get_write_db()
+    db.execute('BEGIN IMMEDIATE')
+    try:
+        result = fn(db)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    return result
+
+
+@contextlib.contextmanager
+def transaction():
+    """
+    Make every run_write() in the block part of one transaction on this
+    request's writer connection. It is committed when the block ends and
+    rolled back if the block raises. With DB_WRITE_QUEUE on, it holds the
+    same cross-process lock as the writer threads while open.
+    """
+    if g.get(WRITE_TRANSACTION) is not None:
+        raise RuntimeError('transaction() blocks cannot be nested')
+
+    db = get_write_db()
+    with contextlib.ExitStack() as stack:
+        if current_app.config['DB_WRITE_QUEUE']:
+            lock_file = stack.enter_context(open(current_app.extensions['eternaal_writer'].lock_path, 'a'))
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            stack.callback(fcntl.flock, lock_file, fcntl.LOCK_UN)
+
+        db.execute('BEGIN IMMEDIATE')
+        setattr(g, WRITE_TRANSACTION, db)
+        try:
+            yield db
+            db.commit()
+        except BaseException:
+            db.rollback()
+            raise
+        finally:
+            g.pop(WRITE_TRANSACTION, None)
+
+
+def stop():
+    """Stop this worker's writer thread, if it has one (e.g. before the worker exits)."""
+    current_app.extensions['eternaal_writer'].stop()
+
+
+def init_app(app):
+    config = app.config
+    listeners = app.extensions['eternaal_db_listeners']
+    app.extensions['eternaal_writer'] = WriteQueue(
+        lambda: connect(config, listeners),
+        f"{config['DATABASE']}.write-lock",
+        config['DB_WRITE_BATCH_SIZE']
+    )
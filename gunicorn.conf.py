@@ -0,0 +1,111 @@
+"""
+Gunicorn settings for running Eternal in production:
+
+    gunicorn -c gunicorn.conf.py
+
+Everything can be changed with environment variables:
+
+    PORT                        port to listen on (default 8000)
+    WEB_CONCURRENCY             worker processes (default 2 x CPUs + 1)
+    GUNICORN_WORKER_CLASS       'sync' (default), 'gthread' or 'gevent' (if
+                                installed); use gthread or gevent when admins
+                                use live booking updates (see eternaal/events.py)
+    GUNICORN_THREADS            threads per gthread worker (default 4)
+    GUNICORN_TIMEOUT            seconds before a stuck worker is killed (default 30)
+    GUNICORN_GRACEFUL_TIMEOUT   seconds a stopping worker gets to finish its requests (default 30)
+    GUNICORN_KEEPALIVE          keep-alive seconds (default 5)
+    GUNICORN_MAX_REQUESTS       recycle a worker after this many requests (default 0 = never)
+
+App settings come from ETERNAAL_* variables, e.g. ETERNAAL_SECRET_KEY.
+
+The app is created once in the master (preload_app) and forked, so imports
+and create_app() are not repeated per worker. Each worker then opens its
+own database connections and builds the catalog snapshot before it accepts
+requests.
+
+Reloading without dropping requests:
+
+    kill -HUP <master pid>      new workers are started and the old ones
+                                finish their in-flight requests (up to
+                                GUNICORN_GRACEFUL_TIMEOUT) before exiting.
+                                Picks up settings, but not new code, because
+                                the app is preloaded.
+    kill -USR2 <master pid>     starts a new master with the new code next to
+                                the old one; then `kill -QUIT <old master pid>`
+                                lets the old workers finish and exit.
+
+Bookings are written in a single transaction, so a request that is cut off
+by the timeout is rolled back as a whole rather than half-saved.
+"""
+import multiprocessing
+import os
+import shutil
+
+wsgi_app = 'app:app'
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# sync is the default because a stopping gthread worker drops connections it
+# has accepted but not started reading yet, so a reload can fail a few requests
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+# Gunicorn switches a sync worker to gthread if threads > 1
+threads = int(os.environ.get('GUNICORN_THREADS', '4')) if worker_class == 'gthread' else 1
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', '5'))
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+preload_app = True
+accesslog = '-'
+
+# Workers share /metrics numbers through files in a folder of their master
+# (see eternaal/metrics.py), set in on_starting. It is handed to the workers
+# by the fork rather than the environment: a master started by USR2 inherits
+# the old master's environment and would otherwise wipe its live folder.
+# An ETERNAAL_METRICS_DIR set by the operator is used as is and never removed.
+metrics_dir = None
+
+
+def on_starting(server):
+    global metrics_dir
+    if os.environ.get('ETERNAAL_METRICS_DIR'):
+        return
+    metrics_dir = f'/tmp/eternaal-metrics-{os.getpid()}'
+    # Numbers from an earlier run of the same master pid are not ours
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+def on_exit(server):
+    if metrics_dir is not None:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+def post_worker_init(worker):
+    # Runs in the worker after the fork, before it starts accepting requests
+    from eternaal import warm_up
+
+    app = worker.wsgi
+    if metrics_dir is not None:
+        app.config['METRICS_DIR'] = metrics_dir
+    connections = threads if worker_class == 'gthread' else 1
+    try:
+        warm_up(app, connections)
+    except Exception:
+        # A missing or old database should show up in requests, not stop the worker
+        worker.log.exception('Warm-up failed')
+
+
+def worker_exit(server, worker):
+    # Save the last metrics, finish queued writes and close connections
+    # cleanly so the WAL is checkpointed
+    from eternaal import metrics, writer
+    from eternaal.db import get_pool, get_read_pool
+
+    app = getattr(worker, 'wsgi', None)
+    if hasattr(app, 'app_context'):
+        with app.app_context():
+            metrics.flush()
+            writer.stop()
+            get_read_pool().close_all()
+            get_pool().close_all()
@@ -0,0 +1,61 @@
+"""
+Fixtures shared by the test modules.
+
+`app` is an app on a fresh database. A module that needs other settings
+overrides `app_config`; one that needs extra rows or routes overrides `app`
+and takes the shared one as its argument.
+"""
+import os
+import tempfile
+import pytest
+from eternaal import create_app
+from eternaal.db import get_pool, get_read_pool, init_db
+
+# Files SQLite (WAL, rollback journal) and the write queue create next to the database
+SIDECAR_SUFFIXES = ('-wal', '-shm', '-journal', '.write-lock')
+
+
+@pytest.fixture
+def db_path():
+    """A throwaway database file, removed afterwards together with its sidecar files."""
+    db_fd, db_path = tempfile.mkstemp()
+    os.close(db_fd)
+
+    yield db_path
+
+    for path in [db_path] + [db_path + suffix for suffix in SIDECAR_SUFFIXES]:
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+@pytest.fixture
+def app_config():
+    """Settings added to the test app's config."""
+    return {}
+
+
+@pytest.fixture
+def app(db_path, app_config):
+    """Create and configure a new app instance for each test."""
+    app = create_app({
+        'TESTING': True,
+        'DATABASE': db_path,
+        **app_config,
+    })
+
+    with app.app_context():
+        init_db()
+
+    yield app
+
+    # Close every connection before the files go
+    app.extensions['eternaal_writer'].stop()
+    with app.app_context():
+        get_read_pool().close_all()
+        get_pool().close_all()
+
+
+@pytest.fixture
+def client(app):
+    """A test client for the app."""
+    return app.test_client()
@@ -31,7 +31,10 @@ class IntegrationTestCase(unittest.TestCase):
     
     def tearDown(self):
         os.close(self.db_fd)
-        os.unlink(self.db_path)
+        # The database runs in WAL mode, so remove its -wal/-shm files too
+        for suffix in ('', '-wal', '-shm', '.write-lock'):
+            if os.path.exists(self.db_path + suffix):
+                os.unlink(self.db_path + suffix)
 
     def login(self, username, password):
         return self.client.post('/login', 
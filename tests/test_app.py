@@ -1,37 +1,8 @@
 import pytest
+import io
 import json
 import os
-import tempfile
-from eternaal import create_app
-from eternaal.db import get_db, init_db
-
-@pytest.fixture
-def app():
-    """Create and configure a new app instance for each test."""
-    # Create a temporary file to isolate the database for each test
-    db_fd, db_path = tempfile.mkstemp()
-    
-    app = create_app({
-        'TESTING': True,
-        'DATABASE': db_path,
-    })
-
-    # Create the database and load test data
-    with app.app_context():
-        init_db()
-
-    yield app
-
-    # Clean up
-    os.close(db_fd)
-    os.unlink(db_path)
-
-
-@pytest.fixture
-def client(app):
-    """A test client for the app."""
-    return app.test_client()
-
+from eternaal.db import get_db
 
 @pytest.fixture
 def runner(app):
@@ -324,3 +295,632 @@ class TestBookingFlow:
             assert response.status_code == 200
             data = json.loads(response.data)
             assert data['message'] == 'Booking updated'
+
+    def test_double_booking_conflict(self, client, app):
+        """A second active booking for the same venue/date is rejected with 409"""
+        with client:
+            login_as_admin(client)
+            client.post('/api/destinations', json={'name': 'Cork', 'description': 'Rebel county'})
+            client.post('/api/venues', json={'destination_id': 1, 'name': 'Blarney', 'capacity': 90, 'price': 2200.0})
+            booking = {'customer_name': 'A', 'destination_id': 1, 'venue_id': 1, 'booking_date': '2026-05-01'}
+
+            assert client.post('/api/bookings', json=booking).status_code == 201
+            assert client.post('/api/bookings', json=booking).status_code == 409
+
+            # Once the first booking is cancelled the slot is free again
+            client.patch('/api/bookings/1', json={'status': 'cancelled'})
+            assert client.post('/api/bookings', json=booking).status_code == 201
+            # ...and the cancelled one can no longer be re-activated
+            assert client.patch('/api/bookings/1', json={'status': 'pending'}).status_code == 409
+
+
+class TestCatalog:
+    """Test the grouped catalog endpoint and its cached snapshot"""
+
+    def test_catalog_groups_venues(self, client, app):
+        """Venues are nested under their destination with real price/image"""
+        with client:
+            login_as_admin(client)
+            client.post('/api/destinations', json={'name': 'Galway', 'description': 'West coast'})
+            client.post('/api/destinations', json={'name': 'Empty', 'description': 'No venues yet'})
+            client.post('/api/venues', json={'destination_id': 1, 'name': 'Abbey', 'capacity': 80, 'price': 1500.0})
+            client.post('/api/venues', json={'destination_id': 1, 'name': 'Castle', 'capacity': 120, 'price': 900.0})
+
+            response = client.get('/api/catalog')
+            assert response.status_code == 200
+            data = json.loads(response.data)
+            assert [d['name'] for d in data] == ['Galway', 'Empty']
+            assert [v['name'] for v in data[0]['items']] == ['Abbey', 'Castle']
+            assert data[0]['price'] == 900.0
+            assert data[0]['items'][0]['price'] == 1500.0
+            assert data[1]['items'] == []
+            assert data[1]['price'] is None
+
+    def test_catalog_refreshes_after_write(self, client, app):
+        """The cached snapshot is dropped when a venue changes"""
+        with client:
+            login_as_admin(client)
+            client.post('/api/destinations', json={'name': 'Kerry', 'description': 'Ring of Kerry'})
+            first = json.loads(client.get('/api/catalog').data)
+            assert first[0]['items'] == []
+
+            client.post('/api/venues', json={'destination_id': 1, 'name': 'Muckross House', 'capacity': 60, 'price': 2000.0})
+            second = json.loads(client.get('/api/catalog').data)
+            assert [v['name'] for v in second[0]['items']] == ['Muckross House']
+
+
+class TestPagination:
+    """Test keyset pagination and filters on the list endpoints"""
+
+    def test_walk_destination_pages(self, client, app):
+        """Following next_cursor visits every row exactly once"""
+        with client:
+            login_as_admin(client)
+            for name in ['E', 'C', 'A', 'D', 'B']:
+                client.post('/api/destinations', json={'name': name, 'description': 'x'})
+
+            names, cursor = [], None
+            while True:
+                url = '/api/destinations?limit=2&sort=name'
+                if cursor:
+                    url += f'&after={cursor}'
+                page = json.loads(client.get(url).data)
+                assert len(page['items']) <= 2
+                names += [d['name'] for d in page['items']]
+                cursor = page['next_cursor']
+                if not cursor:
+                    break
+            assert names == ['A', 'B', 'C', 'D', 'E']
+
+    def test_venue_filters(self, client, app):
+        with client:
+            login_as_admin(client)
+            client.post('/api/destinations', json={'name': 'Sligo', 'description': 'x'})
+            client.post('/api/venues', json={'destination_id': 1, 'name': 'Small', 'capacity': 40, 'price': 800.0})
+            client.post('/api/venues', json={'destination_id': 1, 'name': 'Big Cheap', 'capacity': 200, 'price': 1500.0})
+            client.post('/api/venues', json={'destination_id': 1, 'name': 'Big Dear', 'capacity': 250, 'price': 5000.0})
+
+            page = json.loads(client.get('/api/venues?limit=10&min_capacity=100&max_price=3000').data)
+            assert [v['name'] for v in page['items']] == ['Big Cheap']
+            assert page['next_cursor'] is None
+
+            page = json.loads(client.get('/api/venues?limit=10&sort=price&order=desc').data)
+            assert [v['name'] for v in page['items']] == ['Big Dear', 'Big Cheap', 'Small']
+
+    def test_booking_filters(self, client, app):
+        with client:
+            login_as_admin(client)
+            client.post('/api/destinations', json={'name': 'Clare', 'description': 'x'})
+            client.post('/api/venues', json={'destination_id': 1, 'name': 'Cliffs', 'capacity': 100, 'price': 1000.0})
+            for day in ['2026-01-10', '2026-02-10', '2026-03-10']:
+                client.post('/api/bookings', json={'customer_name': 'A', 'destination_id': 1, 'venue_id': 1, 'booking_date': day})
+            client.patch('/api/bookings/2', json={'status': 'confirmed'})
+
+            page = json.loads(client.get('/api/bookings?limit=10&status=pending&from=2026-02-01').data)
+            assert [b['booking_date'] for b in page['items']] == ['2026-03-10']
+
+    def test_invalid_parameters(self, client, app):
+        assert client.get('/api/destinations?after=not-a-cursor').status_code == 400
+        from eternaal.pagination import encode_cursor
+        for cursor in (encode_cursor('price', {'a': 1}, 1), encode_cursor('price', 10.0, [1]), encode_cursor(['price'], 10.0, 1)):
+            assert client.get(f'/api/venues?sort=price&after={cursor}').status_code == 400
+        assert client.get('/api/venues?min_capacity=lots').status_code == 400
+        assert client.get('/api/destinations?sort=password').status_code == 400
+
+
+class TestConditionalGet:
+    """Test ETag / If-None-Match on the catalog data endpoints"""
+
+    def test_not_modified(self, client, app):
+        for url in ['/api/destinations', '/api/venues?destination_id=1', '/api/catalog']:
+            response = client.get(url)
+            assert response.status_code == 200
+            assert response.headers['Cache-Control'] == 'public, no-cache'
+            etag = response.headers['ETag']
+
+            response = client.get(url, headers={'If-None-Match': etag})
+            assert response.status_code == 304
+            assert response.data == b''
+
+    def test_etag_changes_after_write(self, client, app):
+        with client:
+            login_as_admin(client)
+            etag = client.get('/api/destinations').headers['ETag']
+            client.post('/api/destinations', json={'name': 'Mayo', 'description': 'x'})
+
+            response = client.get('/api/destinations', headers={'If-None-Match': etag})
+            assert response.status_code == 200
+            assert response.headers['ETag'] != etag
+
+    def test_write_from_another_process_is_seen(self, client, app):
+        """Writes that bypass the routes (other workers, scripts) bump the version via triggers"""
+        app.config['CATALOG_VERSION_TTL'] = 0
+        etag = client.get('/api/catalog').headers['ETag']
+        with app.app_context():
+            db = get_db()
+            db.execute("INSERT INTO destination (name, description) VALUES ('Louth', 'x')")
+            db.commit()
+
+        response = client.get('/api/catalog', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert json.loads(response.data)[0]['name'] == 'Louth'
+
+
+class TestBookingExport:
+    """Test the streaming bookings export"""
+
+    def create_bookings(self, client):
+        client.post('/api/destinations', json={'name': 'Wexford', 'description': 'x'})
+        client.post('/api/venues', json={'destination_id': 1, 'name': 'Hook Head', 'capacity': 70, 'price': 1200.0})
+        for day in ['2026-04-01', '2026-04-02', '2026-05-01']:
+            client.post('/api/bookings', json={'customer_name': 'Eve', 'destination_id': 1, 'venue_id': 1, 'booking_date': day})
+
+    def test_export_ndjson(self, client, app):
+        with client:
+            login_as_admin(client)
+            self.create_bookings(client)
+
+            response = client.get('/api/bookings/export?to=2026-04-30')
+            assert response.status_code == 200
+            assert response.mimetype == 'application/x-ndjson'
+            rows = [json.loads(line) for line in response.data.decode().splitlines()]
+            assert [r['booking_date'] for r in rows] == ['2026-04-01', '2026-04-02']
+            assert rows[0]['venue_name'] == 'Hook Head'
+
+    def test_export_csv(self, client, app):
+        import csv
+        import io
+        with client:
+            login_as_admin(client)
+            self.create_bookings(client)
+
+            response = client.get('/api/bookings/export?format=csv&status=pending')
+            assert response.mimetype == 'text/csv'
+            rows = list(csv.DictReader(io.StringIO(response.data.decode())))
+            assert len(rows) == 3
+            assert rows[2]['booking_date'] == '2026-05-01'
+
+    def test_export_requires_admin(self, client, app):
+        with client:
+            client.post('/register', json={'username': 'cust', 'password': 'pw'})
+            client.post('/login', json={'username': 'cust', 'password': 'pw'})
+            assert client.get('/api/bookings/export').status_code == 401
+
+
+class TestBulkBookingUpdate:
+    """Test batch status changes for bookings"""
+
+    def create_bookings(self, client, count=3):
+        client.post('/api/destinations', json={'name': 'Meath', 'description': 'x'})
+        client.post('/api/venues', json={'destination_id': 1, 'name': 'Slane Castle', 'capacity': 300, 'price': 4000.0})
+        for day in range(1, count + 1):
+            client.post('/api/bookings', json={'customer_name': 'Bo', 'destination_id': 1, 'venue_id': 1, 'booking_date': f'2026-07-{day:02d}'})
+
+    def test_bulk_update_by_ids(self, client, app):
+        with client:
+            login_as_admin(client)
+            self.create_bookings(client)
+            response = client.patch('/api/bookings', json={'updates': [
+                {'id': 1, 'status': 'confirmed'}, {'id': 3, 'status': 'rejected'}
+            ]})
+            assert response.status_code == 200
+            updated = json.loads(response.data)['updated']
+            assert [(b['id'], b['status'], b['venue_name']) for b in updated] == [
+                (1, 'confirmed', 'Slane Castle'), (3, 'rejected', 'Slane Castle')
+            ]
+
+    def test_bulk_update_by_filter(self, client, app):
+        with client:
+            login_as_admin(client)
+            self.create_bookings(client)
+            response = client.patch('/api/bookings', json={'filter': {'status': 'pending', 'to': '2026-07-02'}, 'status': 'accepted'})
+            assert [b['id'] for b in json.loads(response.data)['updated']] == [1, 2]
+
+    def test_bulk_update_by_filter_needs_a_valid_status(self, client, app):
+        with client:
+            login_as_admin(client)
+            self.create_bookings(client)
+            for body in ({'filter': {'status': 'pending'}, 'status': 'bogus'}, {'filter': {'status': 'pending'}}):
+                response = client.patch('/api/bookings', json=body)
+                assert response.status_code == 400
+                assert json.loads(response.data)['error'] == 'Invalid status'
+        with app.app_context():
+            statuses = get_db().execute('SELECT DISTINCT status FROM booking').fetchall()
+            assert [row['status'] for row in statuses] == ['pending']
+
+    def test_invalid_transition_rolls_back_everything(self, client, app):
+        with client:
+            login_as_admin(client)
+            self.create_bookings(client)
+            client.patch('/api/bookings/2', json={'status': 'rejected'})
+
+            response = client.patch('/api/bookings', json={'updates': [
+                {'id': 1, 'status': 'confirmed'}, {'id': 2, 'status': 'paid'}, {'id': 99, 'status': 'paid'}
+            ]})
+            assert response.status_code == 400
+            assert [e['id'] for e in json.loads(response.data)['errors']] == [2, 99]
+
+            bookings = json.loads(client.get('/api/bookings').data)
+            assert bookings[0]['status'] == 'pending'
+
+    def test_each_booking_once_with_an_integer_id(self, client, app):
+        with client:
+            login_as_admin(client)
+            self.create_bookings(client)
+
+            # rejected -> confirmed is not allowed, even as a second step
+            response = client.patch('/api/bookings', json={'updates': [
+                {'id': 1, 'status': 'rejected'}, {'id': 1, 'status': 'confirmed'}
+            ]})
+            assert response.status_code == 400
+            assert json.loads(response.data)['errors'] == [{'id': 1, 'error': 'Listed more than once'}]
+
+            for bad_id in ([1], '1', True, None):
+                response = client.patch('/api/bookings', json={'updates': [{'id': bad_id, 'status': 'confirmed'}]})
+                assert response.status_code == 400
+
+            assert json.loads(client.get('/api/bookings').data)[0]['status'] == 'pending'
+
+
+class TestAvailability:
+    """Test the venue availability calendars"""
+
+    def setup_venues(self, client):
+        client.post('/api/destinations', json={'name': 'Kildare', 'description': 'x'})
+        client.post('/api/venues', json={'destination_id': 1, 'name': 'K Club', 'capacity': 200, 'price': 3000.0})
+        client.post('/api/venues', json={'destination_id': 1, 'name': 'Barberstown', 'capacity': 120, 'price': 2000.0})
+        for venue_id, day in [(1, '2026-06-12'), (1, '2026-06-30'), (2, '2026-06-01'), (1, '2026-07-01')]:
+            client.post('/api/bookings', json={'customer_name': 'Dee', 'destination_id': 1, 'venue_id': venue_id, 'booking_date': day})
+
+    def test_venue_month(self, client, app):
+        with client:
+            login_as_admin(client)
+            self.setup_venues(client)
+
+            data = json.loads(client.get('/api/venues/1/availability?month=2026-06').data)
+            assert data['booked'] == ['2026-06-12', '2026-06-30']
+            assert len(data['free']) == 28
+            assert '2026-06-01' in data['free']
+
+    def test_status_change_frees_date(self, client, app):
+        with client:
+            login_as_admin(client)
+            self.setup_venues(client)
+            client.patch('/api/bookings/1', json={'status': 'cancelled'})
+
+            data = json.loads(client.get('/api/venues/1/availability?from=2026-06-01&to=2026-07-31').data)
+            assert data['booked'] == ['2026-06-30', '2026-07-01']
+
+    def test_destination_calendar(self, client, app):
+        with client:
+            login_as_admin(client)
+            self.setup_venues(client)
+
+            data = json.loads(client.get('/api/destinations/1/availability?month=2026-06').data)
+            assert [(v['name'], v['booked']) for v in data['venues']] == [
+                ('K Club', ['2026-06-12', '2026-06-30']),
+                ('Barberstown', ['2026-06-01']),
+            ]
+
+    def test_invalid_range(self, client, app):
+        assert client.get('/api/venues/1/availability?from=2026-06-10&to=2026-06-01').status_code == 400
+        assert client.get('/api/venues/1/availability?from=2026-01-01&to=2027-06-01').status_code == 400
+        assert client.get('/api/venues/999/availability').status_code == 404
+
+
+class TestVenueSearch:
+    """Test searching for venues free on a date within guest count and budget"""
+
+    def test_search(self, client, app):
+        with client:
+            login_as_admin(client)
+            client.post('/api/destinations', json={'name': 'Dublin', 'description': 'x'})
+            client.post('/api/destinations', json={'name': 'Cork', 'description': 'x'})
+            venues = [
+                (1, 'Castle', 200, 2500.0),
+                (1, 'Storehouse', 250, 2900.0),
+                (1, 'Too Small', 100, 1000.0),
+                (1, 'Too Dear', 300, 8000.0),
+                (2, 'Elsewhere', 200, 2000.0),
+            ]
+            for dest_id, name, capacity, price in venues:
+                client.post('/api/venues', json={'destination_id': dest_id, 'name': name, 'capacity': capacity, 'price': price})
+            client.post('/api/bookings', json={'customer_name': 'Z', 'destination_id': 1, 'venue_id': 2, 'booking_date': '2026-06-13'})
+
+            url = '/api/venues/search?destination=Dublin&guests=180&max_price=3000'
+            data = json.loads(client.get(url + '&date=2026-06-12').data)
+            assert [v['name'] for v in data['items']] == ['Castle', 'Storehouse']
+
+            data = json.loads(client.get(url + '&date=2026-06-12,2026-06-13').data)
+            assert [v['name'] for v in data['items']] == ['Castle']
+
+            page = json.loads(client.get(url + '&date=2026-06-12&limit=1&sort=capacity&order=desc').data)
+            assert [v['name'] for v in page['items']] == ['Storehouse']
+            page = json.loads(client.get(url + f"&date=2026-06-12&limit=1&sort=capacity&order=desc&after={page['next_cursor']}").data)
+            assert [v['name'] for v in page['items']] == ['Castle']
+
+            # The destination prefix has no wildcards
+            for prefix in ('Dub', '%25', '_ublin', 'D%25n'):
+                data = json.loads(client.get(f'/api/venues/search?destination={prefix}&date=2026-06-12').data)
+                assert len(data['items']) == (4 if prefix == 'Dub' else 0)
+
+
+class TestSearch:
+    """Test full-text search over destinations and venues"""
+
+    def test_search(self, client, app):
+        with client:
+            login_as_admin(client)
+            client.post('/api/destinations', json={'name': 'Dublin', 'description': 'Historic capital by the sea'})
+            client.post('/api/destinations', json={'name': 'Galway', 'description': 'Seaside <b>city</b>'})
+            client.post('/api/venues', json={'destination_id': 1, 'name': 'Dublin Castle', 'capacity': 200, 'price': 2500.0})
+            client.post('/api/venues', json={'destination_id': 2, 'name': 'Castle Hall', 'capacity': 100, 'price': 900.0})
+
+            items = json.loads(client.get('/api/search?q=dub').data)['items']
+            assert {(i['type'], i['id']) for i in items} == {('destination', 1), ('venue', 1)}
+
+            # Every word must match, as a prefix
+            items = json.loads(client.get('/api/search?q=cast+dub').data)['items']
+            assert [(i['type'], i['id']) for i in items] == [('venue', 1)]
+            assert '<mark>' in items[0]['snippet']
+
+            # Snippets are HTML-escaped apart from the highlight tags
+            items = json.loads(client.get('/api/search?q=city').data)['items']
+            assert items[0]['snippet'] == 'Seaside &lt;b&gt;<mark>city</mark>&lt;/b&gt;'
+
+            # FTS syntax in the input is taken literally
+            assert client.get('/api/search?q=%22OR+NEAR(').status_code == 200
+            assert json.loads(client.get('/api/search?q=').data)['items'] == []
+            assert client.get('/api/search?q=dub&limit=0').status_code == 400
+            assert len(json.loads(client.get('/api/search?q=dub&limit=1').data)['items']) == 1
+
+            # The index follows renames and deletes
+            client.put('/api/destinations/2', json={'name': 'Galway Bay', 'description': 'Seaside', 'availability': 1})
+            items = json.loads(client.get('/api/search?q=bay').data)['items']
+            assert {(i['type'], i['id']) for i in items} == {('destination', 2), ('venue', 2)}
+            client.delete('/api/venues/2')
+            items = json.loads(client.get('/api/search?q=bay').data)['items']
+            assert [(i['type'], i['id']) for i in items] == [('destination', 2)]
+
+
+class TestImageUpload:
+    """Test streaming image uploads for destinations and venues"""
+
+    PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 200
+
+    def test_upload(self, client, app, tmp_path):
+        app.config['UPLOAD_FOLDER'] = str(tmp_path)
+        app.config['MAX_UPLOAD_BYTES'] = 100 * 1024
+        with client:
+            login_as_admin(client)
+            client.post('/api/destinations', json={'name': 'Dublin', 'description': 'x'})
+            client.post('/api/venues', json={'destination_id': 1, 'name': 'Castle', 'capacity': 100, 'price': 10.0})
+
+            response = client.put('/api/destinations/1/image', data=self.PNG, content_type='image/png')
+            assert response.status_code == 200
+            url = json.loads(response.data)['image_url']
+            assert url.startswith('/static/uploads/') and url.endswith('.png')
+
+            # Same content is stored once, under the same name
+            response = client.put('/api/venues/1/image', data=self.PNG, content_type='image/png')
+            assert json.loads(response.data)['image_url'] == url
+            assert os.listdir(tmp_path) == [url.rsplit('/', 1)[1]]
+
+            dest = json.loads(client.get('/api/destinations').data)[0]
+            assert dest['image_url'] == url
+            # Editing without image_url keeps the uploaded image
+            client.put('/api/destinations/1', json={'name': 'Dublin', 'description': 'y'})
+            assert json.loads(client.get('/api/destinations').data)[0]['image_url'] == url
+
+    def test_rejected_uploads(self, client, app, tmp_path):
+        app.config['UPLOAD_FOLDER'] = str(tmp_path)
+        app.config['MAX_UPLOAD_BYTES'] = 1024
+        with client:
+            login_as_admin(client)
+            client.post('/api/destinations', json={'name': 'Dublin', 'description': 'x'})
+
+            assert client.put('/api/destinations/1/image', data=self.PNG + b'\x00' * 1024).status_code == 413
+            # No Content-Length: the limit is enforced while streaming
+            response = client.put('/api/destinations/1/image', input_stream=io.BytesIO(self.PNG + b'\x00' * 1024),
+                                  headers={'Transfer-Encoding': 'chunked'},
+                                  environ_overrides={'wsgi.input_terminated': True})
+            assert response.status_code == 413
+            assert client.put('/api/destinations/1/image', data=b'<svg></svg>').status_code == 415
+            assert client.put('/api/destinations/2/image', data=self.PNG).status_code == 404
+            assert os.listdir(tmp_path) == []
+            assert json.loads(client.get('/api/destinations').data)[0]['image_url'] is None
+
+        client.get('/logout')
+        assert client.put('/api/destinations/1/image', data=self.PNG).status_code in (302, 401)
+
+
+class TestAdminBootstrap:
+    """Test the one-request admin page data"""
+
+    def setup_data(self, client):
+        login_as_admin(client)
+        client.post('/api/destinations', json={'name': 'Dublin', 'description': 'x'})
+        for v in range(3):
+            client.post('/api/venues', json={'destination_id': 1, 'name': f'Venue {v}', 'capacity': 100, 'price': 10.0})
+        for day in range(1, 4):
+            client.post('/api/bookings', json={'customer_name': 'A', 'destination_id': 1, 'venue_id': 1, 'booking_date': f'2026-06-0{day}'})
+
+    def test_bootstrap_returns_every_section(self, client):
+        with client:
+            self.setup_data(client)
+            data = client.get('/api/admin/bootstrap?limit=2').get_json()
+
+        assert [d['name'] for d in data['destinations']] == ['Dublin']
+        assert [v['name'] for v in data['venues']['items']] == ['Venue 0', 'Venue 1']
+        assert data['venues']['next_cursor']
+        assert [b['booking_date'] for b in data['bookings']['items']] == ['2026-06-01', '2026-06-02']
+        assert data['bookings']['items'][0]['venue_name'] == 'Venue 0'
+        assert [u['username'] for u in data['users']] == ['admin']
+        assert data['last_event_id'] == 3
+
+        # The cursor continues where the bootstrap page ended
+        with client:
+            login_as_admin(client)
+            rest = client.get(f"/api/venues?limit=2&after={data['venues']['next_cursor']}").get_json()
+        assert [v['name'] for v in rest['items']] == ['Venue 2']
+
+    def test_bootstrap_sections_and_limits(self, client):
+        with client:
+            self.setup_data(client)
+            data = client.get('/api/admin/bootstrap?sections=bookings,users&bookings_limit=1&users_limit=5').get_json()
+            assert set(data) == {'bookings', 'users', 'last_event_id'}
+            assert len(data['bookings']['items']) == 1
+            assert data['users'] == {'items': [{'id': 1, 'username': 'admin', 'role': 'admin'}], 'next_cursor': None}
+
+            data = client.get('/api/admin/bootstrap?sections=bookings&bookings_order=desc&limit=2').get_json()
+            assert [b['booking_date'] for b in data['bookings']['items']] == ['2026-06-03', '2026-06-02']
+
+            assert client.get('/api/admin/bootstrap?sections=bookings,secrets').status_code == 400
+            assert client.get('/api/admin/bootstrap?bookings_order=sideways').status_code == 400
+            assert client.get('/api/admin/bootstrap?limit=0').status_code == 400
+
+    def test_bootstrap_is_admin_only(self, client):
+        client.post('/register', data={'username': 'cust', 'password': 'pw', 'role': 'customer'})
+        with client:
+            client.post('/login', json={'username': 'cust', 'password': 'pw'})
+            assert client.get('/api/admin/bootstrap').status_code == 401
+
+
+class TestBatch:
+    """Test multiplexing API calls through /api/batch"""
+
+    def test_batch_runs_sub_requests_in_order(self, client):
+        with client:
+            login_as_admin(client)
+            response = client.post('/api/batch', json={'requests': [
+                {'method': 'POST', 'path': '/api/destinations', 'body': {'name': 'Dublin', 'description': 'x'}},
+                {'method': 'POST', 'path': '/api/venues', 'body': {'destination_id': 1, 'name': 'Castle', 'capacity': 100, 'price': 10.0}},
+                {'method': 'GET', 'path': '/api/venues?limit=5'},
+                {'method': 'POST', 'path': '/api/destinations', 'body': {}},
+            ]})
+        assert response.status_code == 200
+        responses = response.get_json()['responses']
+        assert [r['status'] for r in responses] == [201, 201, 200, 400]
+        assert responses[2]['body']['items'][0]['name'] == 'Castle'
+
+        # Not atomic: the invalid create did not undo the others
+        assert json.loads(client.get('/api/destinations').data)[0]['name'] == 'Dublin'
+
+    def test_atomic_batch_saves_nothing_when_one_fails(self, client):
+        booking = {'customer_name': 'A', 'destination_id': 1, 'venue_id': 1, 'booking_date': '2026-06-01'}
+        with client:
+            login_as_admin(client)
+            response = client.post('/api/batch', json={'atomic': True, 'requests': [
+                {'method': 'POST', 'path': '/api/destinations', 'body': {'name': 'Dublin', 'description': 'x'}},
+                {'method': 'POST', 'path': '/api/venues', 'body': {'destination_id': 1, 'name': 'Castle', 'capacity': 100, 'price': 10.0}},
+                # Reads inside the batch see its uncommitted writes
+                {'method': 'GET', 'path': '/api/destinations'},
+                {'method': 'POST', 'path': '/api/bookings', 'body': booking},
+                {'method': 'POST', 'path': '/api/bookings', 'body': booking},
+                {'method': 'GET', 'path': '/api/venues'},
+            ]})
+            data = response.get_json()
+            assert response.status_code == 400
+            assert data['failed_index'] == 4
+            assert [r['status'] for r in data['responses']] == [201, 201, 200, 201, 409]
+            assert data['responses'][2]['body'][0]['name'] == 'Dublin'
+
+            assert json.loads(client.get('/api/destinations').data) == []
+            assert json.loads(client.get('/api/bookings').data) == []
+
+            response = client.post('/api/batch', json={'atomic': True, 'requests': [
+                {'method': 'POST', 'path': '/api/destinations', 'body': {'name': 'Dublin', 'description': 'x'}},
+                {'method': 'POST', 'path': '/api/venues', 'body': {'destination_id': 1, 'name': 'Castle', 'capacity': 100, 'price': 10.0}},
+                {'method': 'POST', 'path': '/api/bookings', 'body': booking},
+            ]})
+            assert response.status_code == 200
+            assert len(json.loads(client.get('/api/bookings').data)) == 1
+
+    def test_rolled_back_batch_does_not_leave_a_cached_catalog(self, client, app):
+        app.config['CATALOG_VERSION_TTL'] = 0
+        with client:
+            login_as_admin(client)
+            client.post('/api/destinations', json={'name': 'Dublin', 'description': 'x'})
+            data = client.post('/api/batch', json={'atomic': True, 'requests': [
+                {'method': 'POST', 'path': '/api/venues', 'body': {'destination_id': 1, 'name': 'Phantom', 'capacity': 10, 'price': 1.0}},
+                {'method': 'GET', 'path': '/api/catalog'},
+                {'method': 'POST', 'path': '/api/destinations', 'body': {}},
+            ]}).get_json()
+            assert data['responses'][1]['body'][0]['items'][0]['name'] == 'Phantom'
+
+        # Another worker's write reaches the rolled back version number again
+        with app.app_context():
+            db = get_db()
+            db.execute("INSERT INTO venue (destination_id, name, capacity, price) VALUES (1, 'Castle', 10, 1.0)")
+            db.commit()
+
+        response = client.get('/api/catalog')
+        assert [v['name'] for v in response.get_json()[0]['items']] == ['Castle']
+
+    def test_bootstrap_in_an_atomic_batch_sees_the_batch(self, client):
+        with client:
+            login_as_admin(client)
+            data = client.post('/api/batch', json={'atomic': True, 'requests': [
+                {'method': 'POST', 'path': '/api/destinations', 'body': {'name': 'Dublin', 'description': 'x'}},
+                {'method': 'GET', 'path': '/api/admin/bootstrap?sections=destinations'},
+                {'method': 'POST', 'path': '/api/destinations', 'body': {'name': 'Mayo', 'description': 'x'}},
+            ]}).get_json()
+            assert [r['status'] for r in data['responses']] == [201, 200, 201]
+            assert [d['name'] for d in data['responses'][1]['body']['destinations']] == ['Dublin']
+            assert [d['name'] for d in client.get('/api/destinations').get_json()] == ['Dublin', 'Mayo']
+
+    def test_batch_limits(self, client, app):
+        app.config['BATCH_MAX_REQUESTS'] = 2
+        with client:
+            login_as_admin(client)
+            too_many = [{'method': 'GET', 'path': '/api/destinations'}] * 3
+            assert client.post('/api/batch', json={'requests': too_many}).status_code == 400
+            assert client.post('/api/batch', json={'requests': 'nope'}).status_code == 400
+
+            responses = client.post('/api/batch', json={'requests': [
+                {'method': 'GET', 'path': '/admin'},
+                {'method': 'GET', 'path': '/api/bookings/export'},
+            ]}).get_json()['responses']
+        assert [r['status'] for r in responses] == [400, 400]
+
+    def test_sub_requests_use_the_callers_session(self, client):
+        response = client.post('/api/batch', json={'requests': [{'method': 'GET', 'path': '/api/users'}]})
+        assert response.get_json()['responses'][0]['status'] in (302, 401)
+
+
+class TestQueryCounts:
+    """Query budgets for the busiest endpoints, so N+1 regressions fail the suite"""
+
+    def test_query_budgets(self, client, app):
+        from eternaal.sqltrace import assert_max_queries
+
+        with client:
+            login_as_admin(client)
+            for d in range(3):
+                client.post('/api/destinations', json={'name': f'Dest {d}', 'description': 'x'})
+                for v in range(5):
+                    client.post('/api/venues', json={'destination_id': d + 1, 'name': f'Venue {v}', 'capacity': 100, 'price': 10.0})
+            for day in range(1, 6):
+                client.post('/api/bookings', json={'customer_name': 'A', 'destination_id': 1, 'venue_id': day, 'booking_date': f'2026-06-0{day}'})
+
+            # Opens the read-only connection, whose setup PRAGMAs are not the endpoint's
+            client.get('/api/destinations')
+
+            # Budgets do not grow with the number of rows returned.
+            # Views that load g.user add one for the users data version.
+            budgets = [
+                ('/api/catalog', 2),
+                ('/api/destinations', 2),
+                ('/api/venues', 2),
+                ('/api/bookings', 2),
+                ('/api/bookings?limit=2', 2),
+                ('/api/destinations/1/availability?month=2026-06', 2),
+                ('/api/venues/search?date=2026-06-01&guests=50', 1),
+                ('/api/search?q=venue', 2),
+                ('/api/users', 2),
+                # Users data version, BEGIN, last event id and one query per section
+                ('/api/admin/bootstrap', 7),
+            ]
+            for url, limit in budgets:
+                with assert_max_queries(app, limit):
+                    assert client.get(url).status_code == 200
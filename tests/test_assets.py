@@ -0,0 +1,42 @@
+import gzip
+import os
+import pytest
+
+@pytest.fixture
+def app_config(tmp_path):
+    return {'ASSETS_FOLDER': str(tmp_path / 'dist')}
+
+def test_unbuilt_assets_use_static(client):
+    page = client.get('/').data.decode()
+    assert '/static/style.css' in page
+    assert '/static/js/app.js' in page
+
+def test_build_and_serve_assets(client, app):
+    result = app.test_cli_runner().invoke(args=['build-assets'])
+    assert result.exit_code == 0
+
+    page = client.get('/').data.decode()
+    assert '/static/style.css' not in page
+    with app.test_request_context():
+        url = app.jinja_env.globals['asset_url']('style.css')
+    assert url.startswith('/assets/style.') and url.endswith('.css')
+    assert url in page
+
+    with open(os.path.join(app.static_folder, 'style.css'), 'rb') as f:
+        original = f.read()
+
+    response = client.get(url, headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Content-Type'].startswith('text/css')
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'max-age=31536000' in response.headers['Cache-Control']
+    assert gzip.decompress(response.data) == original
+
+    response = client.get(url, headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == original
+
+    assert client.get('/assets/manifest.json').status_code == 404
+    assert client.get('/assets/style.00000000.css').status_code == 404
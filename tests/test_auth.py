@@ -0,0 +1,91 @@
+import pytest
+import sqlite3
+from werkzeug.security import generate_password_hash
+from eternaal.db import get_db
+
+@pytest.fixture
+def app_config():
+    return {'USER_CACHE_TTL': 300}
+
+@pytest.fixture
+def app(app):
+    with app.app_context():
+        get_db().execute(
+            "INSERT INTO user (username, password, role) VALUES (?, ?, ?)",
+            ('carol', generate_password_hash('pw'), 'customer')
+        )
+        get_db().commit()
+    return app
+
+def count_user_queries(app):
+    """Record every SELECT on the user table issued while the returned list is alive."""
+    queries = []
+    with app.app_context():
+        get_db().set_trace_callback(lambda sql: queries.append(sql) if 'FROM user WHERE id' in sql else None)
+    return queries
+
+def test_user_row_is_cached_between_requests(client, app):
+    client.post('/login', json={'username': 'carol', 'password': 'pw'})
+    client.get('/api/bookings')
+    queries = count_user_queries(app)
+    for _ in range(3):
+        assert client.get('/api/bookings').status_code == 200
+    assert queries == []
+
+def test_public_endpoints_skip_user_lookup(client, app):
+    client.post('/login', json={'username': 'carol', 'password': 'pw'})
+    app.extensions['eternaal_user_cache'].invalidate(2)
+    queries = count_user_queries(app)
+    client.get('/api/destinations')
+    client.get('/api/catalog')
+    assert queries == []
+
+def test_fix_admin_refreshes_role(client, app):
+    client.post('/login', json={'username': 'carol', 'password': 'pw'})
+    assert client.get('/api/users').status_code == 401
+    client.get('/fix-admin')
+    assert client.get('/api/users').status_code == 200
+
+def test_deleted_user_is_logged_out(client, app):
+    admin = app.test_client()
+    admin.post('/login', json={'username': 'admin', 'password': 'admin'})
+    client.post('/login', json={'username': 'carol', 'password': 'pw'})
+    assert client.get('/api/bookings').status_code == 200
+
+    admin.delete('/api/users/2')
+    assert client.get('/api/bookings').status_code == 302
+
+def test_session_stamp_detects_stale_cache_entry(client, app):
+    """A newer version in the session (set by another worker) forces a reload"""
+    client.post('/login', json={'username': 'carol', 'password': 'pw'})
+    client.get('/api/bookings')
+
+    # Another worker promotes carol; our cache still has the old row
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE user SET role = 'admin' WHERE id = 2")
+        db.commit()
+        version = db.execute('SELECT session_version FROM user WHERE id = 2').fetchone()[0]
+    with client.session_transaction() as session:
+        session['user_version'] = version
+
+    assert client.get('/api/users').status_code == 200
+
+@pytest.mark.parametrize('change', [
+    "UPDATE user SET role = 'admin' WHERE id = 2",
+    'DELETE FROM user WHERE id = 2',
+])
+def test_changes_from_other_workers_evict_the_cache(client, app, change):
+    """No session stamp involved: the shared users version alone notices the change"""
+    client.post('/login', json={'username': 'carol', 'password': 'pw'})
+    assert client.get('/api/users').status_code == 401
+
+    # Another worker (or a script) changes carol on its own connection
+    with app.app_context():
+        conn = sqlite3.connect(app.config['DATABASE'])
+        conn.execute(change)
+        conn.commit()
+        conn.close()
+
+    expected = 200 if change.startswith('UPDATE') else 302
+    assert client.get('/api/users').status_code == expected
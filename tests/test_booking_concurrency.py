@@ -0,0 +1,71 @@
+"""
+Stress test: many processes race to book the same venue/date slots.
+
+Each process runs its own app instance (like a gunicorn worker) against the
+same SQLite file. The partial unique index must let exactly one booking per
+slot through and turn every other attempt into a 409, never a 500.
+"""
+import multiprocessing
+import os
+import pytest
+from eternaal import create_app
+from eternaal.db import get_db, init_db
+
+WORKERS = 6
+ATTEMPTS_PER_WORKER = 30
+DATES = ['2026-06-%02d' % day for day in range(1, 6)]
+
+def book_slots(db_path, write_queue, start, results):
+    app = create_app({'TESTING': True, 'DATABASE': db_path, 'DB_WRITE_QUEUE': write_queue})
+    client = app.test_client()
+    client.post('/login', json={'username': 'admin', 'password': 'admin'})
+    start.wait()
+
+    statuses = []
+    for i in range(ATTEMPTS_PER_WORKER):
+        response = client.post('/api/bookings', json={
+            'customer_name': f'Racer {os.getpid()}-{i}',
+            'destination_id': 1,
+            'venue_id': 1,
+            'booking_date': DATES[i % len(DATES)]
+        })
+        statuses.append(response.status_code)
+    results.put(statuses)
+
+@pytest.fixture
+def db_path(db_path):
+    app = create_app({'TESTING': True, 'DATABASE': db_path})
+    with app.app_context():
+        init_db()
+        db = get_db()
+        db.execute("INSERT INTO destination (name, description) VALUES ('Dublin', 'Race')")
+        db.execute("INSERT INTO venue (destination_id, name, capacity, price) VALUES (1, 'Castle', 100, 2500)")
+        db.commit()
+    return db_path
+
+@pytest.mark.parametrize('write_queue', [False, True])
+def test_concurrent_bookings_never_double_book(db_path, write_queue):
+    ctx = multiprocessing.get_context('spawn')
+    start = ctx.Event()
+    results = ctx.Queue()
+    workers = [ctx.Process(target=book_slots, args=(db_path, write_queue, start, results)) for _ in range(WORKERS)]
+    for w in workers:
+        w.start()
+    start.set()
+
+    statuses = [code for _ in workers for code in results.get(timeout=120)]
+    for w in workers:
+        w.join(timeout=30)
+
+    assert len(statuses) == WORKERS * ATTEMPTS_PER_WORKER
+    assert set(statuses) <= {201, 409}
+    assert statuses.count(201) == len(DATES)
+
+    app = create_app({'TESTING': True, 'DATABASE': db_path})
+    with app.app_context():
+        duplicates = get_db().execute('''
+            SELECT venue_id, booking_date, COUNT(*) FROM booking
+            WHERE status NOT IN ('cancelled', 'rejected')
+            GROUP BY venue_id, booking_date HAVING COUNT(*) > 1
+        ''').fetchall()
+    assert duplicates == []
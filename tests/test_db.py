@@ -0,0 +1,79 @@
+import sqlite3
+import pytest
+from eternaal import create_app
+from eternaal.db import get_db, get_read_db, get_read_pool, get_write_db
+
+@pytest.fixture
+def app_config():
+    return {
+        'SQLITE_CACHE_SIZE': -4000,
+        'SQLITE_BUSY_TIMEOUT': 1234,
+    }
+
+def test_connection_is_reused_between_requests(app):
+    # The connection goes back to the pool at teardown instead of being closed
+    with app.app_context():
+        first = get_db()
+    with app.app_context():
+        second = get_db()
+    assert first is second
+
+def test_connection_pragmas_come_from_config(app):
+    with app.app_context():
+        db = get_db()
+        assert db.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert db.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+        assert db.execute('PRAGMA cache_size').fetchone()[0] == -4000
+        assert db.execute('PRAGMA busy_timeout').fetchone()[0] == 1234
+        assert db.execute('PRAGMA foreign_keys').fetchone()[0] == 1
+
+def test_uncommitted_work_is_rolled_back_on_release(app):
+    with app.app_context():
+        get_db().execute("INSERT INTO destination (name, description) VALUES ('Left', 'open')")
+    with app.app_context():
+        assert get_db().execute('SELECT COUNT(*) FROM destination').fetchone()[0] == 0
+
+def test_pool_can_be_disabled(app):
+    unpooled = create_app({'TESTING': True, 'DATABASE': app.config['DATABASE'], 'DB_POOL_SIZE': 0})
+    with unpooled.app_context():
+        first = get_db()
+    with unpooled.app_context():
+        assert get_db() is not first
+
+def test_warm_up_fills_pool_and_catalog(app):
+    from eternaal import warm_up
+
+    warm_up(app, connections=3)
+    assert len(app.extensions['eternaal_db_read_pool'].idle) == 3
+    assert len(app.extensions['eternaal_db_pool'].idle) >= 1
+    assert app.extensions['eternaal_catalog'].snapshot == b'[]'
+
+    # Never more than the pool keeps
+    warm_up(app, connections=100)
+    with app.app_context():
+        assert len(get_read_pool().idle) == app.config['DB_READ_POOL_SIZE']
+
+def test_get_requests_read_through_a_read_only_connection(app):
+    with app.test_request_context('/api/destinations'):
+        db = get_db()
+        assert db is get_read_db()
+        assert db is not get_write_db()
+        assert db.execute('PRAGMA query_only').fetchone()[0] == 1
+        with pytest.raises(sqlite3.OperationalError, match='readonly'):
+            db.execute("INSERT INTO destination (name, description) VALUES ('No', 'write')")
+
+    with app.test_request_context('/api/destinations', method='POST'):
+        assert get_db() is get_write_db()
+
+    app.config['DB_ROUTE_READS'] = False
+    with app.test_request_context('/api/destinations'):
+        assert get_db() is get_write_db()
+
+def test_read_only_connection_sees_committed_writes(app):
+    with app.test_request_context('/api/destinations'):
+        reader = get_db()
+        assert reader.execute('SELECT COUNT(*) FROM destination').fetchone()[0] == 0
+        writer = get_write_db()
+        writer.execute("INSERT INTO destination (name, description) VALUES ('New', 'row')")
+        writer.commit()
+        assert reader.execute('SELECT COUNT(*) FROM destination').fetchone()[0] == 1
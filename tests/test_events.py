@@ -0,0 +1,121 @@
+import json
+import pytest
+from eternaal.db import get_db
+
+@pytest.fixture
+def app_config():
+    return {
+        'EVENTS_POLL_INTERVAL': 0.05,
+        'EVENTS_HEARTBEAT': 0.2,
+    }
+
+@pytest.fixture
+def app(app):
+    with app.app_context():
+        db = get_db()
+        db.execute("INSERT INTO destination (name, description) VALUES ('Dublin', 'Live')")
+        db.execute("INSERT INTO venue (destination_id, name, capacity, price) VALUES (1, 'Castle', 100, 2500)")
+        db.commit()
+    return app
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    client.post('/login', json={'username': 'admin', 'password': 'admin'})
+    return client
+
+def book(client, day):
+    return client.post('/api/bookings', json={
+        'customer_name': 'Ann', 'destination_id': 1, 'venue_id': 1, 'booking_date': f'2026-06-{day:02d}'
+    })
+
+def read_events(response, count):
+    """The next `count` booking/reset events from an open stream, skipping keep-alives."""
+    events = []
+    chunks = iter(response.response)
+    while len(events) < count:
+        for message in next(chunks).decode().split('\n\n'):
+            fields = dict(line.split(': ', 1) for line in message.splitlines() if not line.startswith(':'))
+            if fields.get('event'):
+                events.append((int(fields['id']), fields['event'], json.loads(fields['data'])))
+    return events
+
+def test_booking_changes_are_recorded(client, app):
+    book(client, 1)
+    client.patch('/api/bookings/1', json={'status': 'confirmed'})
+    client.delete('/api/bookings/1')
+    with app.app_context():
+        rows = get_db().execute('SELECT booking_id, kind FROM booking_event ORDER BY id').fetchall()
+    assert [tuple(r) for r in rows] == [(1, 'created'), (1, 'updated'), (1, 'deleted')]
+
+def test_old_events_are_pruned(app):
+    with app.app_context():
+        db = get_db()
+        db.execute("INSERT INTO booking_event (booking_id, kind) VALUES (1, 'created')")
+        db.execute("INSERT INTO booking_event (id, booking_id, kind) VALUES (20000, 2, 'created')")
+        db.commit()
+        assert [r[0] for r in db.execute('SELECT id FROM booking_event')] == [20000]
+
+def test_stream_resumes_after_last_event_id(client):
+    book(client, 1)
+    book(client, 2)
+    client.patch('/api/bookings/1', json={'status': 'confirmed'})
+
+    response = client.get('/api/bookings/events', headers={'Last-Event-ID': '1'}, buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    events = read_events(response, 2)
+    response.close()
+
+    assert [(i, data['type'], data['id']) for i, _, data in events] == [(2, 'created', 2), (3, 'updated', 1)]
+    assert events[1][2]['booking']['status'] == 'confirmed'
+    assert events[1][2]['booking']['venue_name'] == 'Castle'
+
+def test_stream_pushes_new_bookings(client, app):
+    response = client.get('/api/bookings/events', buffered=False)
+    book(client, 3)
+    events = read_events(response, 1)
+    response.close()
+    assert events[0][2]['type'] == 'created'
+    assert events[0][2]['booking']['booking_date'] == '2026-06-03'
+
+def test_stream_resets_clients_too_far_behind(client, app):
+    app.config['EVENTS_BUFFER_SIZE'] = 2
+    app.extensions['eternaal_events'].buffer_size = 2
+    for day in range(1, 5):
+        book(client, day)
+
+    response = client.get('/api/bookings/events?last_event_id=0', buffered=False)
+    events = read_events(response, 1)
+    response.close()
+    assert events == [(4, 'reset', {})]
+
+def test_stream_waits_for_events_this_worker_has_not_polled(client, app):
+    broadcaster = app.extensions['eternaal_events']
+    broadcaster.poll_interval = 60
+    broadcaster.start()
+    # Committed by "another worker": this one has not polled it yet
+    with app.app_context():
+        db = get_db()
+        db.execute("INSERT INTO booking (customer_name, customer_email, destination_id, venue_id, booking_date) "
+                   "VALUES ('Bob', 'b@example.com', 1, 1, '2026-06-01')")
+        db.commit()
+    assert broadcaster.last_id == 0
+
+    response = client.get('/api/bookings/events?last_event_id=1', buffered=False)
+    book(client, 2)
+    events = read_events(response, 1)
+    response.close()
+    assert [(i, e) for i, e, _ in events] == [(2, 'booking')]
+
+def test_stream_resets_ids_the_database_never_had(client):
+    book(client, 1)
+    response = client.get('/api/bookings/events?last_event_id=50', buffered=False)
+    events = read_events(response, 1)
+    response.close()
+    assert events == [(1, 'reset', {})]
+
+def test_stream_is_admin_only(app):
+    client = app.test_client()
+    client.post('/register', data={'username': 'cust', 'password': 'pw', 'role': 'customer'})
+    client.post('/login', json={'username': 'cust', 'password': 'pw'})
+    assert client.get('/api/bookings/events').status_code == 401
@@ -0,0 +1,108 @@
+import io
+import json
+import os
+import pytest
+from PIL import Image
+from eternaal.db import get_db
+from eternaal.images import image_srcset
+
+@pytest.fixture
+def app_config(tmp_path):
+    (tmp_path / 'uploads').mkdir()
+    (tmp_path / 'derived').mkdir()
+    return {
+        'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+        'IMAGE_DERIVATIVE_FOLDER': str(tmp_path / 'derived'),
+        'IMAGE_WIDTHS': (320, 640),
+    }
+
+@pytest.fixture
+def app(app):
+    upload_dir = app.config['UPLOAD_FOLDER']
+    Image.new('RGBA', (800, 400), (200, 30, 30, 128)).save(os.path.join(upload_dir, 'castle.png'))
+    Image.new('RGB', (500, 250), (0, 100, 0)).save(os.path.join(upload_dir, 'small.jpg'))
+    open(os.path.join(upload_dir, 'empty.jpg'), 'wb').close()
+    return app
+
+def test_resize_serves_the_derivative(client, app):
+    response = client.get('/images/resize/uploads/castle.png?w=320&fmt=webp')
+    assert response.status_code == 200
+    assert response.mimetype == 'image/webp'
+    assert 'max-age=3600' in response.headers['Cache-Control']
+    names = os.listdir(app.config['IMAGE_DERIVATIVE_FOLDER'])
+    assert len(names) == 1 and names[0].startswith('castle-320w-') and names[0].endswith('.webp')
+    with Image.open(io.BytesIO(response.data)) as img:
+        assert img.format == 'WEBP'
+        assert img.size == (320, 160)
+
+    # Revalidation is answered without sending the image again
+    etag = response.headers['ETag']
+    assert client.get('/images/resize/uploads/castle.png?w=320&fmt=webp',
+                      headers={'If-None-Match': etag}).status_code == 304
+
+    # Same source and settings reuse the file; no upscaling past the original
+    client.get('/images/resize/uploads/castle.png?w=320&fmt=webp')
+    assert os.listdir(app.config['IMAGE_DERIVATIVE_FOLDER']) == names
+    with Image.open(io.BytesIO(client.get('/images/resize/uploads/small.jpg?w=640&fmt=jpeg').data)) as img:
+        assert img.format == 'JPEG'
+        assert img.size == (500, 250)
+
+def test_destinations_carry_hashed_srcsets(client, app):
+    with app.app_context():
+        db = get_db()
+        db.execute("INSERT INTO destination (name, description, image_url) VALUES ('Castle', 'x', '/static/uploads/castle.png')")
+        db.execute("INSERT INTO destination (name, description, image_url) VALUES ('Far', 'x', 'https://example.com/far.jpg')")
+        db.commit()
+    castle, far = json.loads(client.get('/api/destinations').data)
+    assert far['image_srcset'] is None
+
+    # 640 is within the 800px original; every URL carries the source hash
+    urls = [entry.split(' ') for entry in castle['image_srcset']['webp'].split(', ')]
+    assert [descriptor for _, descriptor in urls] == ['320w', '640w']
+    url = urls[0][0]
+    assert url.startswith('/images/resize/uploads/castle.png?w=320&fmt=webp&v=')
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert set(response.headers['Cache-Control'].split(', ')) == {'public', 'max-age=31536000', 'immutable'}
+
+    # A stale hash still gets the current image, but only for SERVE_MAX_AGE
+    response = client.get(url.rsplit('=', 1)[0] + '=000000000000')
+    assert response.status_code == 200
+    assert 'immutable' not in response.headers['Cache-Control']
+    assert 'max-age=3600' in response.headers['Cache-Control']
+
+def test_wide_sources_collapse_to_their_real_width(client, app):
+    with app.test_request_context():
+        srcset = image_srcset('/static/uploads/small.jpg')
+    # 640 is past the 500px original, so it is listed at 500w
+    entries = [entry.split(' ') for entry in srcset['jpeg'].split(', ')]
+    assert [descriptor for _, descriptor in entries] == ['320w', '500w']
+    assert '?w=640&' in entries[1][0]
+
+def test_existing_derivatives_are_served_without_decoding_the_source(client, monkeypatch):
+    client.get('/images/resize/uploads/castle.png?w=320&fmt=webp')
+
+    def no_decoding(*args, **kwargs):
+        raise AssertionError('source image opened again')
+    monkeypatch.setattr(Image, 'open', no_decoding)
+    assert client.get('/images/resize/uploads/castle.png?w=320&fmt=webp').status_code == 200
+
+def test_resize_rejects_bad_requests(client):
+    assert client.get('/images/resize/uploads/castle.png?w=321&fmt=webp').status_code == 400
+    assert client.get('/images/resize/uploads/castle.png?w=320&fmt=gif').status_code == 400
+    assert client.get('/images/resize/uploads/missing.png?w=320').status_code == 404
+    assert client.get('/images/resize/uploads/empty.jpg?w=320').status_code == 404
+    assert client.get('/images/resize/../secret.png?w=320').status_code == 404
+
+def test_build_images(app):
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['build-images'])
+    assert result.exit_code == 0
+    assert 'Skipped uploads/empty.jpg' in result.output
+    assert 'Built ' in result.output
+
+    # Both formats at every width, so no request has to resize
+    names = os.listdir(app.config['IMAGE_DERIVATIVE_FOLDER'])
+    castle = sorted((name.split('-')[1], name.rsplit('.', 1)[1]) for name in names if name.startswith('castle-'))
+    assert castle == [('320w', 'jpg'), ('320w', 'webp'), ('640w', 'jpg'), ('640w', 'webp')]
@@ -0,0 +1,67 @@
+import json
+from eternaal.db import get_db
+
+def login_as_admin(client):
+    return client.post('/login', json={'username': 'admin', 'password': 'admin'})
+
+CSV_BODY = """destination,description,image_url,venue,capacity,price,venue_image_url
+Galway,City of tribes,,Ballynahinch Castle,120,3200,
+Galway,,,Kylemore Abbey,80,2800,
+Donegal,Wild Atlantic Way,,,,,
+"""
+
+def test_import_csv(client, app):
+    with client:
+        login_as_admin(client)
+        response = client.post('/api/import', data=CSV_BODY, content_type='text/csv')
+        assert response.status_code == 201
+        assert json.loads(response.data) == {'destinations_created': 2, 'venues_created': 2, 'dry_run': False}
+
+        catalog = json.loads(client.get('/api/catalog').data)
+        assert [d['name'] for d in catalog] == ['Galway', 'Donegal']
+        assert [v['name'] for v in catalog[0]['items']] == ['Ballynahinch Castle', 'Kylemore Abbey']
+
+def test_import_json_reuses_existing_destination(client, app):
+    with client:
+        login_as_admin(client)
+        client.post('/api/destinations', json={'name': 'Dublin', 'description': 'Capital'})
+        body = [
+            {'name': 'Dublin', 'venues': [{'name': 'Dublin Castle', 'capacity': 150, 'price': 2500}]},
+            {'name': 'Kilkenny', 'description': 'Medieval mile', 'venues': []},
+        ]
+        response = client.post('/api/import', json=body)
+        assert response.status_code == 201
+        assert json.loads(response.data)['destinations_created'] == 1
+
+    with app.app_context():
+        db = get_db()
+        assert db.execute('SELECT COUNT(*) FROM destination').fetchone()[0] == 2
+        assert db.execute('SELECT destination_id FROM venue').fetchone()[0] == 1
+
+def test_invalid_rows_are_reported_and_nothing_is_written(client, app):
+    with client:
+        login_as_admin(client)
+        body = '\n'.join([
+            json.dumps({'name': 'Cork', 'description': 'x', 'venues': [{'name': 'Fota', 'capacity': 100, 'price': 900}]}),
+            json.dumps({'name': 'Kerry', 'description': 'x', 'venues': [{'name': 'Bad', 'capacity': -5, 'price': 'cheap'}]}),
+            '{not json',
+        ])
+        response = client.post('/api/import?format=ndjson', data=body)
+        assert response.status_code == 400
+        errors = json.loads(response.data)['errors']
+        assert [e['row'] for e in errors] == [3]
+        assert errors[0]['error'].startswith('Invalid JSON')
+
+        response = client.post('/api/import?format=ndjson', data='\n'.join(body.splitlines()[:2]))
+        errors = json.loads(response.data)['errors']
+        assert [e['row'] for e in errors] == [2, 2]
+        assert errors[0]['error'] == 'venues[0].capacity is missing or invalid'
+
+    with app.app_context():
+        assert get_db().execute('SELECT COUNT(*) FROM destination').fetchone()[0] == 0
+
+def test_import_catalog_command(app, tmp_path):
+    path = tmp_path / 'catalog.csv'
+    path.write_text(CSV_BODY)
+    result = app.test_cli_runner().invoke(args=['import-catalog', str(path)])
+    assert 'Imported 2 new destination(s), 2 venue(s).' in result.output
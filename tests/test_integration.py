@@ -1,34 +1,5 @@
-import pytest
 import json
-import os
-import tempfile
-from eternaal import create_app
-from eternaal.db import get_db, init_db
-
-@pytest.fixture
-def app():
-    """Create and configure a new app instance for each test."""
-    db_fd, db_path = tempfile.mkstemp()
-    
-    app = create_app({
-        'TESTING': True,
-        'DATABASE': db_path,
-    })
-
-    with app.app_context():
-        init_db()
-
-    yield app
-
-    os.close(db_fd)
-    os.unlink(db_path)
-
-
-@pytest.fixture
-def client(app):
-    """A test client for the app."""
-    return app.test_client()
-
+from eternaal.db import get_db
 
 def login_as_admin(client):
     """Helper function to login as admin"""
@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import pytest
+from eternaal import metrics
+
+@pytest.fixture
+def app_config():
+    return {'METRICS_ALLOW_LOCALHOST': True}
+
+def login_as_admin(client):
+    return client.post('/login', json={'username': 'admin', 'password': 'admin'})
+
+def sample(text, line_start):
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+def test_metrics_per_endpoint(client):
+    client.get('/api/destinations')
+    client.get('/api/destinations')
+    client.get('/api/venues/999/availability')
+    client.get('/')
+    client.get('/no-such-page')
+
+    text = client.get('/metrics').data.decode()
+    assert '# TYPE eternaal_request_duration_seconds histogram' in text
+    assert sample(text, 'eternaal_requests_total{endpoint="routes.get_destinations",method="GET",status="200"}') == 2
+    assert sample(text, 'eternaal_requests_total{endpoint="routes.get_venue_availability",method="GET",status="404"}') == 1
+    assert sample(text, 'eternaal_requests_total{endpoint="unmatched",method="GET",status="404"}') == 1
+    assert sample(text, 'eternaal_request_duration_seconds_count{endpoint="routes.get_destinations"}') == 2
+    assert sample(text, 'eternaal_request_duration_seconds_bucket{endpoint="routes.get_destinations",le="+Inf"}') == 2
+    assert sample(text, 'eternaal_sql_statements_total{endpoint="routes.get_venue_availability"}') >= 1
+    assert sample(text, 'eternaal_json_seconds_total{endpoint="routes.get_destinations"}') > 0
+    assert sample(text, 'eternaal_template_seconds_total{endpoint="routes.index"}') > 0
+
+def test_metrics_is_admin_token_or_localhost_only(client, app):
+    remote = {'REMOTE_ADDR': '203.0.113.5'}
+    assert client.get('/metrics', environ_base=remote).status_code == 404
+
+    app.config['METRICS_TOKEN'] = 's3cret'
+    assert client.get('/metrics', environ_base=remote, headers={'Authorization': 'Bearer wrong'}).status_code == 404
+    assert client.get('/metrics', environ_base=remote, headers={'Authorization': 'Bearer s3cret'}).status_code == 200
+
+    # Off by default: behind a same-host proxy everyone is localhost
+    app.config['METRICS_ALLOW_LOCALHOST'] = False
+    assert client.get('/metrics').status_code == 404
+
+    login_as_admin(client)
+    assert client.get('/metrics', environ_base=remote).status_code == 200
+
+def test_workers_are_added_up(app, client):
+    folder = tempfile.mkdtemp()
+    app.config['METRICS_DIR'] = folder
+    try:
+        client.get('/api/destinations')
+        # Another live worker, and one that has exited (pid that cannot exist)
+        other = {'counters': {'eternaal_requests_total': [[['routes.get_destinations', 'GET', '200'], 3]]},
+                 'histograms': {'routes.get_destinations': [3] + [0] * (len(metrics.BUCKETS) + 1)}}
+        metrics._write_json(os.path.join(folder, f'{os.getppid()}.json'), other)
+        metrics._write_json(os.path.join(folder, '999999999.json'), other)
+
+        text = client.get('/metrics').data.decode()
+        assert sample(text, 'eternaal_requests_total{endpoint="routes.get_destinations",method="GET",status="200"}') == 7
+        # The exited worker was folded into the archive and still counts
+        assert not os.path.exists(os.path.join(folder, '999999999.json'))
+        text = client.get('/metrics').data.decode()
+        assert sample(text, 'eternaal_requests_total{endpoint="routes.get_destinations",method="GET",status="200"}') == 7
+    finally:
+        shutil.rmtree(folder)
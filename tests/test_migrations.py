@@ -0,0 +1,61 @@
+import sqlite3
+import pytest
+from eternaal import create_app
+from eternaal.db import get_db, get_migrations, upgrade_db
+
+LEGACY_SCHEMA = '''
+CREATE TABLE destination (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,
+    description TEXT NOT NULL, image_url TEXT, availability INTEGER NOT NULL DEFAULT 1);
+CREATE TABLE venue (id INTEGER PRIMARY KEY AUTOINCREMENT, destination_id INTEGER NOT NULL,
+    name TEXT NOT NULL, capacity INTEGER NOT NULL, price REAL NOT NULL, image_url TEXT,
+    availability INTEGER NOT NULL DEFAULT 1);
+CREATE TABLE booking (id INTEGER PRIMARY KEY AUTOINCREMENT, customer_name TEXT NOT NULL,
+    customer_email TEXT, destination_id INTEGER NOT NULL, venue_id INTEGER NOT NULL,
+    booking_date TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending');
+CREATE TABLE user (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE NOT NULL,
+    password TEXT NOT NULL, role TEXT NOT NULL DEFAULT 'customer');
+INSERT INTO destination (name, description) VALUES ('Dublin', 'Existing data');
+INSERT INTO venue (destination_id, name, capacity, price) VALUES (1, 'Castle', 100, 2500);
+INSERT INTO booking (customer_name, destination_id, venue_id, booking_date) VALUES ('Ann', 1, 1, '2026-06-12');
+'''
+
+@pytest.fixture
+def app(db_path):
+    """An app pointed at a database created by the old DROP-and-recreate schema.sql"""
+    conn = sqlite3.connect(db_path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.close()
+
+    return create_app({'TESTING': True, 'DATABASE': db_path})
+
+def test_upgrade_keeps_existing_data(app):
+    with app.app_context():
+        applied = upgrade_db()
+        assert [v for v, _ in applied] == [v for v, _, _ in get_migrations()]
+
+        db = get_db()
+        assert db.execute('SELECT name FROM destination').fetchone()['name'] == 'Dublin'
+        assert db.execute('SELECT customer_name FROM booking').fetchone()['customer_name'] == 'Ann'
+        assert db.execute('SELECT MAX(version) FROM schema_version').fetchone()[0] == applied[-1][0]
+
+def test_upgrade_is_idempotent(app):
+    with app.app_context():
+        upgrade_db()
+        assert upgrade_db() == []
+
+def test_double_booking_check_uses_index(app):
+    with app.app_context():
+        upgrade_db()
+        plan = get_db().execute(
+            'EXPLAIN QUERY PLAN SELECT id FROM booking WHERE venue_id = ? AND booking_date = ?',
+            (1, '2026-06-12')
+        ).fetchall()
+        assert any('USING INDEX' in row['detail'] or 'USING COVERING INDEX' in row['detail'] for row in plan)
+
+def test_db_upgrade_command(app):
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['db-upgrade'])
+    assert 'Applied migration 0001 initial' in result.output
+
+    result = runner.invoke(args=['db-upgrade'])
+    assert 'Database is up to date.' in result.output
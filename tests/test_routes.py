@@ -1,33 +1,9 @@
-import os
-import tempfile
 import pytest
-from eternaal import create_app
-from eternaal.db import get_db, init_db
+from eternaal.db import get_db
 
 @pytest.fixture
-def app():
-    # Create a temporary file for the database
-    db_fd, db_path = tempfile.mkstemp()
-    
-    app = create_app({
-        "TESTING": True, 
-        "SECRET_KEY": "test", 
-        "DATABASE": db_path
-    })
-    
-    # Initialize the database
-    with app.app_context():
-        init_db()
-        
-    yield app
-    
-    # Cleanup
-    os.close(db_fd)
-    os.unlink(db_path)
-
-@pytest.fixture
-def client(app):
-    return app.test_client()
+def app_config():
+    return {"SECRET_KEY": "test"}
 
 def test_index_page(client):
     resp = client.get('/')
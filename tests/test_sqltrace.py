@@ -0,0 +1,53 @@
+import logging
+import pytest
+from eternaal.db import get_db
+from eternaal.sqltrace import assert_max_queries, capture_queries, statement_shape
+
+@pytest.fixture
+def app_config():
+    return {
+        'SQL_TRACE': True,
+        'SQL_REPEAT_THRESHOLD': 3,
+    }
+
+@pytest.fixture
+def app(app):
+    def n_plus_one():
+        db = get_db()
+        for venue_id in range(1, 6):
+            db.execute('SELECT * FROM venue WHERE id = ?', (venue_id,)).fetchone()
+        db.execute("SELECT * FROM venue WHERE name = 'a'").fetchall()
+        db.execute("SELECT * FROM venue WHERE name = 'b'").fetchall()
+        return 'ok'
+
+    app.add_url_rule('/n-plus-one', 'n_plus_one', n_plus_one)
+    return app
+
+def test_statement_shape():
+    assert statement_shape("SELECT *  FROM venue\n WHERE id = 12 AND name = 'it''s'") == \
+        'SELECT * FROM venue WHERE id = ? AND name = ?'
+    assert statement_shape('SELECT * FROM venue WHERE id IN (?, ?, ?)') == \
+        statement_shape('SELECT * FROM venue WHERE id IN (?)')
+
+def test_repeated_statements_are_logged(client, caplog):
+    with caplog.at_level(logging.WARNING):
+        client.get('/n-plus-one')
+    warnings = [r.getMessage() for r in caplog.records if 'N+1' in r.getMessage()]
+    assert warnings == ['Possible N+1 query in n_plus_one: ran 5 times: SELECT * FROM venue WHERE id = ?']
+
+def test_slow_queries_are_logged(client, app, caplog):
+    app.config['SQL_SLOW_THRESHOLD'] = 0
+    with caplog.at_level(logging.WARNING):
+        client.get('/api/destinations')
+    assert any(r.getMessage().startswith('Slow query (') and 'in routes.get_destinations: SELECT * FROM destination' in r.getMessage()
+               for r in caplog.records)
+
+def test_assert_max_queries(client, app):
+    client.get('/n-plus-one')  # opens the read-only connection first
+    with capture_queries(app) as queries:
+        client.get('/n-plus-one')
+    assert len(queries) == 7
+
+    with pytest.raises(AssertionError, match='at most 2 queries, 7 were run'):
+        with assert_max_queries(app, 2):
+            client.get('/n-plus-one')
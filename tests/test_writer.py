@@ -0,0 +1,109 @@
+import threading
+from concurrent.futures import Future
+import pytest
+from eternaal.db import connect, get_db
+from eternaal.writer import WriteError, run_write, transaction
+
+@pytest.fixture
+def app_config():
+    return {'DB_WRITE_QUEUE': True}
+
+@pytest.fixture
+def app(app):
+    with app.app_context():
+        db = get_db()
+        db.execute("INSERT INTO destination (name, description) VALUES ('Dublin', 'Queue')")
+        db.execute("INSERT INTO venue (destination_id, name, capacity, price) VALUES (1, 'Castle', 100, 2500)")
+        db.commit()
+    return app
+
+def count(app, sql):
+    with app.app_context():
+        return get_db().execute(sql).fetchone()[0]
+
+def test_run_write_commits_on_the_writer_thread(app):
+    threads = []
+
+    def insert(db):
+        threads.append(threading.current_thread().name)
+        return db.execute("INSERT INTO destination (name, description) VALUES ('Galway', 'x')").lastrowid
+
+    with app.app_context():
+        assert run_write(insert) == 2
+    assert threads == ['db-writer']
+    assert count(app, 'SELECT COUNT(*) FROM destination') == 2
+
+def test_write_error_undoes_only_its_own_work(app):
+    def fails(db):
+        db.execute("INSERT INTO destination (name, description) VALUES ('Lost', 'x')")
+        raise WriteError('Nope', 409)
+
+    with app.app_context():
+        with pytest.raises(WriteError) as e:
+            run_write(fails)
+    assert e.value.status == 409
+    assert count(app, "SELECT COUNT(*) FROM destination WHERE name = 'Lost'") == 0
+
+def test_batch_commits_together_and_isolates_failures(app):
+    def insert(name):
+        return lambda db: db.execute('INSERT INTO destination (name, description) VALUES (?, ?)', (name, 'x')).lastrowid
+
+    def fails(db):
+        db.execute("INSERT INTO destination (name, description) VALUES ('Lost', 'x')")
+        raise WriteError('Nope')
+
+    batch = [(insert('A'), Future()), (fails, Future()), (insert('B'), Future())]
+    conn = connect(app.config)
+    app.extensions['eternaal_writer']._commit_batch(conn, batch)
+    conn.close()
+
+    assert batch[0][1].result() == 2
+    assert isinstance(batch[1][1].exception(), WriteError)
+    assert batch[2][1].result() == 3
+    assert count(app, "SELECT group_concat(name) FROM destination WHERE id > 1") == 'A,B'
+
+def test_transaction_bypasses_the_queue_and_rolls_back_together(app):
+    def insert(db):
+        return db.execute("INSERT INTO destination (name, description) VALUES ('Galway', 'x')").lastrowid
+
+    with app.test_request_context('/api/batch', method='POST'):
+        with pytest.raises(WriteError):
+            with transaction():
+                assert run_write(insert) == 2
+                run_write(insert)
+                raise WriteError('Nope')
+        assert app.extensions['eternaal_writer'].thread is None
+
+        with transaction():
+            run_write(insert)
+    assert count(app, "SELECT COUNT(*) FROM destination WHERE name = 'Galway'") == 1
+
+def test_catalog_import_goes_through_the_queue(app):
+    client = app.test_client()
+    client.post('/login', json={'username': 'admin', 'password': 'admin'})
+    response = client.post('/api/import', json=[
+        {'name': 'Galway', 'description': 'x', 'venues': [{'name': 'Pier', 'capacity': 10, 'price': 5}]}
+    ])
+    assert response.status_code == 201
+    assert app.extensions['eternaal_writer'].thread is not None
+    assert count(app, "SELECT COUNT(*) FROM venue WHERE name = 'Pier'") == 1
+
+def test_concurrent_bookings_through_the_queue(app):
+    client = app.test_client()
+    client.post('/login', json={'username': 'admin', 'password': 'admin'})
+    statuses = []
+
+    def book(day):
+        response = client.post('/api/bookings', json={
+            'customer_name': 'Q', 'destination_id': 1, 'venue_id': 1, 'booking_date': f'2026-07-{day % 5 + 1:02d}'
+        })
+        statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=book, args=(day,)) for day in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(statuses) == [201] * 5 + [409] * 15
+    assert count(app, 'SELECT COUNT(*) FROM booking') == 5